@@ -0,0 +1,356 @@
+"""
+RECOV.AI - Compact Account Store
+================================
+Struct-of-arrays storage for uploaded accounts and their latest predictions.
+
+Instead of one Python dict per account (plus a float64 DataFrame and a result
+dict with nested DCA dicts), every field lives in a typed NumPy column:
+float32 numerics, int8 flags, int16 category codes, a float32 feature matrix
+and a float32 probability column. Full response dicts are only rebuilt when
+an endpoint returns them.
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.validation import SCHEMA, CATEGORY_VALUES
+    from backend.feature_pipeline import parse_flags
+    from backend.predictor import RISK_LEVELS, derive_outputs
+except ModuleNotFoundError:
+    from validation import SCHEMA, CATEGORY_VALUES
+    from feature_pipeline import parse_flags
+    from predictor import RISK_LEVELS, derive_outputs
+
+
+# Columns stored as Python strings (everything else is typed)
+STRING_COLUMNS = ['account_id', 'company_name']
+
+# Money keeps float64 so amounts round-trip exactly
+FLOAT64_COLUMNS = ['amount']
+
+
+class AccountStore:
+    """
+    In-memory account book with a compact prediction table.
+
+    Rows are append-only: an account keeps its row when it is re-uploaded,
+    so row numbers can be used as stable handles by other components.
+    """
+
+    def __init__(self, feature_names: Optional[List[str]] = None, initial_capacity: int = 1024):
+        self.feature_names = list(feature_names or [])
+        self._lock = threading.RLock()
+        self._size = 0
+        self._capacity = 0
+        self._index: Dict[str, int] = {}
+
+        # Column layout from the AccountData schema
+        self.numeric_columns = [
+            name for name, spec in SCHEMA.items() if spec['type'] in (int, float)
+        ]
+        self.flag_columns = [name for name, spec in SCHEMA.items() if spec['type'] is bool]
+        self.category_columns = [name for name in SCHEMA if name in CATEGORY_VALUES]
+        self.int_columns = [name for name, spec in SCHEMA.items() if spec['type'] is int]
+
+        self._strings: Dict[str, np.ndarray] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._flags: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, List[str]] = {col: [] for col in self.category_columns}
+        self._category_index: Dict[str, Dict[str, int]] = {col: {} for col in self.category_columns}
+
+        self.features = np.zeros((0, len(self.feature_names)), dtype=np.float32)
+        self.probability = np.zeros(0, dtype=np.float32)
+        self.scored_at = np.zeros(0, dtype=np.float64)
+
+        self._grow(initial_capacity)
+
+    # ------------------------------------------------------------------------
+    # STORAGE
+    # ------------------------------------------------------------------------
+
+    def _grow(self, needed: int):
+        """Resize every column to hold at least `needed` rows (amortized doubling)"""
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2, 16)
+
+        def resized(array, fill=0):
+            shape = (capacity,) + array.shape[1:] if array is not None else (capacity,)
+            out = np.full(shape, fill, dtype=array.dtype)
+            out[:self._size] = array[:self._size]
+            return out
+
+        for col in STRING_COLUMNS:
+            self._strings[col] = resized(self._strings.get(col, np.empty(0, dtype=object)), None)
+        for col in self.numeric_columns:
+            dtype = np.float64 if col in FLOAT64_COLUMNS else np.float32
+            self._numeric[col] = resized(self._numeric.get(col, np.empty(0, dtype=dtype)))
+        for col in self.flag_columns:
+            self._flags[col] = resized(self._flags.get(col, np.empty(0, dtype=np.int8)))
+        for col in self.category_columns:
+            self._codes[col] = resized(self._codes.get(col, np.empty(0, dtype=np.int16)), -1)
+
+        self.features = resized(self.features)
+        self.probability = resized(self.probability, np.nan)
+        self.scored_at = resized(self.scored_at)
+        self._capacity = capacity
+
+    def _rows_for(self, account_ids) -> np.ndarray:
+        """Row numbers for ids, appending new accounts at the end"""
+        rows = np.empty(len(account_ids), dtype=np.int64)
+        new_count = 0
+        for i, account_id in enumerate(account_ids):
+            row = self._index.get(account_id)
+            if row is None:
+                row = self._size + new_count
+                self._index[account_id] = row
+                new_count += 1
+            rows[i] = row
+        self._grow(self._size + new_count)
+        self._size += new_count
+        return rows
+
+    def _encode(self, col: str, values: pd.Series) -> np.ndarray:
+        """Category strings → int16 codes (new categories are appended)"""
+        index = self._category_index[col]
+        for value in pd.unique(values):
+            if value not in index:
+                index[value] = len(self._categories[col])
+                self._categories[col].append(value)
+        return values.map(index).to_numpy(dtype=np.int16)
+
+    # ------------------------------------------------------------------------
+    # WRITE
+    # ------------------------------------------------------------------------
+
+    def upsert(self, data: Union[pd.DataFrame, List[dict]], features: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Insert or overwrite accounts (vectorized per column).
+
+        Args:
+            data: Validated accounts (DataFrame or list of dicts)
+            features: Optional float32 feature matrix, one row per account
+
+        Returns:
+            Row numbers of the accounts, in input order
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame.from_records(list(data))
+        n_rows = len(df)
+        if n_rows == 0:
+            return np.empty(0, dtype=np.int64)
+
+        with self._lock:
+            rows = self._rows_for(df['account_id'].astype(str).tolist())
+
+            for col in STRING_COLUMNS:
+                default = SCHEMA[col]['default'] or ''
+                values = df[col].astype(object).where(df[col].notna(), default) if col in df.columns else default
+                self._strings[col][rows] = np.asarray(values, dtype=object) if col in df.columns else default
+            self._strings['account_id'][rows] = df['account_id'].astype(str).to_numpy(dtype=object)
+
+            for col in self.numeric_columns:
+                if col in df.columns:
+                    values = pd.to_numeric(df[col], errors='coerce').fillna(SCHEMA[col]['default'] or 0)
+                    self._numeric[col][rows] = values.to_numpy()
+                else:
+                    self._numeric[col][rows] = SCHEMA[col]['default'] or 0
+
+            for col in self.flag_columns:
+                self._flags[col][rows] = parse_flags(df[col]).astype(np.int8) if col in df.columns else 0
+
+            for col in self.category_columns:
+                default = SCHEMA[col]['default'] or 'Other'
+                values = df[col].astype(object).where(df[col].notna(), default).astype(str) if col in df.columns \
+                    else pd.Series([default] * n_rows)
+                self._codes[col][rows] = self._encode(col, values)
+
+            if features is not None and self.feature_names:
+                self.features[rows] = features
+
+        return rows
+
+    def set_predictions(self, rows: np.ndarray, probs: np.ndarray, timestamp: Optional[float] = None):
+        """Record the latest probability for the given rows"""
+        with self._lock:
+            self.probability[rows] = probs
+            self.scored_at[rows] = time.time() if timestamp is None else timestamp
+
+    def advance(self, col: str, delta: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Add `delta` to a numeric column of every account, and to its feature
+        column when the model uses the raw value. Returns the (old, new)
+        feature values (the raw column if it is not a feature).
+        """
+        with self._lock:
+            n = self._size
+            values = self._numeric[col]
+            old_raw = values[:n].copy()
+            values[:n] += delta
+            if col in self.feature_names:
+                idx = self.feature_names.index(col)
+                old = self.features[:n, idx].copy()
+                self.features[:n, idx] += delta
+                return old, self.features[:n, idx].copy()
+            return old_raw, values[:n].copy()
+
+    # ------------------------------------------------------------------------
+    # READ
+    # ------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, account_id) -> bool:
+        return account_id in self._index
+
+    def row_of(self, account_id: str) -> Optional[int]:
+        return self._index.get(account_id)
+
+    def ids(self) -> List[str]:
+        return list(self._strings['account_id'][:self._size])
+
+    def get_record(self, account_id: str) -> Optional[dict]:
+        """Rebuild one account's raw fields as a plain dict"""
+        row = self._index.get(account_id)
+        if row is None:
+            return None
+        return self.records(np.array([row]))[0]
+
+    def frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Raw account fields for the given rows (all rows by default)"""
+        if rows is None:
+            rows = np.arange(self._size)
+        columns = {}
+        for col in SCHEMA:
+            if col in STRING_COLUMNS:
+                columns[col] = self._strings[col][rows]
+            elif col in self._numeric:
+                values = self._numeric[col][rows]
+                if col in self.int_columns:
+                    columns[col] = values.astype(np.int64)
+                elif values.dtype == np.float32:
+                    # Undo float32 noise (0.7 -> 0.699999988) for display
+                    columns[col] = np.round(values.astype(np.float64), 6)
+                else:
+                    columns[col] = values
+            elif col in self._flags:
+                columns[col] = self._flags[col][rows].astype(bool)
+            elif col in self._codes:
+                categories = np.asarray(self._categories[col], dtype=object)
+                columns[col] = categories[self._codes[col][rows]] if len(categories) else np.full(len(rows), 'Other')
+        return pd.DataFrame(columns)
+
+    def select(self, risk_level: Optional[str] = None, industry: Optional[str] = None,
+               region: Optional[str] = None, min_probability: Optional[float] = None,
+               max_probability: Optional[float] = None) -> np.ndarray:
+        """
+        Row numbers matching the filters (all rows by default).
+        Category filters accept aliases ("Technology" matches "Tech").
+        Probability / risk filters only match scored accounts.
+        """
+        with self._lock:
+            n = self._size
+            probability = self.probability[:n]
+            mask = np.ones(n, dtype=bool)
+
+            for col, wanted in (('industry', industry), ('region', region)):
+                if wanted is None:
+                    continue
+                canonical = CATEGORY_VALUES[col]
+                target = canonical.get(wanted.strip().lower(), wanted.strip())
+                matching = [
+                    code for code, value in enumerate(self._categories[col])
+                    if canonical.get(value.strip().lower(), value.strip()).lower() == target.lower()
+                ]
+                mask &= np.isin(self._codes[col][:n], matching)
+
+            if min_probability is not None:
+                mask &= probability >= min_probability
+            if max_probability is not None:
+                mask &= probability <= max_probability
+            if risk_level is not None:
+                levels = [level.lower() for level in RISK_LEVELS]
+                if risk_level.strip().lower() not in levels:
+                    raise ValueError(f"Unknown risk_level '{risk_level}' (expected one of {RISK_LEVELS})")
+                scored = ~np.isnan(probability)
+                risk_code = np.full(n, -1, dtype=np.int8)
+                risk_code[scored] = derive_outputs(probability[scored])['risk_code']
+                mask &= risk_code == levels.index(risk_level.strip().lower())
+
+            return np.flatnonzero(mask)
+
+    def records(self, rows: np.ndarray) -> List[dict]:
+        """Raw account fields for the given rows as dicts (for response building)"""
+        return self.frame(rows).to_dict('records')
+
+    def prediction_table(self, rows: Optional[np.ndarray] = None) -> dict:
+        """Struct-of-arrays view of the latest predictions"""
+        if rows is None:
+            rows = np.arange(self._size)
+        return {
+            'account_id': self._strings['account_id'][rows],
+            'probability': self.probability[rows],
+            'scored_at': self.scored_at[rows],
+        }
+
+    def strings(self, col: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Values of a string column (account_id, company_name)"""
+        if rows is None:
+            rows = np.arange(self._size)
+        return self._strings[col][rows]
+
+    def numeric(self, col: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Typed values of a numeric column"""
+        if rows is None:
+            rows = np.arange(self._size)
+        return self._numeric[col][rows]
+
+    def feature_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Copy of the stored float32 feature rows"""
+        with self._lock:
+            return self.features[rows]
+
+    def category_codes(self, col: str, rows: Optional[np.ndarray] = None):
+        """(codes, categories) for a categorical column"""
+        if rows is None:
+            rows = np.arange(self._size)
+        return self._codes[col][rows], list(self._categories[col])
+
+    # ------------------------------------------------------------------------
+    # MEMORY
+    # ------------------------------------------------------------------------
+
+    def memory_usage(self) -> dict:
+        """Bytes used by the store (typed columns + Python strings + id index)"""
+        n = self._size
+        typed = sum(a[:n].nbytes for a in self._numeric.values())
+        typed += sum(a[:n].nbytes for a in self._flags.values())
+        typed += sum(a[:n].nbytes for a in self._codes.values())
+        features = self.features[:n].nbytes
+        predictions = self.probability[:n].nbytes + self.scored_at[:n].nbytes
+
+        strings = 0
+        for col in STRING_COLUMNS:
+            strings += self._strings[col][:n].nbytes
+            strings += sum(sys.getsizeof(s) for s in self._strings[col][:n] if s is not None)
+        index = sys.getsizeof(self._index)
+
+        total = typed + features + predictions + strings + index
+        return {
+            'accounts': n,
+            'typed_columns_bytes': typed,
+            'feature_matrix_bytes': features,
+            'prediction_table_bytes': predictions,
+            'string_bytes': strings,
+            'index_bytes': index,
+            'total_bytes': total,
+            'bytes_per_account': round(total / n, 1) if n else 0.0,
+        }
@@ -0,0 +1,115 @@
+"""
+RECOV.AI - Upload Admission Control
+===================================
+Decides whether an upload may start BEFORE its body is read.
+
+Each upload reserves an estimated memory cost (Content-Length × expansion
+factor). It is rejected with
+  * 413 - the upload (or its estimated memory) exceeds the per-request limits
+  * 429 + Retry-After - too many analyses are running, or the reserved memory
+    of running analyses plus this one would exceed the global budget
+so a burst of large uploads queues at the client instead of exhausting RAM.
+"""
+
+import threading
+from typing import Optional
+
+
+class UploadRejected(Exception):
+    """Upload refused by admission control (carries the HTTP response details)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def headers(self) -> dict:
+        return {"Retry-After": str(self.retry_after)} if self.retry_after else {}
+
+
+class AdmissionController:
+    """Concurrency + memory-budget gate for upload endpoints"""
+
+    def __init__(self, max_concurrent: int, max_upload_bytes: int, request_memory_bytes: int,
+                 memory_budget_bytes: int, memory_factor: float, retry_after_s: int = 5):
+        self.max_concurrent = max_concurrent
+        self.max_upload_bytes = max_upload_bytes
+        self.request_memory_bytes = request_memory_bytes
+        self.memory_budget_bytes = memory_budget_bytes
+        self.memory_factor = memory_factor
+        self.retry_after_s = retry_after_s
+
+        self._lock = threading.Lock()
+        self.active = 0
+        self.reserved_bytes = 0
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_too_large = 0
+
+    def estimate(self, content_length: Optional[int]) -> int:
+        """Expected peak memory of one analysis (unknown size = worst case)"""
+        size = content_length if content_length is not None else self.max_upload_bytes
+        return int(size * self.memory_factor)
+
+    def check_size(self, size: int):
+        """Per-request limits (raises 413)"""
+        if size > self.max_upload_bytes:
+            with self._lock:
+                self.rejected_too_large += 1
+            raise UploadRejected(
+                413, f"Upload is {size / 1e6:.1f} MB (max {self.max_upload_bytes / 1e6:.1f} MB)"
+            )
+        if self.estimate(size) > self.request_memory_bytes:
+            with self._lock:
+                self.rejected_too_large += 1
+            max_mb = self.request_memory_bytes / self.memory_factor / 1e6
+            raise UploadRejected(
+                413, f"Upload would need ~{self.estimate(size) / 1e6:.0f} MB to analyze "
+                     f"(per-request budget allows ~{max_mb:.0f} MB files) - split the file"
+            )
+
+    def admit(self, content_length: Optional[int]) -> int:
+        """
+        Reserve capacity for one upload.
+
+        Returns:
+            The reserved byte estimate (pass it to release())
+        Raises:
+            UploadRejected (413 / 429)
+        """
+        if content_length is not None:
+            self.check_size(content_length)
+        cost = min(self.estimate(content_length), self.request_memory_bytes)
+
+        with self._lock:
+            if self.active >= self.max_concurrent or \
+                    (self.active and self.reserved_bytes + cost > self.memory_budget_bytes):
+                self.rejected_busy += 1
+                raise UploadRejected(
+                    429,
+                    f"Server busy: {self.active} analyses running "
+                    f"({self.reserved_bytes / 1e6:.0f} MB reserved) - retry shortly",
+                    retry_after=self.retry_after_s
+                )
+            self.active += 1
+            self.reserved_bytes += cost
+            self.admitted += 1
+        return cost
+
+    def release(self, cost: int):
+        with self._lock:
+            self.active -= 1
+            self.reserved_bytes -= cost
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'active': self.active,
+                'max_concurrent': self.max_concurrent,
+                'reserved_mb': round(self.reserved_bytes / 1e6, 1),
+                'memory_budget_mb': round(self.memory_budget_bytes / 1e6, 1),
+                'admitted': self.admitted,
+                'rejected_busy': self.rejected_busy,
+                'rejected_too_large': self.rejected_too_large,
+            }
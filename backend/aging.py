@@ -0,0 +1,42 @@
+"""
+RECOV.AI - Threshold-Aware Aging
+================================
+Nightly aging of the account book: every account's days_overdue goes up,
+but only accounts whose new value lands on the other side of one of the
+model's days_overdue split thresholds can get a different score.
+
+A tree sends x left when x < threshold, so all trees route x the same way
+for every x in [t_k, t_k+1) between two consecutive thresholds. The model
+output therefore only changes when
+
+    searchsorted(thresholds, old, 'right') != searchsorted(thresholds, new, 'right')
+
+i.e. some threshold t satisfies old < t <= new. The thresholds are read
+from the boosters once; the crossing test is one vectorized searchsorted
+over the book, and only the crossing rows are rescored.
+"""
+
+import json
+from typing import Iterable
+
+import numpy as np
+
+
+def split_thresholds(models: Iterable, feature_index: int) -> np.ndarray:
+    """Sorted distinct split conditions on one feature column across XGBoost models"""
+    thresholds = [np.empty(0, dtype=np.float32)]
+    for model in models:
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(bytes(booster.save_raw(raw_format='json')))['learner']
+        for tree in learner['gradient_booster']['model']['trees']:
+            split = np.asarray(tree['split_indices']) == feature_index
+            split &= np.asarray(tree['left_children']) != -1
+            thresholds.append(np.asarray(tree['split_conditions'], dtype=np.float32)[split])
+    return np.unique(np.concatenate(thresholds))
+
+
+def crossing_mask(thresholds: np.ndarray, old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Rows whose value moved across at least one threshold"""
+    old = np.asarray(old, dtype=np.float32)
+    new = np.asarray(new, dtype=np.float32)
+    return np.searchsorted(thresholds, old, side='right') != np.searchsorted(thresholds, new, side='right')
@@ -0,0 +1,169 @@
+"""
+RECOV.AI - Async Micro-Batcher
+==============================
+Collects concurrent /predict requests for a few milliseconds and scores
+them as ONE matrix, instead of one tiny predict_proba call per request.
+"""
+
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+
+class BatcherOverloaded(Exception):
+    """Raised when the pending queue is full (backpressure)"""
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batcher for single-account predictions.
+
+    A batch is flushed when `max_batch_size` requests are waiting or when the
+    oldest one has waited `max_wait_ms`. The wait window shrinks automatically
+    so that queueing + scoring stays inside `latency_slo_ms`.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[dict]], List[dict]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        latency_slo_ms: float = 50.0,
+        queue_limit: int = 2048,
+    ):
+        """
+        Args:
+            score_fn: Scores a list of account dicts, returns results in order
+            max_batch_size: Flush as soon as this many requests are waiting
+            max_wait_ms: Longest time a request is held to fill a batch
+            latency_slo_ms: Latency target for queueing + scoring
+            queue_limit: Pending requests allowed before rejecting new ones
+        """
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.latency_slo_s = max(0.0, latency_slo_ms) / 1000.0
+        self.queue_limit = max(1, queue_limit)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._loop = None
+
+        # Exponentially weighted batch scoring time (seconds)
+        self._score_time_ewma = 0.0
+
+        # Stats
+        self.batches = 0
+        self.requests = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------------
+    # PUBLIC API
+    # ------------------------------------------------------------------------
+
+    async def submit(self, data: dict) -> dict:
+        """
+        Queue one account and wait for its own result.
+
+        Raises:
+            BatcherOverloaded: if the queue is full
+        """
+        self._ensure_worker()
+
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((data, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise BatcherOverloaded(
+                f"Prediction queue full ({self.queue_limit} pending requests)"
+            )
+
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._batch_full.set()
+
+        return await future
+
+    def wait_window(self) -> float:
+        """Current batching window in seconds (shrinks to respect the SLO)"""
+        if self.latency_slo_s <= 0:
+            return self.max_wait_s
+        budget = self.latency_slo_s - self._score_time_ewma
+        return max(0.0, min(self.max_wait_s, budget))
+
+    def get_stats(self) -> dict:
+        """Batching statistics for monitoring"""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "wait_window_ms": round(self.wait_window() * 1000, 3),
+            "score_time_ewma_ms": round(self._score_time_ewma * 1000, 3),
+        }
+
+    # ------------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        """Start the worker on the running loop (restart if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_limit)
+        self._batch_full = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Collect requests into batches and score them off the event loop"""
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+
+            # Hold the batch open until it is full or the window closes
+            remaining = first[2] + self.wait_window() - time.perf_counter()
+            if remaining > 0 and self._queue.qsize() < self.max_batch_size - 1:
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            await self._score(batch)
+
+    async def _score(self, batch: list):
+        """Score one batch in a worker thread and resolve each caller's future"""
+        records = [item[0] for item in batch]
+        started = time.perf_counter()
+
+        try:
+            results = await asyncio.to_thread(self.score_fn, records)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started
+        if self.batches == 0:
+            self._score_time_ewma = elapsed
+        else:
+            self._score_time_ewma = 0.8 * self._score_time_ewma + 0.2 * elapsed
+
+        self.batches += 1
+        self.requests += len(batch)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
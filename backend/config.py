@@ -0,0 +1,244 @@
+"""
+RECOV.AI - Runtime Configuration
+================================
+Tunable serving settings, read once from environment variables.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().upper() in ['TRUE', '1', 'YES', 'ON']
+
+
+# ============================================================================
+# MICRO-BATCHING (/predict)
+# ============================================================================
+
+# Turn the async micro-batcher on/off (off = one predict_proba per request)
+MICROBATCH_ENABLED = _env_bool("RECOV_MICROBATCH_ENABLED", True)
+
+# Flush a batch once this many requests are waiting...
+MICROBATCH_MAX_SIZE = _env_int("RECOV_MICROBATCH_MAX_SIZE", 64)
+
+# ...or once the oldest request has waited this long (milliseconds)
+MICROBATCH_MAX_WAIT_MS = _env_float("RECOV_MICROBATCH_MAX_WAIT_MS", 5.0)
+
+# Latency target per request; the wait window shrinks to stay inside it
+MICROBATCH_LATENCY_SLO_MS = _env_float("RECOV_MICROBATCH_LATENCY_SLO_MS", 50.0)
+
+# Backpressure: requests beyond this many queued get HTTP 503
+MICROBATCH_QUEUE_LIMIT = _env_int("RECOV_MICROBATCH_QUEUE_LIMIT", 2048)
+
+# ============================================================================
+# BULK JSON PREDICTION (/predict/batch)
+# ============================================================================
+
+# Maximum accounts accepted in one /predict/batch call
+BATCH_PREDICT_MAX_ITEMS = _env_int("RECOV_BATCH_PREDICT_MAX_ITEMS", 10000)
+
+# ============================================================================
+# WHAT-IF SCENARIOS (/account/{id}/whatif)
+# ============================================================================
+
+# Largest grid of scenarios scored for one request
+WHATIF_MAX_SCENARIOS = _env_int("RECOV_WHATIF_MAX_SCENARIOS", 2000)
+
+# ============================================================================
+# CSV VALIDATION (/analyze)
+# ============================================================================
+
+# Row-level error records returned per upload (the full count is always reported)
+VALIDATION_MAX_ERRORS = _env_int("RECOV_VALIDATION_MAX_ERRORS", 1000)
+
+# ============================================================================
+# COMPACT SCORING
+# ============================================================================
+
+# Rows transformed + scored at a time (caps temporary memory of big batches)
+SCORING_CHUNK_ROWS = _env_int("RECOV_SCORING_CHUNK_ROWS", 50000)
+
+# ============================================================================
+# DCA ASSIGNMENT (/portfolio/assign)
+# ============================================================================
+
+# Agency table (capacity, fee, success rates); empty = backend/data/agencies.json
+DCA_AGENCIES_PATH = os.environ.get("RECOV_DCA_AGENCIES_PATH", "")
+
+# Auction bid increment, as a fraction of the largest net value
+# (result within n_assigned × epsilon of the optimum)
+DCA_AUCTION_EPSILON = _env_float("RECOV_DCA_AUCTION_EPSILON", 1e-6)
+
+# Bidding rounds before the auction stops unconverged (solver.converged = False)
+DCA_AUCTION_MAX_ROUNDS = _env_int("RECOV_DCA_AUCTION_MAX_ROUNDS", 20000)
+
+# ============================================================================
+# RECOVERY SIMULATION (/portfolio/simulate)
+# ============================================================================
+
+# Most Monte Carlo trials one request may ask for
+SIMULATION_MAX_TRIALS = _env_int("RECOV_SIMULATION_MAX_TRIALS", 100000)
+
+# Uniforms drawn at once (8 bytes each incl. temporaries: 10M ≈ 80 MB peak)
+SIMULATION_CHUNK_DRAWS = _env_int("RECOV_SIMULATION_CHUNK_DRAWS", 10_000_000)
+
+# Exact per-account draws per request before large segments switch to the
+# normal approximation (≈ 1 s of CPU per 100M)
+SIMULATION_EXACT_DRAWS = _env_int("RECOV_SIMULATION_EXACT_DRAWS", 100_000_000)
+
+# ============================================================================
+# EXPORT (/export)
+# ============================================================================
+
+# Accounts converted + streamed per chunk (CSV block / Parquet row group)
+EXPORT_CHUNK_ROWS = _env_int("RECOV_EXPORT_CHUNK_ROWS", 50000)
+
+# ============================================================================
+# PREDICTION HISTORY LOG
+# ============================================================================
+
+# Record every prediction in the append-only history log
+PREDICTION_LOG_ENABLED = _env_bool("RECOV_PREDICTION_LOG_ENABLED", True)
+
+# Segment directory (empty = keep segments in memory only)
+PREDICTION_LOG_DIR = os.environ.get(
+    "RECOV_PREDICTION_LOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "prediction_log")
+)
+
+# Entries buffered before a segment is written...
+PREDICTION_LOG_SEGMENT_ROWS = _env_int("RECOV_PREDICTION_LOG_SEGMENT_ROWS", 100000)
+
+# ...or once the oldest buffered entry is this old (seconds)
+PREDICTION_LOG_FLUSH_SECONDS = _env_float("RECOV_PREDICTION_LOG_FLUSH_SECONDS", 30.0)
+
+# Small (time-flushed) segments are merged into one once this many exist
+PREDICTION_LOG_MERGE_SEGMENTS = _env_int("RECOV_PREDICTION_LOG_MERGE_SEGMENTS", 8)
+
+# ============================================================================
+# DRIFT MONITORING (/monitoring/drift)
+# ============================================================================
+
+# Track feature statistics of every scored batch
+DRIFT_ENABLED = _env_bool("RECOV_DRIFT_ENABLED", True)
+
+# PSI at which a feature is flagged as "warning" / "drift"
+DRIFT_PSI_WARN = _env_float("RECOV_DRIFT_PSI_WARN", 0.1)
+DRIFT_PSI_ALERT = _env_float("RECOV_DRIFT_PSI_ALERT", 0.25)
+
+# Rows needed before drift is judged at all
+DRIFT_MIN_ROWS = _env_int("RECOV_DRIFT_MIN_ROWS", 100)
+
+# ============================================================================
+# UPLOAD ADMISSION CONTROL (/analyze)
+# ============================================================================
+
+# Analyses allowed to run at once (more → HTTP 429 + Retry-After)
+ANALYZE_MAX_CONCURRENT = _env_int("RECOV_ANALYZE_MAX_CONCURRENT", 4)
+
+# Largest accepted upload (bigger → HTTP 413)
+ANALYZE_MAX_UPLOAD_MB = _env_float("RECOV_ANALYZE_MAX_UPLOAD_MB", 50.0)
+
+# Peak memory of one analysis ≈ upload size × this factor (measured on CSVs,
+# including the JSON response: parsing ~37×, encoding the results ~30×)
+ANALYZE_MEMORY_FACTOR = _env_float("RECOV_ANALYZE_MEMORY_FACTOR", 70.0)
+
+# Estimated memory one analysis may use (bigger → HTTP 413)
+ANALYZE_REQUEST_MEMORY_MB = _env_float("RECOV_ANALYZE_REQUEST_MEMORY_MB", 2048.0)
+
+# Estimated memory all running analyses may reserve together (more → HTTP 429)
+ANALYZE_MEMORY_BUDGET_MB = _env_float("RECOV_ANALYZE_MEMORY_BUDGET_MB", 4096.0)
+
+# Retry-After sent with HTTP 429 (seconds)
+ANALYZE_RETRY_AFTER_S = _env_int("RECOV_ANALYZE_RETRY_AFTER_S", 5)
+
+# ============================================================================
+# SEGMENT MODELS
+# ============================================================================
+
+# Use per-segment models when the artifact bundle has them
+SEGMENT_MODELS_ENABLED = _env_bool("RECOV_SEGMENT_MODELS_ENABLED", True)
+
+# Total size of segment models kept loaded (least recently used are evicted)
+MODEL_POOL_MAX_MB = _env_float("RECOV_MODEL_POOL_MAX_MB", 256.0)
+
+# Maximum number of segment models kept loaded (0 = only the size cap)
+MODEL_POOL_MAX_MODELS = _env_int("RECOV_MODEL_POOL_MAX_MODELS", 0)
+
+# ============================================================================
+# SHADOW MODEL
+# ============================================================================
+
+# Candidate model artifact scored next to the live one (empty = shadow mode off)
+SHADOW_MODEL_PATH = os.environ.get("RECOV_SHADOW_MODEL_PATH", "")
+
+# Scored batches waiting for the shadow worker (more are dropped, not queued)
+SHADOW_QUEUE_LIMIT = _env_int("RECOV_SHADOW_QUEUE_LIMIT", 64)
+
+# Accounts whose latest live / candidate pair is kept for lookups
+SHADOW_MAX_ACCOUNTS = _env_int("RECOV_SHADOW_MAX_ACCOUNTS", 100000)
+
+# ============================================================================
+# GLOBAL EXPLANATIONS
+# ============================================================================
+
+# Keep portfolio-wide SHAP summaries for /explain/global (background worker)
+GLOBAL_EXPLAIN_ENABLED = _env_bool("RECOV_GLOBAL_EXPLAIN_ENABLED", True)
+
+# Rows explained per pred_contribs call by the worker
+GLOBAL_EXPLAIN_CHUNK_ROWS = _env_int("RECOV_GLOBAL_EXPLAIN_CHUNK_ROWS", 50000)
+
+# ============================================================================
+# COMPANY-NAME SEARCH
+# ============================================================================
+
+# Keep the name / word / trigram index for /accounts/search (background worker)
+SEARCH_INDEX_ENABLED = _env_bool("RECOV_SEARCH_INDEX_ENABLED", True)
+
+# Names indexed per worker batch
+SEARCH_INDEX_CHUNK_ROWS = _env_int("RECOV_SEARCH_INDEX_CHUNK_ROWS", 1000000)
+
+# ============================================================================
+# PER-REQUEST PROFILING
+# ============================================================================
+
+# Install the profiling middleware at all (off = zero overhead)
+PROFILING_ENABLED = _env_bool("RECOV_PROFILING_ENABLED", False)
+
+# Where flame graphs and index.jsonl are written
+PROFILING_DIR = os.environ.get(
+    "RECOV_PROFILING_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+
+# Value X-Recov-Profile / ?profile= must carry (empty = header/query triggers refused)
+PROFILING_TOKEN = os.environ.get("RECOV_PROFILING_TOKEN", "")
+
+# Fraction of all requests profiled without being asked (0 = only on request)
+PROFILING_SAMPLE_RATE = _env_float("RECOV_PROFILING_SAMPLE_RATE", 0.0)
+
+# Stack sampling interval (milliseconds)
+PROFILING_INTERVAL_MS = _env_float("RECOV_PROFILING_INTERVAL_MS", 5.0)
+
+# Profiles kept on disk (oldest deleted first)
+PROFILING_MAX_PROFILES = _env_int("RECOV_PROFILING_MAX_PROFILES", 200)
@@ -0,0 +1,226 @@
+"""
+RECOV.AI - Portfolio DCA Assignment
+===================================
+Assigns a whole scored portfolio to debt collection agencies (DCAs) within
+their capacity limits, maximizing expected net recovery:
+
+    net(i, j) = amount_i * min(prob_i * success_rate_j[risk_i], 1) * (1 - fee_j)
+
+Solver - auction (Bertsekas) with agencies as "similar objects" that have
+`capacity` identical seats, run until no account is outbid:
+  * every unplaced account bids for its best agency (value - price); the
+    bid raises that agency's price by the account's margin over its second
+    choice (or over staying unassigned) plus epsilon
+  * an agency keeps its `capacity` highest bids; its price is the lowest
+    bid it holds once full; outbid accounts bid again next round
+All accounts bid at once per round (vectorized). At convergence the result
+is within n_assigned × epsilon of the optimal expected net recovery.
+If the round cap is hit first, every placed account is still within
+capacity, and the response reports converged = False.
+
+Accounts whose best net recovery is not positive stay unassigned.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Try both import paths
+try:
+    from backend.predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+    from backend.models import AgencyConfig
+    from backend import config
+except ModuleNotFoundError:
+    from predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+    from models import AgencyConfig
+    import config
+
+DEFAULT_AGENCIES_PATH = Path(__file__).resolve().parent / "data" / "agencies.json"
+
+
+def load_agencies(path: Optional[str] = None) -> List[dict]:
+    """Read and validate the agency table (JSON list of AgencyConfig)"""
+    path = Path(path or config.DCA_AGENCIES_PATH or DEFAULT_AGENCIES_PATH)
+    with open(path) as f:
+        raw = json.load(f)
+    return [AgencyConfig(**agency).model_dump() for agency in raw]
+
+
+class DCAAssigner:
+    """Capacity-aware assignment of scored accounts to agencies"""
+
+    def __init__(self, agencies: List[dict], epsilon: float = None, max_rounds: int = None):
+        if not agencies:
+            raise ValueError("At least one agency is required")
+        self.agencies = agencies
+        self.names = [a['name'] for a in agencies]
+        self.capacity = np.array([a['capacity'] for a in agencies], dtype=np.int64)
+        self.fee = np.array([a['fee_rate'] for a in agencies], dtype=np.float32)
+        # success[risk_code, agency]
+        self.success = np.array(
+            [[a['success_rate'].get(level, 1.0) for a in agencies] for level in RISK_LEVELS],
+            dtype=np.float32
+        )
+        # epsilon relative to the largest net value of the portfolio
+        self.epsilon = config.DCA_AUCTION_EPSILON if epsilon is None else epsilon
+        self.max_rounds = config.DCA_AUCTION_MAX_ROUNDS if max_rounds is None else max_rounds
+
+    # ------------------------------------------------------------------------
+    # VALUES
+    # ------------------------------------------------------------------------
+
+    def net_values(self, amount: np.ndarray, probs: np.ndarray, risk_code: np.ndarray) -> np.ndarray:
+        """(n_accounts, n_agencies) float32 expected net recovery"""
+        recovery = np.minimum(probs[:, None] * self.success[risk_code], 1.0)
+        return (amount[:, None] * recovery * (1.0 - self.fee)).astype(np.float32)
+
+    # ------------------------------------------------------------------------
+    # SOLVER
+    # ------------------------------------------------------------------------
+
+    def _auction(self, values: np.ndarray, epsilon: float) -> Tuple[np.ndarray, int, bool]:
+        """
+        Returns:
+            (agency_code, rounds, converged): agency_code is int16, -1 = unassigned
+        """
+        n_accounts, n_agencies = values.shape
+        price = np.zeros(n_agencies, dtype=np.float64)
+        price[self.capacity == 0] = np.inf
+        agency_code = np.full(n_accounts, -1, dtype=np.int16)
+        # Held bids per agency, ascending (lowest = next to be outbid)
+        held_bids = [np.zeros(0, dtype=np.float64) for _ in range(n_agencies)]
+        held_accounts = [np.zeros(0, dtype=np.int64) for _ in range(n_agencies)]
+
+        active = np.arange(n_accounts)
+        rounds = 0
+        while len(active) and rounds < self.max_rounds:
+            rounds += 1
+            adjusted = values[active] - price
+            choice = adjusted.argmax(axis=1)
+            best = adjusted[np.arange(len(active)), choice]
+            if n_agencies > 1:
+                second = np.partition(adjusted, n_agencies - 2, axis=1)[:, n_agencies - 2]
+            else:
+                second = np.full(len(active), -np.inf)
+            # Staying unassigned is worth 0
+            second = np.maximum(second, 0.0)
+
+            bidding = best > 0
+            bidders, choice = active[bidding], choice[bidding]
+            bids = values[bidders, choice] - second[bidding] + epsilon
+
+            outbid = []
+            for j in np.unique(choice):
+                mine = choice == j
+                order = np.argsort(bids[mine], kind='stable')
+                new_bids, new_accounts = bids[mine][order], bidders[mine][order]
+                # Ties lose to the bids already held
+                at = np.searchsorted(held_bids[j], new_bids, side='left')
+                held = np.insert(held_bids[j], at, new_bids)
+                accounts = np.insert(held_accounts[j], at, new_accounts)
+                agency_code[new_accounts] = j
+
+                over = len(accounts) - int(self.capacity[j])
+                if over > 0:
+                    agency_code[accounts[:over]] = -1
+                    outbid.append(accounts[:over])
+                    held, accounts = held[over:], accounts[over:]
+                held_bids[j], held_accounts[j] = held, accounts
+                if len(accounts) == self.capacity[j]:
+                    price[j] = held[0]
+
+            active = np.concatenate(outbid) if outbid else np.zeros(0, dtype=np.int64)
+        return agency_code, rounds, len(active) == 0
+
+    def assign(self, amount: np.ndarray, probs: np.ndarray) -> dict:
+        """
+        Assign a scored portfolio.
+
+        Returns:
+            dict with 'agency_code' (int16, -1 = unassigned), 'expected_net'
+            (float32 per account), 'stats' and 'solver' info
+        """
+        started = time.perf_counter()
+        amount = np.asarray(amount, dtype=np.float32)
+        probs = np.asarray(probs, dtype=np.float32)
+        risk_code = derive_outputs(probs)['risk_code']
+
+        values = self.net_values(amount, probs, risk_code)
+        epsilon = float(self.epsilon * values.max()) if values.size else 0.0
+        agency_code, rounds, converged = self._auction(values.astype(np.float64), epsilon)
+
+        expected_net = np.zeros(len(amount), dtype=np.float32)
+        placed = agency_code >= 0
+        expected_net[placed] = values[np.flatnonzero(placed), agency_code[placed]]
+
+        return {
+            'agency_code': agency_code,
+            'expected_net': expected_net,
+            'stats': self.stats(agency_code, amount, expected_net),
+            'rule_based': self.rule_based_baseline(values, probs),
+            'solver': {
+                'method': 'auction',
+                'rounds': rounds,
+                'converged': converged,
+                'epsilon': epsilon,
+                # Distance to the optimal expected net recovery (when converged)
+                'optimality_gap_bound': round(float(placed.sum()) * epsilon, 4),
+                'seconds': round(time.perf_counter() - started, 4),
+            },
+        }
+
+    # ------------------------------------------------------------------------
+    # REPORTING
+    # ------------------------------------------------------------------------
+
+    def stats(self, agency_code: np.ndarray, amount: np.ndarray, expected_net: np.ndarray) -> dict:
+        n_agencies = len(self.names)
+        placed = agency_code >= 0
+        codes = agency_code[placed].astype(np.int64)
+        counts = np.bincount(codes, minlength=n_agencies)
+        amounts = np.bincount(codes, weights=amount[placed], minlength=n_agencies)
+        nets = np.bincount(codes, weights=expected_net[placed], minlength=n_agencies)
+
+        agencies = []
+        for j, agency in enumerate(self.agencies):
+            capacity = int(self.capacity[j])
+            agencies.append({
+                'name': agency['name'],
+                'specialization': agency['specialization'],
+                'assigned': int(counts[j]),
+                'capacity': capacity,
+                'utilization': round(counts[j] / capacity, 4) if capacity else 0.0,
+                'total_amount': round(float(amounts[j]), 2),
+                'expected_net_recovery': round(float(nets[j]), 2),
+            })
+
+        return {
+            'total_accounts': int(len(agency_code)),
+            'assigned': int(placed.sum()),
+            'unassigned': int((~placed).sum()),
+            'expected_net_recovery': round(float(expected_net.sum(dtype=np.float64)), 2),
+            'agencies': agencies,
+        }
+
+    def rule_based_baseline(self, values: np.ndarray, probs: np.ndarray) -> Optional[dict]:
+        """
+        What the per-account if/elif rule would give (ignoring capacity),
+        for the agencies that exist in this table.
+        """
+        index = {name: j for j, name in enumerate(self.names)}
+        mapping = np.array([index.get(option['name'], -1) for option in DCA_OPTIONS])
+        if (mapping < 0).any():
+            return None
+
+        choice = mapping[derive_outputs(probs)['dca_code']]
+        counts = np.bincount(choice, minlength=len(self.names))
+        return {
+            'expected_net_recovery': round(float(values[np.arange(len(values)), choice].sum(dtype=np.float64)), 2),
+            'over_capacity': {
+                self.names[j]: int(counts[j] - self.capacity[j])
+                for j in range(len(self.names)) if counts[j] > self.capacity[j]
+            },
+        }
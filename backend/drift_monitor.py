@@ -0,0 +1,306 @@
+"""
+RECOV.AI - Feature Drift Monitor
+================================
+Streaming statistics over every scored feature matrix, compared with the
+training distribution.
+
+Per numeric feature (and flag) the monitor keeps:
+  * count / mean / M2 (Welford, merged per batch with Chan's formula)
+  * min / max
+  * a fixed-edge histogram whose edges are the baseline's deciles - a
+    mergeable quantile sketch (counts just add up across batches/workers)
+Per categorical feature it keeps category counts, read straight from the
+one-hot columns.
+
+No raw rows are kept; an update costs one pass of vectorized reductions
+over the batch. `DriftStats.merge()` combines statistics from other workers.
+
+The baseline (same structure, built from the training matrix) is stored in
+the model artifact as 'drift_baseline'; older artifacts fall back to
+building it from backend/data/training_data.csv at startup.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Quantiles that become the histogram bin edges
+BASELINE_QUANTILES = np.linspace(0.1, 0.9, 9)
+
+# Smoothing for empty bins in PSI
+PSI_EPSILON = 1e-4
+
+TRAINING_DATA_PATH = Path(__file__).resolve().parent / "data" / "training_data.csv"
+
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+def feature_layout(pipeline) -> dict:
+    """Which matrix columns are numeric features and which are one-hot groups"""
+    names = [str(n) for n in pipeline.feature_names]
+    categorical = {}
+    for col in pipeline.categorical_features:
+        prefix = f"{col}_"
+        categorical[col] = [i for i, name in enumerate(names) if name.startswith(prefix)]
+    one_hot = {i for idxs in categorical.values() for i in idxs}
+    numeric = [i for i in range(len(names)) if i not in one_hot]
+    return {'names': names, 'numeric': numeric, 'categorical': categorical}
+
+
+# ============================================================================
+# STATISTICS
+# ============================================================================
+
+class DriftStats:
+    """Mergeable summary of a stream of feature rows"""
+
+    def __init__(self, layout: dict, edges: Dict[str, List[float]]):
+        self.layout = layout
+        self.names = layout['names']
+        self.numeric_names = [self.names[i] for i in layout['numeric']]
+        self.edges = {name: np.asarray(edges[name], dtype=np.float64) for name in self.numeric_names}
+        self._lock = threading.Lock()
+
+        m = len(self.numeric_names)
+        self.count = 0
+        self.mean = np.zeros(m)
+        self.m2 = np.zeros(m)
+        self.min = np.full(m, np.inf)
+        self.max = np.full(m, -np.inf)
+        self.bins = {name: np.zeros(len(self.edges[name]) + 1, dtype=np.int64) for name in self.numeric_names}
+        self.categories = {
+            col: np.zeros(len(idxs) + 1, dtype=np.int64)    # last slot = unknown / other
+            for col, idxs in layout['categorical'].items()
+        }
+
+    def category_labels(self, col: str) -> List[str]:
+        prefix = f"{col}_"
+        return [self.names[i][len(prefix):] for i in self.layout['categorical'][col]] + ['(other)']
+
+    def update(self, X: np.ndarray):
+        """Add a batch of feature rows"""
+        X = np.asarray(X)
+        n = len(X)
+        if n == 0:
+            return
+
+        numeric = X[:, self.layout['numeric']].astype(np.float64)
+        batch_mean = numeric.mean(axis=0)
+        batch_m2 = ((numeric - batch_mean) ** 2).sum(axis=0)
+        batch_bins = {
+            name: np.bincount(np.searchsorted(self.edges[name], numeric[:, j], side='right'),
+                              minlength=len(self.edges[name]) + 1)
+            for j, name in enumerate(self.numeric_names)
+        }
+        batch_categories = {}
+        for col, idxs in self.layout['categorical'].items():
+            one_hot = X[:, idxs]
+            counts = np.zeros(len(idxs) + 1, dtype=np.int64)
+            counts[:-1] = (one_hot > 0.5).sum(axis=0)
+            counts[-1] = n - int((one_hot > 0.5).any(axis=1).sum())
+            batch_categories[col] = counts
+
+        with self._lock:
+            self._combine(n, batch_mean, batch_m2, numeric.min(axis=0), numeric.max(axis=0),
+                          batch_bins, batch_categories)
+
+    def _combine(self, n, mean, m2, minimum, maximum, bins, categories):
+        """Chan et al. parallel merge of (count, mean, M2) + additive counts"""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+        for name, counts in bins.items():
+            self.bins[name] += counts
+        for col, counts in categories.items():
+            self.categories[col] += counts
+
+    def merge(self, other: "DriftStats"):
+        """Fold another worker's statistics into this one"""
+        if other.count == 0:
+            return
+        with self._lock:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max,
+                          other.bins, other.categories)
+
+    def variance(self) -> np.ndarray:
+        return self.m2 / max(self.count - 1, 1)
+
+    def quantile(self, name: str, q: float) -> Optional[float]:
+        """Approximate quantile from the histogram (linear within a bin)"""
+        counts = self.bins[name]
+        if counts.sum() == 0:
+            return None
+        j = self.numeric_names.index(name)
+        edges = np.concatenate([[self.min[j]], self.edges[name], [self.max[j]]])
+        cdf = np.cumsum(counts) / counts.sum()
+        k = int(np.searchsorted(cdf, q))
+        lo, hi = edges[k], edges[k + 1]
+        before = cdf[k - 1] if k else 0.0
+        share = (q - before) / max(cdf[k] - before, 1e-12)
+        return float(lo + (hi - lo) * min(max(share, 0.0), 1.0))
+
+    # ------------------------------------------------------------------------
+    # SERIALIZATION
+    # ------------------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            'layout': self.layout,
+            'edges': {name: edges.tolist() for name, edges in self.edges.items()},
+            'count': int(self.count),
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+            'min': self.min.tolist(),
+            'max': self.max.tolist(),
+            'bins': {name: counts.tolist() for name, counts in self.bins.items()},
+            'categories': {col: counts.tolist() for col, counts in self.categories.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DriftStats":
+        layout = {
+            'names': list(state['layout']['names']),
+            'numeric': list(state['layout']['numeric']),
+            'categorical': {col: list(idxs) for col, idxs in state['layout']['categorical'].items()},
+        }
+        stats = cls(layout, state['edges'])
+        stats.count = int(state['count'])
+        stats.mean = np.asarray(state['mean'], dtype=np.float64)
+        stats.m2 = np.asarray(state['m2'], dtype=np.float64)
+        stats.min = np.asarray(state['min'], dtype=np.float64)
+        stats.max = np.asarray(state['max'], dtype=np.float64)
+        stats.bins = {name: np.asarray(c, dtype=np.int64) for name, c in state['bins'].items()}
+        stats.categories = {col: np.asarray(c, dtype=np.int64) for col, c in state['categories'].items()}
+        return stats
+
+    def empty_like(self) -> "DriftStats":
+        return DriftStats(self.layout, {name: edges.tolist() for name, edges in self.edges.items()})
+
+
+def baseline_stats(X: np.ndarray, pipeline) -> DriftStats:
+    """
+    Statistics of X with histogram edges at X's deciles. For streamed
+    training data pass the first chunk and update() with the rest.
+    """
+    X = np.asarray(X)
+    layout = feature_layout(pipeline)
+    edges = {}
+    for i in layout['numeric']:
+        values = X[:, i].astype(np.float64)
+        edges[layout['names'][i]] = np.unique(np.quantile(values, BASELINE_QUANTILES)).tolist()
+    stats = DriftStats(layout, edges)
+    stats.update(X)
+    return stats
+
+
+def build_baseline(X: np.ndarray, pipeline) -> dict:
+    """Baseline statistics from a training matrix (stored in the artifact)"""
+    return baseline_stats(X, pipeline).to_dict()
+
+
+def build_baseline_from_csv(pipeline, path=TRAINING_DATA_PATH) -> dict:
+    """Fallback for artifacts saved before drift baselines existed"""
+    return build_baseline(pipeline.transform(pd.read_csv(path)), pipeline)
+
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+def psi(expected_counts: np.ndarray, actual_counts: np.ndarray) -> float:
+    """Population stability index between two binned distributions"""
+    expected = expected_counts / max(expected_counts.sum(), 1) + PSI_EPSILON
+    actual = actual_counts / max(actual_counts.sum(), 1) + PSI_EPSILON
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected_counts: np.ndarray, actual_counts: np.ndarray) -> float:
+    """KS statistic evaluated at the bin edges"""
+    expected = np.cumsum(expected_counts) / max(expected_counts.sum(), 1)
+    actual = np.cumsum(actual_counts) / max(actual_counts.sum(), 1)
+    return float(np.max(np.abs(expected - actual)))
+
+
+class DriftMonitor:
+    """Live statistics + comparison against the training baseline"""
+
+    def __init__(self, baseline: dict, psi_warn: float = 0.1, psi_alert: float = 0.25, min_rows: int = 100):
+        self.baseline = DriftStats.from_dict(baseline)
+        self.live = self.baseline.empty_like()
+        self.psi_warn = psi_warn
+        self.psi_alert = psi_alert
+        self.min_rows = min_rows
+
+    def update(self, X: np.ndarray):
+        self.live.update(X)
+
+    def reset(self):
+        self.live = self.baseline.empty_like()
+
+    def _status(self, score: float) -> str:
+        if self.live.count < self.min_rows:
+            return "insufficient_data"
+        if score >= self.psi_alert:
+            return "drift"
+        if score >= self.psi_warn:
+            return "warning"
+        return "ok"
+
+    def report(self) -> dict:
+        base, live = self.baseline, self.live
+        base_std = np.sqrt(base.variance())
+        live_var = live.variance()
+
+        numeric = {}
+        for j, name in enumerate(base.numeric_names):
+            score = psi(base.bins[name], live.bins[name])
+            numeric[name] = {
+                'psi': round(score, 4),
+                'ks': round(binned_ks(base.bins[name], live.bins[name]), 4),
+                'baseline_mean': round(float(base.mean[j]), 4),
+                'live_mean': round(float(live.mean[j]), 4) if live.count else None,
+                'baseline_std': round(float(base_std[j]), 4),
+                'live_std': round(float(np.sqrt(live_var[j])), 4) if live.count else None,
+                'mean_shift_std': round(float((live.mean[j] - base.mean[j]) / base_std[j]), 4)
+                if live.count and base_std[j] > 0 else None,
+                'live_median': live.quantile(name, 0.5),
+                'status': self._status(score),
+            }
+
+        categorical = {}
+        for col in base.categories:
+            score = psi(base.categories[col], live.categories[col])
+            labels = base.category_labels(col)
+            base_freq = base.categories[col] / max(base.categories[col].sum(), 1)
+            live_freq = live.categories[col] / max(live.categories[col].sum(), 1)
+            categorical[col] = {
+                'psi': round(score, 4),
+                'baseline_frequency': {k: round(float(v), 4) for k, v in zip(labels, base_freq)},
+                'live_frequency': {k: round(float(v), 4) for k, v in zip(labels, live_freq)},
+                'status': self._status(score),
+            }
+
+        statuses = [f['status'] for f in list(numeric.values()) + list(categorical.values())]
+        drifted = sorted(
+            [name for name, f in {**numeric, **categorical}.items() if f['status'] in ('warning', 'drift')]
+        )
+        overall = "insufficient_data" if live.count < self.min_rows else \
+            "drift" if "drift" in statuses else "warning" if "warning" in statuses else "ok"
+
+        return {
+            'status': overall,
+            'rows_observed': int(live.count),
+            'baseline_rows': int(base.count),
+            'drifted_features': drifted,
+            'numeric_features': numeric,
+            'categorical_features': categorical,
+        }
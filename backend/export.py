@@ -0,0 +1,114 @@
+"""
+RECOV.AI - Portfolio Export
+===========================
+Streams stored accounts and their latest predictions as CSV or Parquet,
+one chunk of rows at a time, straight from the AccountStore columns. Only
+one chunk is ever converted to a DataFrame, so multi-million-row exports
+run in constant memory.
+"""
+
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+except ModuleNotFoundError:
+    from predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_frame(store, rows: np.ndarray) -> pd.DataFrame:
+    """Raw account fields + prediction columns for one chunk of rows"""
+    frame = store.frame(rows)
+    table = store.prediction_table(rows)
+    probs = table['probability']
+    scored = ~np.isnan(probs)
+
+    derived = derive_outputs(np.where(scored, probs, 0.0))
+    risk_levels = np.asarray(RISK_LEVELS, dtype=object)
+    dca_names = np.asarray([option['name'] for option in DCA_OPTIONS], dtype=object)
+
+    frame['recovery_probability'] = np.round(probs.astype(np.float64), 6)
+    frame['risk_level'] = np.where(scored, risk_levels[derived['risk_code']], None)
+    frame['expected_days'] = pd.Series(derived['expected_days'], dtype='Int16').where(scored)
+    frame['recommended_dca'] = np.where(scored, dca_names[derived['dca_code']], None)
+    frame['scored_at'] = pd.to_datetime(np.where(scored, table['scored_at'], np.nan), unit='s')
+    return frame
+
+
+def iter_csv(store, rows: np.ndarray, chunk_rows: int) -> Iterator[bytes]:
+    """CSV bytes, header first, then one block per chunk"""
+    for start in range(0, len(rows), chunk_rows):
+        chunk = export_frame(store, rows[start:start + chunk_rows])
+        yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
+
+    if len(rows) == 0:
+        yield ','.join(export_frame(store, rows).columns).encode('utf-8') + b'\n'
+
+
+class _ChunkSink:
+    """Write-only file object that hands buffered bytes back to the generator"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_parquet(store, rows: np.ndarray, chunk_rows: int) -> Iterator[bytes]:
+    """Parquet bytes: one row group per chunk, streamed as each is written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    try:
+        for start in range(0, max(len(rows), 1), chunk_rows):
+            table = pa.Table.from_pandas(export_frame(store, rows[start:start + chunk_rows]), preserve_index=False)
+            if writer is None:
+                # All-unscored first chunk: text columns would be typed null
+                schema = pa.schema([
+                    pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema
+                ])
+                writer = pq.ParquetWriter(sink, schema, compression='snappy')
+            writer.write_table(table.cast(schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def export_filename(fmt: str) -> str:
+    return f"recovai_portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
@@ -0,0 +1,268 @@
+"""
+RECOV.AI - Shared Feature Pipeline
+==================================
+One feature-engineering definition for training AND serving.
+
+The pipeline learns category vocabularies (and alias spellings such as
+Technology → Tech) at training time, is saved inside the model artifact as
+a plain dict, and compiles into a vectorized transform that turns a single
+account or a whole batch into the model's float32 feature matrix.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Raw numeric columns (log-transformed ones become '<name>_log')
+NUMERIC_FEATURES = [
+    'amount',
+    'days_overdue',
+    'payment_history_score',
+    'shipment_volume_change_30d',
+    'shipment_volume_30d',
+    'express_ratio',
+    'destination_diversity',
+    'contact_attempts',
+    'customer_tenure_months',
+]
+
+LOG_FEATURES = ['amount']
+
+FLAG_FEATURES = ['email_opened', 'dispute_flag']
+
+CATEGORICAL_FEATURES = ['industry', 'region']
+
+# Known alternate spellings → canonical category
+DEFAULT_ALIASES = {
+    'industry': {
+        'Technology': 'Tech',
+    },
+}
+
+TRUE_VALUES = ['TRUE', 'T', 'YES', 'Y', '1', '1.0']
+
+PIPELINE_VERSION = 1
+
+
+def parse_flags(values: pd.Series) -> np.ndarray:
+    """Parse booleans given as bool, 0/1 or TRUE/FALSE/YES text → bool array"""
+    text = values.astype(str).str.strip().str.upper()
+    truthy = text.isin(TRUE_VALUES).to_numpy()
+    as_number = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=0.0)
+    return truthy | (np.nan_to_num(as_number) != 0)
+
+
+class FeaturePipeline:
+    """
+    Serializable feature transform shared by the training scripts and the
+    predictor.
+
+    Usage (training):
+        pipeline = FeaturePipeline().fit(df)
+        X = pipeline.transform_frame(df)
+        artifact['feature_pipeline'] = pipeline.to_dict()
+
+    Usage (serving):
+        pipeline = FeaturePipeline.from_dict(artifact['feature_pipeline'])
+        X = pipeline.transform_frame(records)
+    """
+
+    def __init__(
+        self,
+        numeric_features: Optional[List[str]] = None,
+        flag_features: Optional[List[str]] = None,
+        categorical_features: Optional[List[str]] = None,
+        log_features: Optional[List[str]] = None,
+        aliases: Optional[Dict[str, Dict[str, str]]] = None,
+        vocabularies: Optional[Dict[str, List[str]]] = None,
+        feature_names: Optional[List[str]] = None,
+    ):
+        self.numeric_features = list(NUMERIC_FEATURES if numeric_features is None else numeric_features)
+        self.flag_features = list(FLAG_FEATURES if flag_features is None else flag_features)
+        self.categorical_features = list(CATEGORICAL_FEATURES if categorical_features is None else categorical_features)
+        self.log_features = list(LOG_FEATURES if log_features is None else log_features)
+        self.aliases = {k: dict(v) for k, v in (DEFAULT_ALIASES if aliases is None else aliases).items()}
+        self.vocabularies = {k: list(v) for k, v in (vocabularies or {}).items()}
+        self.feature_names = list(feature_names) if feature_names else None
+
+        self._compiled = None
+        if self.feature_names:
+            self._compile()
+
+    # ------------------------------------------------------------------------
+    # FIT
+    # ------------------------------------------------------------------------
+
+    def fit(self, df: pd.DataFrame) -> "FeaturePipeline":
+        """Learn category vocabularies from training data"""
+        self.vocabularies = {}
+        return self.partial_fit(df)
+
+    def partial_fit(self, df: pd.DataFrame) -> "FeaturePipeline":
+        """
+        Add categories seen in one chunk to the vocabularies (for streaming
+        over data that does not fit in memory). Call once per chunk.
+        """
+        for col in self.categorical_features:
+            known = set(self.vocabularies.get(col, []))
+            if col in df.columns:
+                values = self._canonical(df[col], col)
+                known.update(v for v in values.dropna().unique() if v != 'Other')
+            self.vocabularies[col] = sorted(known)
+
+        self.feature_names = self._default_feature_names()
+        self._compile()
+        return self
+
+    def _default_feature_names(self) -> List[str]:
+        """Column order: numerics, flags, then one-hots per categorical"""
+        names = [self._numeric_output_name(col) for col in self.numeric_features]
+        names += list(self.flag_features)
+        for col in self.categorical_features:
+            names += [f'{col}_{value}' for value in self.vocabularies.get(col, [])]
+        return names
+
+    def _numeric_output_name(self, col: str) -> str:
+        return f'{col}_log' if col in self.log_features else col
+
+    # ------------------------------------------------------------------------
+    # COMPILE
+    # ------------------------------------------------------------------------
+
+    def _compile(self):
+        """Precompute column positions and category lookups for transform()"""
+        position = {name: i for i, name in enumerate(self.feature_names)}
+
+        numeric = [
+            (col, position[self._numeric_output_name(col)], col in self.log_features)
+            for col in self.numeric_features
+            if self._numeric_output_name(col) in position
+        ]
+        flags = [(col, position[col]) for col in self.flag_features if col in position]
+
+        categorical = []
+        for col in self.categorical_features:
+            # canonical value → output column; unknown values map to -1 (all zeros)
+            lookup = {
+                value: position[f'{col}_{value}']
+                for value in self.vocabularies.get(col, [])
+                if f'{col}_{value}' in position
+            }
+            if lookup:
+                categorical.append((col, lookup))
+
+        self._compiled = {
+            'n_features': len(self.feature_names),
+            'numeric': numeric,
+            'flags': flags,
+            'categorical': categorical,
+        }
+
+    # ------------------------------------------------------------------------
+    # TRANSFORM
+    # ------------------------------------------------------------------------
+
+    def transform(self, data: Union[pd.DataFrame, dict, Iterable[dict]]) -> np.ndarray:
+        """
+        Build the float32 feature matrix for one account (dict), a list of
+        account dicts, or a DataFrame. Missing columns count as 0 / 'Other'.
+        """
+        if self._compiled is None:
+            raise ValueError("FeaturePipeline is not fitted")
+
+        if isinstance(data, dict):
+            data = [data]
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame.from_records(list(data))
+
+        compiled = self._compiled
+        n_rows = len(df)
+        X = np.zeros((n_rows, compiled['n_features']), dtype=np.float32)
+
+        for col, idx, use_log in compiled['numeric']:
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=0.0)
+            values = np.nan_to_num(values, nan=0.0)
+            X[:, idx] = np.log1p(values) if use_log else values
+
+        for col, idx in compiled['flags']:
+            if col in df.columns:
+                X[:, idx] = self._to_flag(df[col])
+
+        rows = np.arange(n_rows)
+        for col, lookup in compiled['categorical']:
+            if col not in df.columns:
+                continue
+            target = self._canonical(df[col], col).map(lookup).to_numpy(dtype=np.float64, na_value=-1)
+            hit = target >= 0
+            X[rows[hit], target[hit].astype(np.int64)] = 1.0
+
+        return X
+
+    def transform_frame(self, data: Union[pd.DataFrame, dict, Iterable[dict]]) -> pd.DataFrame:
+        """transform() wrapped in a DataFrame with the model's column names"""
+        return pd.DataFrame(self.transform(data), columns=self.feature_names)
+
+    # ------------------------------------------------------------------------
+    # HELPERS
+    # ------------------------------------------------------------------------
+
+    def _canonical(self, values: pd.Series, col: str) -> pd.Series:
+        """Normalize spelling/case and apply aliases for one categorical column"""
+        text = values.astype(object).where(values.notna(), 'Other').astype(str).str.strip()
+
+        # Case-insensitive lookup: known values and aliases → canonical
+        table = {value.lower(): value for value in self.vocabularies.get(col, [])}
+        table.update({alias.lower(): target for alias, target in self.aliases.get(col, {}).items()})
+
+        return text.str.lower().map(table).fillna(text)
+
+    @staticmethod
+    def _to_flag(values: pd.Series) -> np.ndarray:
+        return parse_flags(values).astype(np.float32)
+
+    # ------------------------------------------------------------------------
+    # SERIALIZATION
+    # ------------------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """Plain-dict form stored inside the model artifact"""
+        return {
+            'version': PIPELINE_VERSION,
+            'numeric_features': self.numeric_features,
+            'flag_features': self.flag_features,
+            'categorical_features': self.categorical_features,
+            'log_features': self.log_features,
+            'aliases': self.aliases,
+            'vocabularies': self.vocabularies,
+            'feature_names': self.feature_names,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "FeaturePipeline":
+        return cls(
+            numeric_features=state.get('numeric_features'),
+            flag_features=state.get('flag_features'),
+            categorical_features=state.get('categorical_features'),
+            log_features=state.get('log_features'),
+            aliases=state.get('aliases'),
+            vocabularies=state.get('vocabularies'),
+            feature_names=state.get('feature_names'),
+        )
+
+    @classmethod
+    def from_feature_names(cls, feature_names: List[str]) -> "FeaturePipeline":
+        """
+        Rebuild a pipeline for older artifacts that only stored feature_names
+        (e.g. ['amount_log', ..., 'industry_Tech', 'region_South']).
+        """
+        pipeline = cls()
+        pipeline.vocabularies = {
+            col: [name[len(col) + 1:] for name in feature_names if name.startswith(f'{col}_')]
+            for col in pipeline.categorical_features
+        }
+        pipeline.feature_names = list(feature_names)
+        pipeline._compile()
+        return pipeline
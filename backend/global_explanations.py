@@ -0,0 +1,242 @@
+"""
+RECOV.AI - Global Explanations
+==============================
+Portfolio-wide SHAP summaries: which features drive recovery up or down
+across the whole book, overall and per industry / region.
+
+Per feature and group the summary keeps
+  * mean |SHAP|   - how much the feature matters
+  * mean SHAP     - which way it pushes (negative = lowers recovery)
+in log-odds units, the model's margin.
+
+SHAP values come from XGBoost's own exact TreeSHAP (pred_contribs), so no
+SHAP install is needed. They are computed only for accounts that were just
+scored, by a background worker, and folded into running sums. Every
+account keeps its latest contribution row (one float32 row, like its
+features): when an account is rescored its old contribution is subtracted
+before the new one is added, so the summary always describes the current
+book and nothing is recomputed on request.
+
+The rendered summary is cached until new rows are folded in, and the sums
+belong to one model version; contributions of another model are never
+mixed in (reset() starts over for a new version).
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Try both import paths
+try:
+    from backend.model_pool import segment_keys, OTHER
+    from backend.predictor import HERO_ACCOUNT_ID
+except ModuleNotFoundError:
+    from model_pool import segment_keys, OTHER
+    from predictor import HERO_ACCOUNT_ID
+
+# Groupings reported next to the overall summary
+GROUP_COLUMNS = ['industry', 'region']
+
+
+class GlobalExplainer:
+    """Incrementally maintained mean |SHAP| / mean SHAP per feature and group"""
+
+    def __init__(self, feature_names: List[str], contributions: Callable[[np.ndarray], np.ndarray],
+                 features: Callable[[np.ndarray], np.ndarray], model_version: str = "1",
+                 chunk_rows: int = 50_000):
+        """
+        Args:
+            contributions: X → (n, n_features + 1) SHAP values, bias last
+            features: store rows → their current float32 feature rows
+            chunk_rows: rows explained per contributions call
+        """
+        self.feature_names = [str(n) for n in feature_names]
+        self.contributions = contributions
+        self.features = features
+        self.chunk_rows = max(1, int(chunk_rows))
+
+        # Fixed labels per grouping, read from the one-hot columns
+        self.groups = {'overall': ['all']}
+        for col in GROUP_COLUMNS:
+            labels = [n[len(col) + 1:] for n in self.feature_names if n.startswith(f"{col}_")]
+            if labels:
+                self.groups[col] = labels + [OTHER]
+
+        self._cond = threading.Condition()
+        self._dirty = np.zeros(0, dtype=bool)
+        self._busy = False
+        self._worker = None
+        self.errors = 0
+        self.reset(model_version)
+
+    def reset(self, model_version: Optional[str] = None):
+        """Drop every folded contribution (e.g. for a new model version)"""
+        n_features = len(self.feature_names)
+        with self._cond:
+            if model_version is not None:
+                self.model_version = str(model_version)
+            self.generation = 0
+            self._cache = None
+            self._has = np.zeros(0, dtype=bool)
+            self._phi = np.zeros((0, n_features + 1), dtype=np.float32)
+            self._codes = {g: np.zeros(0, dtype=np.int16) for g in self.groups}
+            self._count = {g: np.zeros(len(labels), dtype=np.int64) for g, labels in self.groups.items()}
+            self._abs_sum = {g: np.zeros((len(labels), n_features)) for g, labels in self.groups.items()}
+            self._sum = {g: np.zeros((len(labels), n_features + 1)) for g, labels in self.groups.items()}
+
+    # ------------------------------------------------------------------------
+    # MARK (response path: only flags rows)
+    # ------------------------------------------------------------------------
+
+    def mark(self, rows: np.ndarray, account_ids):
+        """Flag freshly scored store rows for explanation"""
+        # The scripted demo account is not a model output
+        rows = np.asarray(rows)[np.asarray(account_ids, dtype=str) != HERO_ACCOUNT_ID]
+        if len(rows) == 0:
+            return
+        with self._cond:
+            if rows.max() >= len(self._dirty):
+                grown = np.zeros(max(int(rows.max()) + 1, 2 * len(self._dirty)), dtype=bool)
+                grown[:len(self._dirty)] = self._dirty
+                self._dirty = grown
+            self._dirty[rows] = True
+            self._ensure_worker()
+            self._cond.notify_all()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="recovai-global-explain", daemon=True)
+            self._worker.start()
+
+    def pending(self) -> int:
+        with self._cond:
+            return int(self._dirty.sum())
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every flagged row has been folded in (False on timeout)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy and not self._dirty.any(), timeout)
+
+    # ------------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty.any())
+                rows = np.flatnonzero(self._dirty)[:self.chunk_rows]
+                self._dirty[rows] = False
+                self._busy = True
+            try:
+                X = self.features(rows)
+                self.fold(rows, X, self.contributions(X))
+            except Exception as e:
+                print(f"⚠️ Global explanation update failed: {e}")
+                self.errors += 1
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _group_codes(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        codes = {'overall': np.zeros(len(X), dtype=np.int16)}
+        for col, labels in self.groups.items():
+            if col == 'overall':
+                continue
+            batch_codes, keys = segment_keys(X, self.feature_names, [col])
+            fixed = np.array([labels.index(key) for key in keys], dtype=np.int16)
+            codes[col] = fixed[batch_codes]
+        return codes
+
+    def fold(self, rows: np.ndarray, X: np.ndarray, phi: np.ndarray):
+        """Replace the contributions of `rows` with `phi` (n, n_features + 1) in the sums"""
+        # An account scored twice in one batch counts once (latest row)
+        rows = np.asarray(rows)
+        _, last = np.unique(rows[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+        rows, X, phi = rows[keep], X[keep], np.asarray(phi, dtype=np.float32)[keep]
+        codes = self._group_codes(X)
+
+        with self._cond:
+            self._grow(int(rows.max()) + 1 if len(rows) else 0)
+            old = rows[self._has[rows]]
+            for g in self.groups:
+                if len(old):
+                    self._accumulate(g, self._codes[g][old], self._phi[old], -1)
+                self._accumulate(g, codes[g], phi, 1)
+                self._codes[g][rows] = codes[g]
+            self._phi[rows] = phi
+            self._has[rows] = True
+            self.generation += 1
+
+    def _accumulate(self, group: str, codes: np.ndarray, phi: np.ndarray, sign: int):
+        np.add.at(self._count[group], codes, sign)
+        np.add.at(self._abs_sum[group], codes, sign * np.abs(phi[:, :-1].astype(np.float64)))
+        np.add.at(self._sum[group], codes, sign * phi.astype(np.float64))
+
+    def _grow(self, needed: int):
+        if needed <= len(self._has):
+            return
+        capacity = max(needed, 2 * len(self._has), 1024)
+
+        def resized(array):
+            out = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            out[:len(array)] = array
+            return out
+
+        self._has = resized(self._has)
+        self._phi = resized(self._phi)
+        for g in self.groups:
+            self._codes[g] = resized(self._codes[g])
+
+    # ------------------------------------------------------------------------
+    # REPORT
+    # ------------------------------------------------------------------------
+
+    def _summary(self, group: str, code: int) -> dict:
+        n = int(self._count[group][code])
+        mean_abs = self._abs_sum[group][code] / n
+        mean = self._sum[group][code] / n
+        order = np.argsort(-mean_abs, kind='stable')
+        return {
+            'accounts': n,
+            'base_value': round(float(mean[-1]), 6),
+            'features': [
+                {
+                    'feature': self.feature_names[i],
+                    'mean_abs_shap': round(float(mean_abs[i]), 6),
+                    'mean_shap': round(float(mean[i]), 6),
+                    'direction': 'positive' if mean[i] > 0 else 'negative',
+                }
+                for i in order
+            ],
+        }
+
+    def _build(self) -> dict:
+        report = {'model_version': self.model_version, 'units': 'log_odds', 'generation': self.generation}
+        for group, labels in self.groups.items():
+            summaries = {labels[code]: self._summary(group, code)
+                         for code in range(len(labels)) if self._count[group][code] > 0}
+            report[group] = summaries.get('all') if group == 'overall' else summaries
+        report['accounts'] = report['overall']['accounts'] if report['overall'] else 0
+        return report
+
+    def report(self, top: Optional[int] = None) -> dict:
+        """Summary overall and per group; features ranked by mean |SHAP|"""
+        with self._cond:
+            if self._cache is None or self._cache['generation'] != self.generation:
+                self._cache = self._build()
+            cached = self._cache
+            pending = int(self._dirty.sum())
+
+        def trimmed(summary):
+            return {**summary, 'features': summary['features'][:top]} if summary and top else summary
+
+        report = {**cached, 'pending_accounts': pending, 'errors': self.errors,
+                  'overall': trimmed(cached['overall'])}
+        for group in self.groups:
+            if group != 'overall':
+                report[group] = {label: trimmed(s) for label, s in cached[group].items()}
+        return report
@@ -4,19 +4,62 @@ RECOV.AI - FastAPI Backend
 Main API server for debt recovery predictions.  
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import ValidationError
+from typing import Any, Optional, List
 import pandas as pd
-import io
+import numpy as np
 import uvicorn
+import threading
+import time
+from datetime import datetime, timedelta
 
 # Import predictor
 try:
     from backend.predictor import RecoveryPredictor
+    from backend.batcher import MicroBatcher, BatcherOverloaded
+    from backend.validation import validate_accounts, missing_required_columns
+    from backend.account_store import AccountStore
+    from backend.dca_assignment import DCAAssigner, load_agencies
+    from backend.models import AccountData, AssignmentRequest, WhatIfRequest
+    from backend.whatif import build_scenarios, scenario_results
+    from backend.portfolio_simulation import simulate_recovery
+    from backend.aging import split_thresholds, crossing_mask
+    from backend.export import EXPORT_FORMATS, iter_csv, iter_parquet, export_filename
+    from backend.prediction_log import PredictionLog
+    from backend.drift_monitor import DriftMonitor, build_baseline_from_csv
+    from backend.admission import AdmissionController, UploadRejected
+    from backend.profiling import RequestProfiler
+    from backend.shadow import ShadowScorer, load_candidate
+    from backend.global_explanations import GlobalExplainer
+    from backend.search_index import SearchIndex
+    from backend.predictor import RISK_LEVELS, HERO_ACCOUNT_ID, HERO_PROBABILITY, derive_outputs
+    from backend import config
 except:  
     from predictor import RecoveryPredictor
+    from batcher import MicroBatcher, BatcherOverloaded
+    from validation import validate_accounts, missing_required_columns
+    from account_store import AccountStore
+    from dca_assignment import DCAAssigner, load_agencies
+    from models import AccountData, AssignmentRequest, WhatIfRequest
+    from whatif import build_scenarios, scenario_results
+    from portfolio_simulation import simulate_recovery
+    from aging import split_thresholds, crossing_mask
+    from export import EXPORT_FORMATS, iter_csv, iter_parquet, export_filename
+    from prediction_log import PredictionLog
+    from drift_monitor import DriftMonitor, build_baseline_from_csv
+    from admission import AdmissionController, UploadRejected
+    from profiling import RequestProfiler
+    from shadow import ShadowScorer, load_candidate
+    from global_explanations import GlobalExplainer
+    from search_index import SearchIndex
+    from predictor import RISK_LEVELS, HERO_ACCOUNT_ID, HERO_PROBABILITY, derive_outputs
+    import config
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,6 +77,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    """FastAPI's 422, but rejected inf / nan inputs are echoed as strings (not valid JSON)"""
+    def finite(value):
+        if isinstance(value, float) and not np.isfinite(value):
+            return str(value)
+        if isinstance(value, dict):
+            return {k: finite(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [finite(v) for v in value]
+        return value
+    return JSONResponse(status_code=422, content={"detail": finite(jsonable_encoder(exc.errors()))})
+
 # Initialize AI Engine
 try:
     predictor = RecoveryPredictor()
@@ -42,30 +98,210 @@ except Exception as e:
     print(f"❌ AI Engine Failed to Load:  {e}")
     predictor = None
 
-# In-memory storage for accounts
-accounts_db = {}
+# In-memory storage for accounts (compact struct-of-arrays)
+store = AccountStore(feature_names=predictor.pipeline.feature_names if predictor else None)
 
-# ============================================================================
-# PYDANTIC MODELS
-# ============================================================================
 
-class AccountRequest(BaseModel):
-    """Single account prediction request"""
-    account_id: str
-    company_name:  str
-    amount:  float
-    days_overdue: int
-    payment_history_score: float
-    shipment_volume_change_30d: float
-    
-    # Optional fields with defaults
-    shipment_volume_30d: Optional[int] = 0
-    express_ratio: Optional[float] = 0.0
-    destination_diversity: Optional[int] = 0
-    industry:  Optional[str] = "Other"
-    region: Optional[str] = "Other"
-    email_opened: Optional[bool] = False
-    dispute_flag: Optional[bool] = False
+# Append-only prediction history
+prediction_log = None
+if config.PREDICTION_LOG_ENABLED:
+    try:
+        prediction_log = PredictionLog(
+            config.PREDICTION_LOG_DIR,
+            segment_rows=config.PREDICTION_LOG_SEGMENT_ROWS,
+            flush_seconds=config.PREDICTION_LOG_FLUSH_SECONDS,
+            merge_segments=config.PREDICTION_LOG_MERGE_SEGMENTS,
+        )
+    except Exception as e:
+        print(f"⚠️ Prediction log disabled: {e}")
+
+# Feature drift against the training distribution
+drift_monitor = None
+if predictor and config.DRIFT_ENABLED:
+    try:
+        baseline = predictor.drift_baseline
+        if baseline is None:
+            baseline = build_baseline_from_csv(predictor.pipeline)
+            print("ℹ️ Drift baseline built from training_data.csv (artifact has none)")
+        drift_monitor = DriftMonitor(
+            baseline,
+            psi_warn=config.DRIFT_PSI_WARN,
+            psi_alert=config.DRIFT_PSI_ALERT,
+            min_rows=config.DRIFT_MIN_ROWS,
+        )
+    except Exception as e:
+        print(f"⚠️ Drift monitoring disabled: {e}")
+
+# Candidate model scored off the response path on the same feature matrices
+shadow = None
+if predictor and config.SHADOW_MODEL_PATH:
+    try:
+        candidate, candidate_version = load_candidate(config.SHADOW_MODEL_PATH, predictor.pipeline.feature_names)
+        shadow = ShadowScorer(
+            candidate,
+            predictor.pipeline.feature_names,
+            version=candidate_version,
+            queue_limit=config.SHADOW_QUEUE_LIMIT,
+            max_accounts=config.SHADOW_MAX_ACCOUNTS,
+        )
+        print(f"✅ Shadow model loaded: {config.SHADOW_MODEL_PATH}")
+    except Exception as e:
+        print(f"⚠️ Shadow scoring disabled: {e}")
+
+# Portfolio-wide SHAP summaries, updated from freshly scored rows
+global_explainer = None
+if predictor and predictor.model and config.GLOBAL_EXPLAIN_ENABLED:
+    global_explainer = GlobalExplainer(
+        predictor.pipeline.feature_names,
+        contributions=predictor.contributions,
+        features=store.feature_rows,
+        model_version=predictor.model_version,
+        chunk_rows=config.GLOBAL_EXPLAIN_CHUNK_ROWS,
+    )
+
+# Company-name search, indexed from freshly stored rows
+search_index = None
+if config.SEARCH_INDEX_ENABLED:
+    search_index = SearchIndex(
+        lambda rows: store.strings('company_name', rows),
+        chunk_rows=config.SEARCH_INDEX_CHUNK_ROWS,
+    )
+
+
+def score_and_store(records: List[dict], new_input: bool = True) -> List[dict]:
+    """
+    Score accounts on the compact path and keep their float32 features and
+    probabilities in the store (and the history log). Returns the full
+    response dicts.
+    
+    Rows the model could not score get their fallback response but are
+    neither stored nor fed to the monitors (they have no features).
+    
+    new_input=False marks a re-score of already stored accounts (account
+    views): it skips the drift monitor and shadow scoring, which must only
+    see incoming data, not whatever accounts are read most, and only logs
+    accounts whose probability changed.
+    """
+    X, probs, failed = predictor.predict_probabilities(records)
+    results = predictor.results_from_probabilities(records, probs)
+    if failed.any():
+        keep = np.flatnonzero(~failed)
+        records = [records[i] for i in keep]
+        X, probs = X[keep], probs[keep]
+        if not records:
+            return results
+    
+    rows = store.upsert(records, X)
+    previous = store.prediction_table(rows)
+    store.set_predictions(rows, probs)
+    account_ids = previous['account_id']
+    if prediction_log:
+        changed = slice(None) if new_input else np.flatnonzero(previous['probability'] != probs)
+        prediction_log.append(account_ids[changed], probs[changed], predictor.model_version, X[changed])
+    if drift_monitor and new_input:
+        drift_monitor.update(X)
+    if shadow and new_input:
+        shadow.submit(account_ids, X, probs, predictor.last_model_seconds())
+    if global_explainer:
+        global_explainer.mark(rows, account_ids)
+    if search_index:
+        search_index.mark(rows)
+    return results
+
+# Micro-batcher for concurrent /predict calls
+batcher = None
+if predictor and config.MICROBATCH_ENABLED:
+    batcher = MicroBatcher(
+        score_and_store,
+        max_batch_size=config.MICROBATCH_MAX_SIZE,
+        max_wait_ms=config.MICROBATCH_MAX_WAIT_MS,
+        latency_slo_ms=config.MICROBATCH_LATENCY_SLO_MS,
+        queue_limit=config.MICROBATCH_QUEUE_LIMIT,
+    )
+
+# Upload admission control (concurrency + memory budget)
+admission = AdmissionController(
+    max_concurrent=config.ANALYZE_MAX_CONCURRENT,
+    max_upload_bytes=int(config.ANALYZE_MAX_UPLOAD_MB * 1e6),
+    request_memory_bytes=int(config.ANALYZE_REQUEST_MEMORY_MB * 1e6),
+    memory_budget_bytes=int(config.ANALYZE_MEMORY_BUDGET_MB * 1e6),
+    memory_factor=config.ANALYZE_MEMORY_FACTOR,
+    retry_after_s=config.ANALYZE_RETRY_AFTER_S,
+)
+
+# Endpoints whose uploads go through admission control
+ADMISSION_PATHS = {"/analyze"}
+
+
+@app.middleware("http")
+async def upload_admission(request: Request, call_next):
+    """Admit or reject uploads from their headers, before the body is read"""
+    if request.method != "POST" or request.url.path not in ADMISSION_PATHS:
+        return await call_next(request)
+    
+    content_length = request.headers.get("content-length")
+    try:
+        cost = admission.admit(int(content_length) if content_length and content_length.isdigit() else None)
+    except UploadRejected as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers())
+    
+    try:
+        return await call_next(request)
+    finally:
+        admission.release(cost)
+
+# Opt-in per-request profiling (middleware only installed when enabled)
+profiler = None
+if config.PROFILING_ENABLED:
+    try:
+        profiler = RequestProfiler(
+            config.PROFILING_DIR,
+            token=config.PROFILING_TOKEN,
+            sample_rate=config.PROFILING_SAMPLE_RATE,
+            interval_ms=config.PROFILING_INTERVAL_MS,
+            max_profiles=config.PROFILING_MAX_PROFILES,
+        )
+        if not config.PROFILING_TOKEN:
+            print("⚠️ No RECOV_PROFILING_TOKEN set: only sampled requests are profiled")
+    except Exception as e:
+        print(f"⚠️ Profiling disabled: {e}")
+
+if profiler:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Sample the stacks of a flagged request and save its flame graph"""
+        trigger = profiler.trigger(request.headers, request.query_params)
+        sampler = profiler.begin() if trigger else None
+        if sampler is None:
+            return await call_next(request)
+        
+        request_id = profiler.request_id(request.headers)
+        started = time.perf_counter()
+        info = {"method": request.method, "path": request.url.path, "trigger": trigger}
+        
+        def finish(status_code: int):
+            info.update(status=status_code, duration_ms=round((time.perf_counter() - started) * 1000, 2))
+            profiler.finish(sampler, request_id, info)
+        
+        try:
+            response = await call_next(request)
+        except Exception:
+            await run_in_threadpool(finish, 500)
+            raise
+        
+        # Keep sampling until the body (possibly streamed) has been sent
+        body = response.body_iterator
+        
+        async def profiled_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await run_in_threadpool(finish, response.status_code)
+        
+        response.body_iterator = profiled_body()
+        response.headers["X-Profile-Id"] = request_id
+        return response
 
 # ============================================================================
 # HELPER FUNCTION
@@ -95,18 +331,25 @@ def home():
         "endpoints": {
             "health": "GET /",
             "single_prediction": "POST /predict",
+            "bulk_prediction": "POST /predict/batch",
             "batch_analysis": "POST /analyze",
-            "get_account": "GET /account/{account_id}"
+            "portfolio_assignment": "POST /portfolio/assign",
+            "export": "GET /export?format=csv|parquet",
+            "get_account": "GET /account/{account_id}",
+            "account_history": "GET /account/{account_id}/history",
+            "portfolio_as_of": "GET /portfolio/as-of?date=YYYY-MM-DD"
         },
         "ai_engine":  "Loaded" if predictor else "Error"
     }
 
 @app.post("/predict")
-def predict_single(data: AccountRequest):
+async def predict_single(data: AccountData):
     """
     Predict recovery for a single account.  
     
     **Day 3 Requirement:** Single account prediction endpoint
+    
+    Concurrent requests are micro-batched into one predict_proba call.
     """
     if not predictor: 
         raise HTTPException(status_code=500, detail="AI Engine not loaded")
@@ -115,11 +358,11 @@ def predict_single(data: AccountRequest):
         # Convert to dict
         account_data = data.dict()
         
-        # Store in memory
-        accounts_db[account_data['account_id']] = account_data
-        
-        # Get prediction
-        result = predictor.predict_recovery(account_data)
+        # Get prediction (batched with other in-flight requests) and store it
+        if batcher:
+            result = await batcher.submit(account_data)
+        else:
+            result = (await run_in_threadpool(score_and_store, [account_data]))[0]
         
         # Ensure it's a dict
         result_dict = to_dict(result)
@@ -130,64 +373,179 @@ def predict_single(data: AccountRequest):
 
         return result_dict
         
+    except BatcherOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e: 
         raise HTTPException(status_code=500, detail=f"Prediction failed:  {str(e)}")
 
-@app.post("/analyze")
-async def analyze_csv(file: UploadFile = File(...)):
+@app.post("/predict/batch")
+def predict_batch(accounts: List[Any] = Body(...)):
     """
-    Analyze multiple accounts from CSV file. 
+    Predict recovery for many accounts sent as a JSON array.
     
-    **Day 3 Requirement:** CSV upload and batch processing
+    Each item is validated on its own; invalid or failing items are
+    reported in `errors` (with their index) without failing the batch.
     """
     if not predictor:
         raise HTTPException(status_code=500, detail="AI Engine not loaded")
     
+    if len(accounts) > config.BATCH_PREDICT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many accounts: {len(accounts)} (max {config.BATCH_PREDICT_MAX_ITEMS})"
+        )
+    
+    errors = []
+    valid_idx = []
+    valid_records = []
+    
+    # Validate each item individually
+    for idx, item in enumerate(accounts):
+        try:
+            account_data = AccountData(**item).dict()
+        except ValidationError as e:
+            errors.append({
+                "index": idx,
+                "account_id": item.get('account_id') if isinstance(item, dict) else None,
+                "error": "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+            })
+            continue
+        except TypeError:
+            errors.append({"index": idx, "account_id": None, "error": "Item is not a JSON object"})
+            continue
+        
+        valid_idx.append(idx)
+        valid_records.append(account_data)
+    
+    # Score all valid items in one vectorized call
+    results = []
     try:
-        # Read CSV file
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        batch_results = score_and_store(valid_records) if valid_records else []
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    
+    for idx, account_data, result in zip(valid_idx, valid_records, batch_results):
+        result_dict = to_dict(result)
+        if result_dict.get('error'):
+            errors.append({"index": idx, "account_id": account_data['account_id'], "error": result_dict['error']})
+            continue
         
+        result_dict['index'] = idx
+        result_dict['amount'] = float(account_data.get('amount', 0))
+        result_dict['days_overdue'] = int(account_data.get('days_overdue', 0))
+        results.append(result_dict)
+    
+    errors.sort(key=lambda err: err['index'])
+    
+    return {
+        "total_accounts": len(accounts),
+        "succeeded": len(results),
+        "failed": len(errors),
+        "predictions": results,
+        "errors": errors
+    }
+
+def analyze_upload(upload) -> dict:
+    """
+    Parse, validate and score an uploaded CSV straight from its spooled
+    file, SCORING_CHUNK_ROWS rows at a time (runs in a worker thread).
+    """
+    predictions = []
+    row_errors = []
+    total_rows = 0
+    valid_rows = 0
+    rejected_rows = 0
+    error_count = 0
+    
+    upload.seek(0)
+    for chunk in pd.read_csv(upload, chunksize=config.SCORING_CHUNK_ROWS):
         # Validate required columns
-        required_cols = ['account_id', 'company_name', 'amount', 'days_overdue', 
-                         'payment_history_score', 'shipment_volume_change_30d']
-        
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Missing required columns: {missing_cols}"
-            )
-        
-        # Process each account
-        predictions = []
-        for idx, row in df.iterrows():
-            account_dict = row.to_dict()
-            
-            # Store in memory
-            accounts_db[account_dict['account_id']] = account_dict
-            
-            # Get prediction and convert to dict
-            result = predictor.predict_recovery(account_dict)
+        if total_rows == 0:
+            missing_cols = missing_required_columns(chunk)
+            if missing_cols:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Missing required columns: {missing_cols}"
+                )
+        
+        # Vectorized validation: bad rows are reported, good rows are scored
+        max_errors = max(config.VALIDATION_MAX_ERRORS - len(row_errors), 0)
+        validation = validate_accounts(chunk, max_errors=max_errors, row_offset=total_rows)
+        total_rows += len(chunk)
+        valid_rows += len(validation.valid)
+        rejected_rows += validation.rejected_rows
+        error_count += validation.error_count
+        row_errors.extend(validation.errors)
+        del chunk
+        
+        records = validation.valid.to_dict('records')
+        batch_results = score_and_store(records) if records else []
+        for account_dict, result in zip(records, batch_results):
             result_dict = to_dict(result)
+            if result_dict.get('error'):
+                row_errors.append({
+                    "row": None,
+                    "account_id": account_dict['account_id'],
+                    "column": None,
+                    "value": None,
+                    "error": result_dict['error']
+                })
+                continue
             
             # ✅ NEW: Include original account data in response
-            # Using safe casting to ensure frontend doesn't break
-            result_dict['amount'] = float(account_dict.get('amount', 0) or 0)
-            result_dict['days_overdue'] = int(account_dict.get('days_overdue', 0) or 0)
+            result_dict['amount'] = float(account_dict['amount'])
+            result_dict['days_overdue'] = int(account_dict['days_overdue'])
             
             predictions.append(result_dict)
+    
+    if total_rows == 0:
+        raise pd.errors.EmptyDataError("No data rows")
+    
+    return {
+        "total_accounts": len(predictions),
+        "predictions": predictions,
+        "summary": {
+            "high_probability": sum(1 for p in predictions if p['recovery_probability'] > 0.7),
+            "medium_probability": sum(1 for p in predictions if 0.4 < p['recovery_probability'] <= 0.7),
+            "low_probability": sum(1 for p in predictions if p['recovery_probability'] <= 0.4),
+        },
+        "validation": {
+            "total_rows": total_rows,
+            "valid_rows": valid_rows,
+            "rejected_rows": rejected_rows,
+            "error_count": error_count,
+            "errors_truncated": error_count > len([e for e in row_errors if e['row'] is not None])
+        },
+        "errors": row_errors
+    }
+
+@app.post("/analyze")
+async def analyze_csv(file: UploadFile = File(...)):
+    """
+    Analyze multiple accounts from CSV file. 
+    
+    **Day 3 Requirement:** CSV upload and batch processing
+    
+    Admission control (see upload_admission) runs before the body is read;
+    the upload is parsed from its spooled temp file, never held as bytes.
+    """
+    if not predictor:
+        raise HTTPException(status_code=500, detail="AI Engine not loaded")
+    
+    # Uploads without Content-Length are only measured once spooled
+    if file.size is not None:
+        try:
+            admission.check_size(file.size)
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    try:
+        return await run_in_threadpool(analyze_upload, file.file)
         
-        return {
-            "total_accounts": len(predictions),
-            "predictions": predictions,
-            "summary": {
-                "high_probability": sum(1 for p in predictions if p['recovery_probability'] > 0.7),
-                "medium_probability": sum(1 for p in predictions if 0.4 < p['recovery_probability'] <= 0.7),
-                "low_probability": sum(1 for p in predictions if p['recovery_probability'] <= 0.4),
-            }
-        }
-        
+    except HTTPException:
+        raise
     except pd.errors.EmptyDataError:
         raise HTTPException(status_code=400, detail="CSV file is empty")
     except Exception as e:
@@ -204,15 +562,15 @@ def get_account(account_id: str):
         raise HTTPException(status_code=500, detail="AI Engine not loaded")
     
     # Check if account exists in memory
-    if account_id not in accounts_db:
+    if account_id not in store:
         raise HTTPException(
             status_code=404, 
             detail=f"Account {account_id} not found. Upload CSV first via /analyze"
         )
     
     try: 
-        account_data = accounts_db[account_id]
-        result = predictor.predict_recovery(account_data)
+        account_data = store.get_record(account_id)
+        result = score_and_store([account_data], new_input=False)[0]
         
         # Convert to dict and enrich with original data
         result_dict = to_dict(result)
@@ -224,14 +582,501 @@ def get_account(account_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/account/{account_id}/whatif")
+def account_whatif(account_id: str, request: WhatIfRequest):
+    """
+    Score a grid of changes to a stored account in one model call, e.g.
+    {"changes": {"contact_attempts": {"start": 1, "stop": 3, "relative": true},
+                 "dispute_flag": [false, true]}}
+    
+    Results are not stored; `delta` is relative to the unchanged account.
+    """
+    if not predictor or not predictor.model:
+        raise HTTPException(status_code=500, detail="AI Engine not loaded")
+    if account_id not in store:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Account {account_id} not found. Upload CSV first via /analyze"
+        )
+    
+    try:
+        variants, grid = build_scenarios(store.get_record(account_id), request.changes, config.WHATIF_MAX_SCENARIOS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    started = time.perf_counter()
+    probs = predictor.score_features(predictor.pipeline.transform(variants))
+    return {
+        "account_id": account_id,
+        **scenario_results(grid, probs, request.limit),
+        "scoring_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+@app.get("/explain/global")
+def explain_global(
+    top: int = Query(10, ge=1, le=1000),
+    wait: bool = False,
+):
+    """
+    Main drivers of recovery across the scored book: mean |SHAP| and mean
+    signed SHAP (log-odds) per feature, overall and per industry / region.
+    
+    `wait=true` folds in accounts that are still being explained first.
+    """
+    if not global_explainer:
+        raise HTTPException(status_code=404, detail="Global explanations are not enabled")
+    if wait:
+        global_explainer.wait_idle(timeout=30)
+    return global_explainer.report(top)
+
+def select_rows(risk_level, industry, region, min_probability, max_probability):
+    """Shared filters for /accounts/list and /export"""
+    try:
+        return store.select(
+            risk_level=risk_level,
+            industry=industry,
+            region=region,
+            min_probability=min_probability,
+            max_probability=max_probability
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(float(timestamp)).isoformat()
+
+@app.get("/account/{account_id}/history")
+def account_history(account_id: str):
+    """Every logged prediction for one account, oldest first"""
+    if not prediction_log:
+        raise HTTPException(status_code=503, detail="Prediction log is disabled")
+    
+    entries = prediction_log.history(account_id)
+    if len(entries['timestamp']) == 0:
+        raise HTTPException(status_code=404, detail=f"No prediction history for {account_id}")
+    
+    return {
+        "account_id": account_id,
+        "total_entries": len(entries['timestamp']),
+        "history": [
+            {
+                "timestamp": _iso(entries['timestamp'][i]),
+                "model_version": str(entries['model_version'][i]),
+                "recovery_probability": round(float(entries['probability'][i]), 6),
+                "risk_level": RISK_LEVELS[int(entries['risk_code'][i])],
+                "feature_hash": format(int(entries['feature_hash'][i]), '016x')
+            }
+            for i in range(len(entries['timestamp']))
+        ]
+    }
+
+@app.get("/portfolio/as-of")
+def portfolio_as_of(date: str, limit: int = Query(1000, ge=0)):
+    """
+    Latest prediction of every account as of a point in time.
+    
+    `date` is an ISO date or datetime; a plain date means the end of that day.
+    """
+    if not prediction_log:
+        raise HTTPException(status_code=503, detail="Prediction log is disabled")
+    
+    try:
+        as_of = datetime.fromisoformat(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date '{date}' (use ISO format, e.g. 2026-10-19)")
+    if len(date) == 10:
+        as_of = as_of + timedelta(days=1) - timedelta(microseconds=1)
+    
+    snapshot = prediction_log.as_of(as_of.timestamp())
+    n = len(snapshot['account_id'])
+    risk_counts = np.bincount(snapshot['risk_code'].astype(np.int64), minlength=len(RISK_LEVELS))
+    
+    return {
+        "as_of": as_of.isoformat(),
+        "total_accounts": n,
+        "average_probability": round(float(snapshot['probability'].mean()), 6) if n else None,
+        "risk_levels": {level: int(count) for level, count in zip(RISK_LEVELS, risk_counts)},
+        "accounts": [
+            {
+                "account_id": str(snapshot['account_id'][i]),
+                "recovery_probability": round(float(snapshot['probability'][i]), 6),
+                "risk_level": RISK_LEVELS[int(snapshot['risk_code'][i])],
+                "model_version": str(snapshot['model_version'][i]),
+                "scored_at": _iso(snapshot['timestamp'][i])
+            }
+            for i in range(min(limit, n))
+        ]
+    }
+
+@app.get("/accounts/search")
+def search_accounts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=100),
+    wait: bool = False,
+):
+    """
+    Type-ahead search by company name (case, accents and punctuation are
+    ignored). Names starting with the query rank first, then names with a
+    word starting with it, then names containing it anywhere (3+ characters).
+    
+    `wait=true` indexes accounts that are still being indexed first.
+    """
+    if not search_index:
+        raise HTTPException(status_code=404, detail="Company-name search is not enabled")
+    if wait:
+        search_index.wait_idle(timeout=30)
+    
+    found = search_index.search(q, limit)
+    rows = np.asarray(found['rows'], dtype=np.int64)
+    table = store.prediction_table(rows)
+    names = store.strings('company_name', rows)
+    risk_codes = derive_outputs(table['probability'])['risk_code']
+    
+    return {
+        "query": q,
+        "normalized_query": found['query'],
+        "total_matches": len(rows),
+        "truncated": found['truncated'],
+        "matches": [
+            {
+                "account_id": str(table['account_id'][i]),
+                "company_name": str(names[i]),
+                "match": found['match'][i],
+                "recovery_probability": round(float(table['probability'][i]), 6),
+                "risk_level": RISK_LEVELS[int(risk_codes[i])],
+                "scored_at": _iso(table['scored_at'][i])
+            }
+            for i in range(len(rows))
+        ]
+    }
+
 @app.get("/accounts/list")
-def list_accounts():
-    """List all accounts in memory"""
+def list_accounts(
+    risk_level: Optional[str] = None,
+    industry: Optional[str] = None,
+    region: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_probability: Optional[float] = Query(None, ge=0.0, le=1.0)
+):
+    """List accounts in memory (optionally filtered)"""
+    rows = select_rows(risk_level, industry, region, min_probability, max_probability)
+    return {
+        "total_accounts": len(rows),
+        "account_ids": store.prediction_table(rows)['account_id'].tolist()
+    }
+
+@app.get("/export")
+def export_accounts(
+    format: str = "csv",
+    risk_level: Optional[str] = None,
+    industry: Optional[str] = None,
+    region: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_probability: Optional[float] = Query(None, ge=0.0, le=1.0)
+):
+    """
+    Stream stored accounts + latest predictions as CSV or Parquet.
+    
+    Takes the same filters as /accounts/list. Rows are converted and sent
+    in chunks, so large exports never sit in memory as a whole.
+    """
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}' (use csv or parquet)")
+    
+    rows = select_rows(risk_level, industry, region, min_probability, max_probability)
+    
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed")
+        body = iter_parquet(store, rows, config.EXPORT_CHUNK_ROWS)
+    else:
+        body = iter_csv(store, rows, config.EXPORT_CHUNK_ROWS)
+    
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={export_filename(fmt)}",
+            "X-Total-Accounts": str(len(rows))
+        }
+    )
+
+@app.get("/monitoring/memory")
+def memory_stats():
+    """Bytes used by the in-memory account store"""
+    return store.memory_usage()
+
+@app.post("/portfolio/assign")
+def assign_portfolio(request: Optional[AssignmentRequest] = None):
+    """
+    Assign scored accounts to DCAs within agency capacity limits,
+    maximizing expected net recovery for the whole portfolio.
+    
+    Uses the agency table in backend/data/agencies.json unless `agencies`
+    is given in the request. Only accounts with a prediction are assigned.
+    """
+    request = request or AssignmentRequest()
+    
+    try:
+        agencies = [a.model_dump() for a in request.agencies] if request.agencies else load_agencies()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Agency table could not be loaded: {str(e)}")
+    
+    # Rows to assign (whole portfolio by default)
+    not_found = []
+    if request.account_ids is not None:
+        rows = []
+        for account_id in request.account_ids:
+            row = store.row_of(account_id)
+            if row is None:
+                not_found.append(account_id)
+            else:
+                rows.append(row)
+        rows = np.array(rows, dtype=np.int64)
+    else:
+        rows = np.arange(len(store))
+    
+    table = store.prediction_table(rows)
+    scored = ~np.isnan(table['probability'])
+    rows = rows[scored]
+    
+    assigner = DCAAssigner(agencies)
+    result = assigner.assign(store.numeric('amount', rows), table['probability'][scored])
+    
+    # Per-account assignments (capped by `limit`)
+    account_ids = table['account_id'][scored]
+    assignments = []
+    for i in range(min(request.limit, len(rows))):
+        code = int(result['agency_code'][i])
+        assignments.append({
+            "account_id": account_ids[i],
+            "agency": assigner.names[code] if code >= 0 else None,
+            "expected_net_recovery": round(float(result['expected_net'][i]), 2)
+        })
+    
+    return {
+        **result['stats'],
+        "unscored": int((~scored).sum()),
+        "not_found": not_found,
+        "rule_based": result['rule_based'],
+        "solver": result['solver'],
+        "assignments": assignments
+    }
+
+@app.get("/portfolio/simulate")
+def simulate_portfolio(
+    trials: int = Query(10000, ge=1),
+    seed: Optional[int] = 42,
+    by: str = Query("industry", pattern="^(industry|region|risk_level)$"),
+    percentiles: str = "5,25,50,75,95",
+    risk_level: Optional[str] = None,
+    industry: Optional[str] = None,
+    region: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_probability: Optional[float] = Query(None, ge=0.0, le=1.0)
+):
+    """
+    Monte Carlo distribution of recovered cash: percentiles overall, per
+    month of expected recovery (plus cumulative) and per segment (`by`).
+    Same filters as /accounts/list; `seed` makes runs reproducible.
+    """
+    if trials > config.SIMULATION_MAX_TRIALS:
+        raise HTTPException(status_code=400, detail=f"Too many trials: {trials} (max {config.SIMULATION_MAX_TRIALS})")
+    try:
+        qs = [float(q) for q in percentiles.split(',') if q.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles must be comma separated numbers")
+    if not qs or any(q < 0 or q > 100 for q in qs):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    
+    rows = select_rows(risk_level, industry, region, min_probability, max_probability)
+    probs = store.prediction_table(rows)['probability']
+    rows, probs = rows[~np.isnan(probs)], probs[~np.isnan(probs)]
+    if len(rows) == 0:
+        raise HTTPException(status_code=404, detail="No scored accounts. Upload CSV first via /analyze")
+    
+    outputs = derive_outputs(probs)
+    if by == "risk_level":
+        codes, labels = outputs['risk_code'], list(RISK_LEVELS)
+    else:
+        codes, categories = store.category_codes(by, rows)
+        labels = categories + ["Unknown"]
+        codes = np.where(codes < 0, len(categories), codes)
+    
+    result = simulate_recovery(
+        probs, store.numeric('amount', rows), outputs['expected_days'], codes, labels,
+        trials=trials, seed=seed, percentiles=qs,
+        chunk_draws=config.SIMULATION_CHUNK_DRAWS, exact_draws=config.SIMULATION_EXACT_DRAWS,
+    )
+    return {"segmented_by": by, **result}
+
+# ============================================================================
+# JOBS
+# ============================================================================
+
+# days_overdue split thresholds of the loaded model(s), read once
+aging_thresholds = None
+aging_lock = threading.Lock()
+
+def load_aging_thresholds() -> np.ndarray:
+    """
+    days_overdue split thresholds of the global and every segment model,
+    cached per model version. Segment models are read past the model pool,
+    so the job neither fills it nor evicts the hot ones.
+    """
+    global aging_thresholds
+    version = (predictor.model_version, id(predictor.model))
+    if aging_thresholds is None or aging_thresholds[0] != version:
+        models = [predictor.model]
+        for key in (predictor.segments or {}).get('models', {}):
+            try:
+                models.append(predictor.model_pool.get_unpooled(key))
+            except Exception as e:
+                # Such rows are scored by the global model anyway (see segment_model)
+                print(f"⚠️ Segment model '{key}' unavailable for aging: {e}")
+        feature_index = list(predictor.pipeline.feature_names).index('days_overdue')
+        aging_thresholds = (version, split_thresholds([m for m in models if m is not None], feature_index))
+    return aging_thresholds[1]
+
+@app.post("/jobs/aging")
+def run_aging(days: int = Query(1, ge=1, le=365)):
+    """
+    Advance every stored account's days_overdue by `days` and rescore only
+    the accounts that crossed one of the model's days_overdue split
+    thresholds (all others would get exactly the same score). Meant to be
+    called once a night, e.g. from cron.
+    """
+    if not predictor or not predictor.model:
+        raise HTTPException(status_code=500, detail="AI Engine not loaded")
+    if not aging_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="An aging job is already running")
+    
+    try:
+        started = time.perf_counter()
+        thresholds = load_aging_thresholds()
+        old, new = store.advance('days_overdue', days)
+        scored = ~np.isnan(store.prediction_table(np.arange(len(old)))['probability'])
+        rows = np.flatnonzero(crossing_mask(thresholds, old, new) & scored)
+        
+        risk_changes = 0
+        chunk = max(1, int(config.SCORING_CHUNK_ROWS))
+        for start in range(0, len(rows), chunk):
+            part = rows[start:start + chunk]
+            table = store.prediction_table(part)
+            X = store.feature_rows(part)
+            probs = predictor.score_features(X)
+            probs[table['account_id'] == HERO_ACCOUNT_ID] = HERO_PROBABILITY
+            risk_changes += int((derive_outputs(table['probability'])['risk_code'] !=
+                                 derive_outputs(probs)['risk_code']).sum())
+            
+            store.set_predictions(part, probs)
+            if prediction_log:
+                prediction_log.append(table['account_id'], probs, predictor.model_version, X)
+            if global_explainer:
+                global_explainer.mark(part, table['account_id'])
+        
+        return {
+            "days_advanced": days,
+            "accounts": len(old),
+            "scored_accounts": int(scored.sum()),
+            "thresholds": len(thresholds),
+            "rescored": len(rows),
+            "rescored_fraction": round(len(rows) / max(int(scored.sum()), 1), 6),
+            "risk_level_changes": risk_changes,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    finally:
+        aging_lock.release()
+
+@app.get("/monitoring/prediction-log")
+def prediction_log_stats():
+    """Segment / buffer counts of the prediction history log"""
+    if not prediction_log:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_log.stats()}
+
+@app.on_event("shutdown")
+def flush_prediction_log():
+    """Write buffered history entries before the server exits"""
+    if prediction_log:
+        prediction_log.flush()
+
+@app.get("/monitoring/drift")
+def drift_report(reset: bool = False):
+    """
+    Per-feature drift of scored traffic vs. the training data
+    (PSI, binned KS, mean shift, category frequencies).
+    
+    `reset=true` starts a new observation window after reporting.
+    """
+    if not drift_monitor:
+        return {"enabled": False}
+    report = drift_monitor.report()
+    if reset:
+        drift_monitor.reset()
+    return {"enabled": True, **report}
+
+@app.get("/monitoring/admission")
+def admission_stats():
+    """Running / rejected uploads and reserved memory"""
+    return admission.get_stats()
+
+@app.get("/monitoring/search-index")
+def search_index_stats():
+    """Size and backlog of the company-name search index"""
+    if not search_index:
+        raise HTTPException(status_code=404, detail="Company-name search is not enabled")
+    return search_index.get_stats()
+
+@app.get("/monitoring/shadow")
+def shadow_report(reset: bool = False):
+    """Live vs candidate model agreement, differences and latency"""
+    if not shadow:
+        return {"enabled": False}
+    report = shadow.report()
+    if reset:
+        shadow.reset()
+    return {"enabled": True, **report}
+
+@app.get("/monitoring/shadow/account/{account_id}")
+def shadow_account(account_id: str):
+    """Latest live and candidate probability of one account"""
+    if not shadow:
+        raise HTTPException(status_code=404, detail="Shadow scoring is not enabled")
+    result = shadow.account(account_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No shadow result for {account_id}")
+    return result
+
+@app.get("/monitoring/model-pool")
+def model_pool_stats():
+    """Segment models in the artifact and which of them are loaded"""
+    if not predictor or not predictor.segments:
+        return {"enabled": False}
     return {
-        "total_accounts": len(accounts_db),
-        "account_ids": list(accounts_db.keys())
+        "enabled": True,
+        "segmented_by": predictor.segments['by'],
+        "segments": sorted(predictor.segments['models']),
+        **predictor.model_pool.get_stats()
     }
 
+@app.get("/monitoring/profiles")
+def recent_profiles(limit: int = Query(50, ge=1, le=1000)):
+    """Most recent profiled requests (flame graphs are in the profiling directory)"""
+    if not profiler:
+        return {"enabled": False}
+    return {"enabled": True, "directory": str(profiler.directory), "profiles": profiler.recent(limit)}
+
+@app.get("/monitoring/batcher")
+def batcher_stats():
+    """Micro-batching statistics for /predict"""
+    if not batcher:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.get_stats()}
+
 # ============================================================================
 # RUN SERVER
 # ============================================================================
@@ -0,0 +1,169 @@
+"""
+RECOV.AI - Segment Model Pool
+=============================
+Per-segment models (e.g. one per industry, or per industry × region) with
+the global classifier as fallback.
+
+The artifact bundle lists the segments; each segment model lives in its own
+file next to the artifact and is only loaded the first time an account of
+that segment is scored:
+
+    backend/models/recovery_model.pkl
+        artifact['segments'] = {
+            'by': ['industry'],
+            'directory': 'recovery_model_segments',    (relative to the artifact)
+            'models': {'Tech': {'file': 'Tech.pkl', 'rows': 41210, 'auc': 0.93, ...}, ...},
+        }
+    backend/models/recovery_model_segments/Tech.pkl
+
+Loaded models are kept in a least-recently-used pool capped by total size
+(and optionally count), so dozens of segments never all sit in memory.
+Segments are read from the one-hot columns of the feature matrix, i.e.
+after the pipeline has normalized spellings and aliases.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Segment value for rows whose category has no one-hot column
+OTHER = "Other"
+
+
+def segment_keys(X: np.ndarray, feature_names: List[str], by: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Segment of every row, read from the one-hot columns.
+
+    Returns:
+        (codes, keys): codes[i] indexes keys; keys look like 'Tech' or
+        'Tech|South' (values of the `by` columns joined with '|')
+    """
+    names = [str(n) for n in feature_names]
+    n_rows = len(X)
+    codes = np.zeros(n_rows, dtype=np.int64)
+    labels_per_col = []
+    for col in by:
+        idxs = [i for i, name in enumerate(names) if name.startswith(f"{col}_")]
+        labels = [names[i][len(col) + 1:] for i in idxs] + [OTHER]
+        if idxs:
+            one_hot = np.asarray(X[:, idxs])
+            col_codes = np.where(one_hot.max(axis=1) > 0.5, one_hot.argmax(axis=1), len(idxs))
+        else:
+            col_codes = np.zeros(n_rows, dtype=np.int64)
+        codes = codes * len(labels) + col_codes
+        labels_per_col.append(labels)
+
+    unique, inverse = np.unique(codes, return_inverse=True)
+    keys = []
+    for code in unique:
+        parts = []
+        for labels in reversed(labels_per_col):
+            parts.append(labels[code % len(labels)])
+            code //= len(labels)
+        keys.append('|'.join(reversed(parts)))
+    return inverse.reshape(-1), keys
+
+
+def segment_filename(key: str) -> str:
+    """Filesystem-safe file name for a segment key"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', key) + ".pkl"
+
+
+class ModelPool:
+    """Thread-safe LRU cache of lazily loaded models, capped by bytes and count"""
+
+    def __init__(self, loader: Callable[[str], Tuple[object, int]], max_bytes: int,
+                 max_models: Optional[int] = None):
+        """
+        Args:
+            loader: key → (model, size in bytes)
+            max_bytes: total size of resident models before the least recently
+                used ones are evicted (the newest model is always kept)
+            max_models: optional cap on the number of resident models
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self._models: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Load outside the pool lock; concurrent misses on one key load it once
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+            model, size = self.loader(key)
+            with self._lock:
+                self.misses += 1
+                self._models[key] = (model, int(size))
+                self._evict()
+                self._loading.pop(key, None)
+            return model
+
+    def get_unpooled(self, key: str):
+        """
+        The model for `key` without touching the pool: the resident copy if
+        there is one (its LRU position unchanged), otherwise a one-off load
+        that is not kept. For bulk reads over every segment.
+        """
+        with self._lock:
+            if key in self._models:
+                return self._models[key][0]
+        return self.loader(key)[0]
+
+    def _evict(self):
+        while len(self._models) > 1 and (
+                self.resident_bytes() > self.max_bytes or
+                (self.max_models and len(self._models) > self.max_models)):
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'resident_models': list(self._models),
+                'resident_mb': round(self.resident_bytes() / 1e6, 2),
+                'max_mb': round(self.max_bytes / 1e6, 2),
+                'max_models': self.max_models,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def file_loader(directory: str, models: Dict[str, dict]) -> Callable[[str], Tuple[object, int]]:
+    """Loader for segment models stored as joblib files (size = file size)"""
+    import joblib
+
+    def load(key: str):
+        path = os.path.join(directory, models[key]['file'])
+        model = joblib.load(path)
+        print(f"📦 Segment model loaded: {key}")
+        return model, os.path.getsize(path)
+
+    return load
@@ -5,7 +5,7 @@ Type-safe data structures for API requests and responses.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
 # ============================================================================
@@ -13,18 +13,20 @@ from datetime import datetime
 # ============================================================================
 
 class AccountData(BaseModel):
-    """Input model for account data"""
+    """Input model for account data (also drives CSV column validation)"""
     account_id: str
     company_name: str = "Unknown"
-    amount: float
-    days_overdue: int
-    payment_history_score: float
-    shipment_volume_change_30d: float
+    amount: float = Field(..., ge=0)
+    days_overdue: int = Field(..., ge=0)
+    payment_history_score: float = Field(..., ge=0.0, le=1.0)
+    shipment_volume_change_30d: float = Field(..., ge=-1.0)
     
     # Optional fields with defaults
-    shipment_volume_30d: Optional[int] = 0
-    express_ratio: Optional[float] = 0.0
-    destination_diversity: Optional[int] = 0
+    shipment_volume_30d: Optional[int] = Field(0, ge=0)
+    express_ratio: Optional[float] = Field(0.0, ge=0.0, le=1.0)
+    destination_diversity: Optional[int] = Field(0, ge=0)
+    contact_attempts: Optional[int] = Field(0, ge=0)
+    customer_tenure_months: Optional[int] = Field(0, ge=0)
     industry: Optional[str] = "Other"
     region: Optional[str] = "Other"
     email_opened: Optional[bool] = False
@@ -32,6 +34,39 @@ class AccountData(BaseModel):
     
     class Config:
         extra = "ignore"  # Ignore extra fields
+        allow_inf_nan = False  # inf / nan are not amounts or scores
+
+class AgencyConfig(BaseModel):
+    """One debt collection agency in the assignment table"""
+    name: str
+    specialization: str = "General collections"
+    capacity: int = Field(..., ge=0, description="Maximum accounts the agency can take")
+    fee_rate: float = Field(..., ge=0.0, le=1.0, description="Share of recovered amount kept as fee")
+    success_rate: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Recovery multiplier per risk level (missing levels = 1.0)"
+    )
+
+class AssignmentRequest(BaseModel):
+    """Portfolio assignment request (all fields optional)"""
+    account_ids: Optional[List[str]] = None
+    agencies: Optional[List[AgencyConfig]] = None
+    limit: int = Field(1000, ge=0, description="Assignments returned in the response")
+
+class WhatIfRange(BaseModel):
+    """Evenly spaced values for one what-if field (stop included)"""
+    start: float
+    stop: float
+    step: float = Field(1.0, gt=0)
+    relative: bool = Field(False, description="Values are added to the account's current value")
+
+class WhatIfRequest(BaseModel):
+    """Grid of feature changes; every combination becomes one scenario"""
+    changes: Dict[str, Union[List[Any], WhatIfRange]] = Field(
+        ...,
+        description="Field → explicit values, or a range, e.g. {'contact_attempts': {'start': 1, 'stop': 3, 'relative': true}}"
+    )
+    limit: int = Field(1000, ge=0, description="Scenarios returned in the response")
 
 # ============================================================================
 # OUTPUT MODELS
@@ -0,0 +1,304 @@
+"""
+RECOV.AI - Prediction History Log
+=================================
+Append-only, columnar log of every prediction the API makes.
+
+Entries (account id, model version, feature hash, probability, risk code,
+timestamp) are buffered in memory and written as immutable segments:
+
+    <log dir>/segment_000001/account_id.npy   (sorted)
+                            timestamp.npy
+                            probability.npy
+                            risk_code.npy
+                            model_version.npy
+                            feature_hash.npy
+                            latest.npy        (last entry of every account)
+
+Each segment is sorted by (account_id, timestamp) and indexed by its id
+range and time range, so
+  * history(account)  - binary-searches only the segments whose id range
+                        covers the account
+  * as_of(timestamp)  - skips segments that start after the timestamp; a
+                        segment that ended before it only contributes its
+                        per-account latest entries (latest.npy), so only the
+                        one or two segments straddling the timestamp are
+                        read in full
+Entries are never modified; queries also see the unflushed buffer. Small
+segments (time-based flushes) are merged into one once `merge_segments` of
+them exist. The merged segment names the segments it replaces, so a crash
+between writing it and deleting them cannot duplicate history.
+"""
+
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.predictor import derive_outputs
+except ModuleNotFoundError:
+    from predictor import derive_outputs
+
+COLUMNS = ['account_id', 'timestamp', 'probability', 'risk_code', 'model_version', 'feature_hash']
+
+# Merged-away segment directories are deleted this long after the merge
+# (readers that picked up the old segment list may still be opening them)
+RETIRE_SECONDS = 60.0
+
+
+def latest_rows(account_ids: np.ndarray) -> np.ndarray:
+    """Position of the last entry of every account run in id-sorted entries"""
+    ids = np.asarray(account_ids)
+    last = np.ones(len(ids), dtype=bool)
+    if len(ids) > 1:
+        last[:-1] = ids[1:] != ids[:-1]
+    return np.flatnonzero(last)
+
+
+def feature_hashes(X: np.ndarray) -> np.ndarray:
+    """uint64 hash per feature row (identifies the exact inputs that were scored)"""
+    if X is None or len(X) == 0:
+        return np.zeros(0 if X is None else len(X), dtype=np.uint64)
+    return pd.util.hash_pandas_object(pd.DataFrame(np.asarray(X)), index=False).to_numpy()
+
+
+class PredictionLog:
+    """Buffered writer + segment-indexed reader for prediction history"""
+
+    def __init__(self, directory: Optional[str] = None, segment_rows: int = 100_000,
+                 flush_seconds: float = 30.0, merge_segments: int = 8):
+        self.directory = Path(directory) if directory else None
+        self.segment_rows = segment_rows
+        self.flush_seconds = flush_seconds
+        self.merge_segments = max(2, int(merge_segments))
+        self._lock = threading.RLock()
+        self._buffer: List[Dict[str, np.ndarray]] = []
+        self._buffer_rows = 0
+        self._buffer_started = None
+        self.segments: List[dict] = []
+        self._retired: List[tuple] = []
+        self.merges = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    # ------------------------------------------------------------------------
+    # WRITE
+    # ------------------------------------------------------------------------
+
+    def append(self, account_ids, probs, model_version: str, X: Optional[np.ndarray] = None,
+               timestamp: Optional[float] = None):
+        """Record one batch of predictions (vectorized)"""
+        n = len(account_ids)
+        if n == 0:
+            return
+        probs = np.asarray(probs, dtype=np.float32)
+        entry = {
+            'account_id': np.asarray(account_ids, dtype=str),
+            'timestamp': np.full(n, time.time() if timestamp is None else timestamp, dtype=np.float64),
+            'probability': probs,
+            'risk_code': derive_outputs(probs)['risk_code'],
+            'model_version': np.full(n, str(model_version)),
+            'feature_hash': feature_hashes(X) if X is not None else np.zeros(n, dtype=np.uint64),
+        }
+
+        with self._lock:
+            if self._buffer_started is None:
+                self._buffer_started = time.time()
+            self._buffer.append(entry)
+            self._buffer_rows += n
+
+            if self._buffer_rows >= self.segment_rows or \
+                    time.time() - self._buffer_started >= self.flush_seconds:
+                self.flush()
+
+    def flush(self):
+        """Write the buffer as a new immutable segment"""
+        with self._lock:
+            if not self._buffer:
+                return
+            data = self._sorted(self._concat(self._buffer))
+            self._buffer = []
+            self._buffer_rows = 0
+            self._buffer_started = None
+
+            self.segments.append(self._write_segment(data))
+            self._merge_small_segments()
+            self._delete_retired()
+
+    def _write_segment(self, data: Dict[str, np.ndarray], replaces: Optional[List[int]] = None) -> dict:
+        """Persist id-sorted entries as the next segment (atomic rename)"""
+        latest = latest_rows(data['account_id'])
+        segment = {
+            'id': (max(s['id'] for s in self.segments) + 1) if self.segments else 1,
+            'rows': int(len(data['account_id'])),
+            'accounts': int(len(latest)),
+            'id_min': str(data['account_id'][0]),
+            'id_max': str(data['account_id'][-1]),
+            't_min': float(data['timestamp'].min()),
+            't_max': float(data['timestamp'].max()),
+        }
+        if replaces:
+            segment['replaces'] = list(replaces)
+
+        if self.directory:
+            path = self.directory / f"segment_{segment['id']:06d}"
+            partial = path.with_suffix('.tmp')
+            partial.mkdir(parents=True, exist_ok=True)
+            for col in COLUMNS:
+                np.save(partial / f"{col}.npy", data[col])
+            np.save(partial / "latest.npy", latest)
+            with open(partial / "index.json", 'w') as f:
+                json.dump(segment, f)
+            partial.rename(path)
+            segment['path'] = str(path)
+        else:
+            segment['data'] = data
+            segment['latest'] = latest
+        return segment
+
+    def _merge_small_segments(self):
+        """Rewrite all small segments as one once there are `merge_segments` of them"""
+        small = [s for s in self.segments if s['rows'] < self.segment_rows]
+        if len(small) < self.merge_segments:
+            return
+        data = self._sorted(self._concat([self._take(self._segment_data(s), slice(None)) for s in small]))
+        merged = self._write_segment(data, replaces=[s['id'] for s in small])
+        merged_ids = set(merged['replaces'])
+        self.segments = [s for s in self.segments if s['id'] not in merged_ids] + [merged]
+        self._retired.extend((time.time(), s['path']) for s in small if 'path' in s)
+        self.merges += 1
+
+    def _delete_retired(self):
+        now = time.time()
+        keep = []
+        for retired_at, path in self._retired:
+            if now - retired_at >= RETIRE_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                keep.append((retired_at, path))
+        self._retired = keep
+
+    def _load_index(self):
+        """Rebuild the segment index from disk (only the small index files)"""
+        for path in sorted(self.directory.glob("segment_*")):
+            index_file = path / "index.json"
+            if path.is_dir() and index_file.exists() and path.suffix != '.tmp':
+                with open(index_file) as f:
+                    segment = json.load(f)
+                segment['path'] = str(path)
+                self.segments.append(segment)
+
+        # Segments already folded into a merged one (crash before they were deleted)
+        replaced = {i for s in self.segments for i in s.get('replaces', [])}
+        for segment in self.segments:
+            if segment['id'] in replaced:
+                shutil.rmtree(segment['path'], ignore_errors=True)
+        self.segments = [s for s in self.segments if s['id'] not in replaced]
+        if self.segments:
+            print(f"✅ Prediction log: {len(self.segments)} segments, "
+                  f"{sum(s['rows'] for s in self.segments):,} entries")
+
+    # ------------------------------------------------------------------------
+    # READ
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        if not parts:
+            return {
+                'account_id': np.zeros(0, dtype=str), 'timestamp': np.zeros(0), 'probability': np.zeros(0, np.float32),
+                'risk_code': np.zeros(0, np.int8), 'model_version': np.zeros(0, dtype=str),
+                'feature_hash': np.zeros(0, np.uint64),
+            }
+        return {col: np.concatenate([p[col] for p in parts]) for col in COLUMNS}
+
+    @staticmethod
+    def _sorted(data: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        order = np.lexsort((data['timestamp'], data['account_id']))
+        return {col: values[order] for col, values in data.items()}
+
+    @staticmethod
+    def _take(data: Dict[str, np.ndarray], selector) -> Dict[str, np.ndarray]:
+        return {col: np.asarray(data[col][selector]) for col in COLUMNS}
+
+    def _segment_data(self, segment: dict) -> Dict[str, np.ndarray]:
+        if 'data' in segment:
+            return segment['data']
+        path = Path(segment['path'])
+        return {col: np.load(path / f"{col}.npy", mmap_mode='r') for col in COLUMNS}
+
+    def _latest(self, segment: dict, data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Positions of the per-account latest entries of a segment"""
+        if 'latest' not in segment:
+            path = Path(segment['path']) / "latest.npy" if 'path' in segment else None
+            # Segments written before latest.npy existed: derive it once
+            segment['latest'] = np.load(path) if path and path.exists() else latest_rows(data['account_id'])
+        return segment['latest']
+
+    def history(self, account_id: str) -> Dict[str, np.ndarray]:
+        """All entries of one account, oldest first"""
+        parts = []
+        with self._lock:
+            segments = list(self.segments)
+            buffered = list(self._buffer)
+
+        for segment in segments:
+            if not (segment['id_min'] <= account_id <= segment['id_max']):
+                continue
+            data = self._segment_data(segment)
+            ids = data['account_id']
+            lo = np.searchsorted(ids, account_id, side='left')
+            hi = np.searchsorted(ids, account_id, side='right')
+            if hi > lo:
+                parts.append(self._take(data, slice(lo, hi)))
+
+        for entry in buffered:
+            mask = entry['account_id'] == account_id
+            if mask.any():
+                parts.append(self._take(entry, mask))
+
+        data = self._concat(parts)
+        order = np.argsort(data['timestamp'], kind='stable')
+        return {col: values[order] for col, values in data.items()}
+
+    def as_of(self, timestamp: float) -> Dict[str, np.ndarray]:
+        """Latest entry per account at or before `timestamp` (sorted by account id)"""
+        parts = []
+        with self._lock:
+            segments = list(self.segments)
+            buffered = list(self._buffer)
+
+        for segment in segments:
+            if segment['t_min'] > timestamp:
+                continue
+            data = self._segment_data(segment)
+            if segment['t_max'] <= timestamp:
+                parts.append(self._take(data, self._latest(segment, data)))
+            else:
+                parts.append(self._take(data, np.asarray(data['timestamp']) <= timestamp))
+
+        for entry in buffered:
+            parts.append(self._take(entry, entry['timestamp'] <= timestamp))
+
+        # Merge the per-segment candidates: last row of each account run wins
+        data = self._sorted(self._concat(parts))
+        return self._take(data, latest_rows(data['account_id']))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'segments': len(self.segments),
+                'small_segments': sum(1 for s in self.segments if s['rows'] < self.segment_rows),
+                'segment_merges': self.merges,
+                'segment_entries': int(sum(s['rows'] for s in self.segments)),
+                'buffered_entries': int(self._buffer_rows),
+                'directory': str(self.directory) if self.directory else None,
+            }
@@ -2,19 +2,94 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import threading
+import time
 import traceback
+import xgboost as xgb
 from datetime import datetime
+from typing import List, Tuple, Union
 
 # Try both import paths
 try:
     from backend.models import PredictionResponse, TopFactor, DCARecommendation
+    from backend.feature_pipeline import FeaturePipeline
+    from backend.model_pool import ModelPool, segment_keys, file_loader
+    from backend import config
 except ModuleNotFoundError:
     from models import PredictionResponse, TopFactor, DCARecommendation
+    from feature_pipeline import FeaturePipeline
+    from model_pool import ModelPool, segment_keys, file_loader
+    import config
+
+# Demo account that always returns the scripted result
+HERO_ACCOUNT_ID = "ACC0001"
+HERO_PROBABILITY = 0.9250
+
+# Risk bands (index = risk code used by the compact prediction table)
+RISK_LEVELS = ["Low", "Medium", "High", "Very High"]
+
+# DCA options (index = DCA code used by the compact prediction table)
+DCA_OPTIONS = [
+    {
+        "name": "Premium Recovery Services",
+        "specialization": "High-value accounts",
+        "reasoning": "Excellent payment history and strong business indicators"
+    },
+    {
+        "name": "Standard Recovery Partners",
+        "specialization": "General collections",
+        "reasoning": "Reliable performance across all account types"
+    },
+    {
+        "name": "Recovery Specialists Inc",
+        "specialization": "Challenging cases",
+        "reasoning": "Experienced in difficult recovery scenarios with legal support"
+    },
+]
+
+
+def derive_outputs(probs: np.ndarray) -> dict:
+    """
+    Vectorized version of the metrics in _build_result, for the compact
+    struct-of-arrays prediction table.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    expected_days = np.select(
+        [probs > 0.8, probs > 0.6, probs > 0.4],
+        [30 + (1 - probs) * 50, 45 + (1 - probs) * 60, 60 + (1 - probs) * 80],
+        90 + (1 - probs) * 90
+    ).astype(np.int16)
+    risk_code = np.select([probs > 0.8, probs > 0.6, probs > 0.4], [0, 1, 2], 3).astype(np.int8)
+    dca_code = np.select([probs > 0.8, probs > 0.6], [0, 1], 2).astype(np.int8)
+    velocity = (probs * 100 / np.maximum(expected_days, 1)).astype(np.float32)
+    return {
+        'expected_days': expected_days,
+        'risk_code': risk_code,
+        'dca_code': dca_code,
+        'recovery_velocity_score': velocity,
+    }
+
+
+def tree_contributions(model, X: np.ndarray, feature_names: List[str]) -> np.ndarray:
+    """XGBoost's exact TreeSHAP (pred_contribs) in log-odds, bias in the last column"""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    best_iteration = getattr(model, 'best_iteration', None) if hasattr(model, 'get_booster') else None
+    iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+    matrix = xgb.DMatrix(X, feature_names=[str(n) for n in feature_names])
+    return booster.predict(matrix, pred_contribs=True, iteration_range=iteration_range).astype(np.float32)
+
 
 class RecoveryPredictor:
     def __init__(self):
         self.model = None
         self.feature_names = []
+        self.pipeline = FeaturePipeline()
+        self.model_version = "1"
+        self.scoring_chunk_rows = config.SCORING_CHUNK_ROWS
+        self.drift_baseline = None
+        self.segments = None
+        self.model_pool = None
+        self._timing = threading.local()
         
         # Find model file
         possible_paths = [
@@ -52,99 +127,60 @@ class RecoveryPredictor:
                 if 'feature_names' in artifact:
                     self.feature_names = artifact['feature_names']
                     print(f"✅ Feature names loaded: {len(self.feature_names)} features")
+                
+                metadata = artifact.get('metadata') or {}
+                self.model_version = str(metadata.get('version', 1))
+                self.drift_baseline = artifact.get('drift_baseline')
+                
+                if artifact.get('segments') and config.SEGMENT_MODELS_ENABLED:
+                    self._init_segments(artifact['segments'])
             
             if self.model and hasattr(self.model, "feature_names_in_"):
                 self.feature_names = list(self.model.feature_names_in_)
                 print(f"ℹ️ Model Features Synced: {len(self.feature_names)} features")
+            
+            # Feature pipeline saved at training time (older artifacts: rebuild from names)
+            if isinstance(artifact, dict) and 'feature_pipeline' in artifact:
+                self.pipeline = FeaturePipeline.from_dict(artifact['feature_pipeline'])
+                print(f"✅ Feature pipeline loaded from artifact")
+            elif self.feature_names:
+                self.pipeline = FeaturePipeline.from_feature_names(self.feature_names)
+                print(f"ℹ️ Feature pipeline rebuilt from feature names")
 
         except Exception as e:
             print(f"❌ MODEL LOAD ERROR: {e}")
             traceback.print_exc()
 
+    def _init_segments(self, segments: dict):
+        """Per-segment models from the artifact bundle (loaded lazily into the pool)"""
+        directory = os.path.join(os.path.dirname(os.path.abspath(self.model_path)), segments['directory'])
+        self.segments = segments
+        self.model_pool = ModelPool(
+            file_loader(directory, segments['models']),
+            max_bytes=int(config.MODEL_POOL_MAX_MB * 1e6),
+            max_models=config.MODEL_POOL_MAX_MODELS or None,
+        )
+        print(f"✅ Segment models: {len(segments['models'])} by {'/'.join(segments['by'])} "
+              f"(pool {config.MODEL_POOL_MAX_MB:g} MB)")
+
     def prepare_features(self, data: dict) -> pd.DataFrame:
         """
-        Prepare features EXACTLY matching the model's 20 features.  
-        Handles industry name variations (Tech/Technology).
+        Prepare features EXACTLY matching the model's features.  
+        Handles industry name variations (Tech/Technology) via the pipeline.
         """
-        
-        # Extract base values
-        amount = float(data.get('amount', 0) or 0)
-        days_overdue = int(data.get('days_overdue', 0) or 0)
-        payment_history = float(data.get('payment_history_score', 0) or 0)
-        shipment_change = float(data.get('shipment_volume_change_30d', 0) or 0)
-        shipment_volume = int(data.get('shipment_volume_30d', 0) or 0)
-        express_ratio = float(data.get('express_ratio', 0) or 0)
-        destination_div = int(data.get('destination_diversity', 0) or 0)
-        contact_attempts = int(data.get('contact_attempts', 0) or 0)
-        customer_tenure = int(data.get('customer_tenure_months', 0) or 0)
-        
-        # Boolean features
-        email_opened = data.get('email_opened', 0)
-        if isinstance(email_opened, str):
-            email_opened = 1 if email_opened.upper() in ['TRUE', '1', 'YES'] else 0
-        else:
-            email_opened = int(bool(email_opened))
-        
-        dispute_flag = data.get('dispute_flag', 0)
-        if isinstance(dispute_flag, str):
-            dispute_flag = 1 if dispute_flag.upper() in ['TRUE', '1', 'YES'] else 0
-        else:
-            dispute_flag = int(bool(dispute_flag))
-        
-        # Categorical features - NORMALIZE industry name
-        industry_raw = str(data.get('industry', 'Other'))
-        region = str(data.get('region', 'Other'))
-        
-        # Normalize "Technology" → "Tech"
-        industry = industry_raw
-        if industry_raw == 'Technology':
-            industry = 'Tech'
-            print(f"    🔧 Industry: '{industry_raw}' → '{industry}'")
-        
-        # Create feature dictionary with ALL 20 features
-        features = {
-            # Base numerical features (11)
-            'amount_log': np.log1p(amount),
-            'days_overdue': days_overdue,
-            'payment_history_score': payment_history,
-            'shipment_volume_change_30d': shipment_change,
-            'shipment_volume_30d': shipment_volume,
-            'express_ratio': express_ratio,
-            'destination_diversity': destination_div,
-            'contact_attempts': contact_attempts,
-            'customer_tenure_months': customer_tenure,
-            'email_opened': email_opened,
-            'dispute_flag': dispute_flag,
-            
-            # Industry one-hot (5 features)
-            'industry_Construction': 1 if industry == 'Construction' else 0,
-            'industry_Medical': 1 if industry == 'Medical' else 0,
-            'industry_Retail': 1 if industry == 'Retail' else 0,
-            'industry_Tech': 1 if industry == 'Tech' else 0,
-            'industry_Textile': 1 if industry == 'Textile' else 0,
-            
-            # Region one-hot (4 features)
-            'region_East': 1 if region == 'East' else 0,
-            'region_North': 1 if region == 'North' else 0,
-            'region_South': 1 if region == 'South' else 0,
-            'region_West': 1 if region == 'West' else 0,
-        }
-        
-        # Create DataFrame
-        df = pd.DataFrame([features])
-        
-        # If model has specific feature names, ensure exact match
-        if self.feature_names:
-            missing_features = set(self.feature_names) - set(df.columns)
-            if missing_features:
-                for feat in missing_features:
-                    df[feat] = 0
-            df = df[self.feature_names]
+        df = self.pipeline.transform_frame(data)
         
         print(f"📊 Features prepared: {len(df.columns)} columns")
         
         return df
 
+    def prepare_features_batch(self, records: List[dict]) -> pd.DataFrame:
+        """
+        Vectorized version of prepare_features for many accounts at once.
+        Same pipeline, one float32 matrix for the whole batch.
+        """
+        return self.pipeline.transform_frame(records)
+
     def predict_recovery(self, data: dict) -> dict:
         account_id = str(data.get('account_id', 'Unknown'))
         company_name = str(data.get('company_name', 'Unknown Company'))
@@ -154,36 +190,11 @@ class RecoveryPredictor:
         # =========================================================
         # 🦸 HERO ACCOUNT OVERRIDE (For Demo)
         # =========================================================
-        if account_id == "ACC0001":
+        if account_id == HERO_ACCOUNT_ID:
             print("✨ HERO ACCOUNT DETECTED: Forcing Low Risk Result")
-            return {
-                "account_id": "ACC0001",
-                "company_name": company_name,
-                "recovery_probability": 0.9250,
-                "recovery_percentage": 0.9250,
-                "expected_days": 25,
-                "recovery_velocity_score": 3.7,
-                "risk_level": "Low",
-                "recommended_dca": {
-                    "name": "In-House Retention Team",
-                    "specialization": "Customer Loyalty",
-                    "reasoning": "High value customer with excellent history. Gentle nudge recommended."
-                },
-                "top_factors": [
-                    {"feature": "payment_history_score", "impact": 0.95, "direction": "positive"},
-                    {"feature": "shipment_volume_change_30d", "impact": 0.40, "direction": "positive"},
-                    {"feature": "days_overdue", "impact": 0.10, "direction": "neutral"}
-                ],
-                "prediction_timestamp": datetime.now().isoformat()
-            }
+            return self._hero_result(company_name)
         # =========================================================
         
-        # Store original values for response
-        original_amount = float(data.get('amount', 0) or 0)
-        original_days = int(data.get('days_overdue', 0) or 0)
-        original_history = float(data.get('payment_history_score', 0) or 0)
-        original_shipment = float(data.get('shipment_volume_change_30d', 0) or 0)
-        
         try:
             if not self.model:
                 raise ValueError("Model not loaded")
@@ -191,16 +202,199 @@ class RecoveryPredictor:
             # Prepare features
             X = self.prepare_features(data)
             
-            # Predict
-            prob = float(self.model.predict_proba(X)[0][1])
+            # Predict (segment model when the artifact has one for this account)
+            prob = float(self.score_features(X.to_numpy(dtype=np.float32))[0])
             print(f"✅ Prediction: {prob:.4f} ({prob*100:.1f}%)")
             
         except Exception as e:
             print(f"⚠️ CALCULATION ERROR: {e}")
             traceback.print_exc()
-            prob = original_history if original_history > 0 else 0.5
+            prob = self._fallback_probability(data)
             print(f"    Using fallback: {prob:.4f}")
 
+        return self._build_result(data, prob)
+
+    def predict_batch(self, records: List[dict]) -> List[dict]:
+        """
+        Score many accounts with ONE predict_proba call (per chunk).
+        Returns results in the same order (and format) as predict_recovery.
+        Rows that cannot be turned into a result come back as
+        {'account_id': ..., 'error': ...} instead of raising.
+        """
+        _, probs, _ = self.predict_probabilities(records)
+        results = self.results_from_probabilities(records, probs)
+        
+        print(f"✅ Batch scored: {len(records)} accounts")
+        return results
+
+    def predict_probabilities(self, data: Union[pd.DataFrame, List[dict]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compact scoring path: float32 feature matrix + float32 probabilities.
+        
+        Rows are transformed and scored `scoring_chunk_rows` at a time, so the
+        temporary per-chunk frames stay bounded no matter how big the input is.
+        
+        Returns:
+            (X, probs, failed): X has shape (n, n_features), probs shape (n,).
+            Rows of a chunk that could not be transformed or scored are
+            flagged in `failed`: they carry the rule-based fallback
+            probability and NO features (their rows of X are zeros).
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame.from_records(list(data))
+        n_rows = len(df)
+        n_features = len(self.pipeline.feature_names or [])
+        
+        X = np.zeros((n_rows, n_features), dtype=np.float32)
+        probs = np.empty(n_rows, dtype=np.float32)
+        failed = np.zeros(n_rows, dtype=bool)
+        chunk = max(1, int(self.scoring_chunk_rows))
+        model_seconds = 0.0
+        
+        for start in range(0, n_rows, chunk):
+            part = df.iloc[start:start + chunk]
+            try:
+                if not self.model:
+                    raise ValueError("Model not loaded")
+                X[start:start + chunk] = self.pipeline.transform(part)
+                started = time.perf_counter()
+                probs[start:start + chunk] = self.score_features(X[start:start + chunk])
+                model_seconds += time.perf_counter() - started
+            except Exception as e:
+                print(f"⚠️ BATCH CALCULATION ERROR: {e}")
+                traceback.print_exc()
+                X[start:start + chunk] = 0.0
+                probs[start:start + chunk] = self._fallback_probabilities(part)
+                failed[start:start + chunk] = True
+        
+        # 🦸 Hero account keeps its scripted probability
+        if n_rows and 'account_id' in df.columns:
+            probs[(df['account_id'].astype(str) == HERO_ACCOUNT_ID).to_numpy()] = HERO_PROBABILITY
+        
+        self._timing.model_seconds = model_seconds
+        return X, probs, failed
+
+    def last_model_seconds(self) -> float:
+        """Model-only time of this thread's last predict_probabilities call"""
+        return getattr(self._timing, 'model_seconds', 0.0)
+
+    def score_features(self, X: np.ndarray) -> np.ndarray:
+        """
+        Positive-class probability for an already prepared feature matrix.
+        With segment models, rows are grouped by segment and each group is
+        scored by its segment's model (global model for the rest).
+        """
+        if not self.segments:
+            return self._predict_with(self.model, X)
+        
+        probs = np.empty(len(X), dtype=np.float32)
+        for rows, model in self._segment_groups(X):
+            probs[rows] = self._predict_with(model, X[rows])
+        return probs
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Exact TreeSHAP values (log-odds) of every row, from the same model
+        that scores the row. Shape (n, n_features + 1), bias last.
+        """
+        if not self.segments:
+            return tree_contributions(self.model, X, self.pipeline.feature_names)
+        
+        phi = np.empty((len(X), len(self.pipeline.feature_names) + 1), dtype=np.float32)
+        for rows, model in self._segment_groups(X):
+            phi[rows] = tree_contributions(model, X[rows], self.pipeline.feature_names)
+        return phi
+
+    def _segment_groups(self, X: np.ndarray) -> List[Tuple[np.ndarray, object]]:
+        """(rows, model) pairs: rows of each segment model, then the global model's rows"""
+        codes, keys = segment_keys(X, self.pipeline.feature_names, self.segments['by'])
+        groups, global_rows = [], []
+        for code, key in enumerate(keys):
+            rows = np.flatnonzero(codes == code)
+            model = self.segment_model(key)
+            if model is None:
+                global_rows.append(rows)
+            else:
+                groups.append((rows, model))
+        if global_rows:
+            groups.append((np.concatenate(global_rows), self.model))
+        return groups
+
+    def segment_model(self, key: str):
+        """Model for one segment key, or None to use the global model"""
+        if not self.segments or key not in self.segments['models']:
+            return None
+        try:
+            return self.model_pool.get(key)
+        except Exception as e:
+            print(f"⚠️ Segment model '{key}' unavailable, using global model: {e}")
+            return None
+
+    def _predict_with(self, model, X: np.ndarray) -> np.ndarray:
+        frame = pd.DataFrame(X, columns=self.pipeline.feature_names, copy=False)
+        return model.predict_proba(frame)[:, 1].astype(np.float32)
+
+    def results_from_probabilities(self, records: List[dict], probs) -> List[dict]:
+        """Build the full response dicts for already scored accounts"""
+        results = []
+        for data, prob in zip(records, probs):
+            try:
+                if str(data.get('account_id', 'Unknown')) == HERO_ACCOUNT_ID:
+                    results.append(self._hero_result(str(data.get('company_name', 'Unknown Company'))))
+                else:
+                    results.append(self._build_result(data, float(prob)))
+            except Exception as e:
+                # One malformed row must not sink the whole batch
+                results.append({
+                    "account_id": str(data.get('account_id', 'Unknown')),
+                    "error": str(e)
+                })
+        return results
+
+    def _fallback_probabilities(self, df: pd.DataFrame) -> np.ndarray:
+        """Vectorized _fallback_probability"""
+        if 'payment_history_score' not in df.columns:
+            return np.full(len(df), 0.5, dtype=np.float32)
+        history = pd.to_numeric(df['payment_history_score'], errors='coerce').fillna(0).to_numpy(dtype=np.float32)
+        return np.where(history > 0, history, 0.5).astype(np.float32)
+
+    def _fallback_probability(self, data: dict) -> float:
+        """Rule-based probability used when the model cannot score"""
+        original_history = float(data.get('payment_history_score', 0) or 0)
+        return original_history if original_history > 0 else 0.5
+
+    def _hero_result(self, company_name: str) -> dict:
+        """Fixed demo result for the hero account"""
+        return {
+            "account_id": HERO_ACCOUNT_ID,
+            "company_name": company_name,
+            "recovery_probability": HERO_PROBABILITY,
+            "recovery_percentage": HERO_PROBABILITY,
+            "expected_days": 25,
+            "recovery_velocity_score": 3.7,
+            "risk_level": "Low",
+            "recommended_dca": {
+                "name": "In-House Retention Team",
+                "specialization": "Customer Loyalty",
+                "reasoning": "High value customer with excellent history. Gentle nudge recommended."
+            },
+            "top_factors": [
+                {"feature": "payment_history_score", "impact": 0.95, "direction": "positive"},
+                {"feature": "shipment_volume_change_30d", "impact": 0.40, "direction": "positive"},
+                {"feature": "days_overdue", "impact": 0.10, "direction": "neutral"}
+            ],
+            "prediction_timestamp": datetime.now().isoformat()
+        }
+
+    def _build_result(self, data: dict, prob: float) -> dict:
+        """Turn a raw probability into the full prediction response"""
+        account_id = str(data.get('account_id', 'Unknown'))
+        company_name = str(data.get('company_name', 'Unknown Company'))
+        
+        # Store original values for response
+        original_days = int(data.get('days_overdue', 0) or 0)
+        original_history = float(data.get('payment_history_score', 0) or 0)
+        original_shipment = float(data.get('shipment_volume_change_30d', 0) or 0)
+
         # Calculate metrics
         recovery_percentage = float(prob)
         
@@ -217,33 +411,21 @@ class RecoveryPredictor:
         
         # Risk level
         if prob > 0.8:
-            risk_level = "Low"
+            risk_level = RISK_LEVELS[0]
         elif prob > 0.6:
-            risk_level = "Medium"
+            risk_level = RISK_LEVELS[1]
         elif prob > 0.4:
-            risk_level = "High"
+            risk_level = RISK_LEVELS[2]
         else:
-            risk_level = "Very High"
+            risk_level = RISK_LEVELS[3]
         
         # DCA recommendation
         if prob > 0.8:
-            dca = {
-                "name": "Premium Recovery Services",
-                "specialization": "High-value accounts",
-                "reasoning": "Excellent payment history and strong business indicators"
-            }
+            dca = dict(DCA_OPTIONS[0])
         elif prob > 0.6:
-            dca = {
-                "name": "Standard Recovery Partners",
-                "specialization": "General collections",
-                "reasoning": "Reliable performance across all account types"
-            }
+            dca = dict(DCA_OPTIONS[1])
         else:
-            dca = {
-                "name": "Recovery Specialists Inc",
-                "specialization": "Challenging cases",
-                "reasoning": "Experienced in difficult recovery scenarios with legal support"
-            }
+            dca = dict(DCA_OPTIONS[2])
         
         # Top factors
         factors = []
@@ -0,0 +1,254 @@
+"""
+RECOV.AI - Per-Request Profiling
+================================
+Opt-in profiling of individual requests, for finding out where a slow
+upload spent its time (read_csv, prepare_features, predict_proba, JSON
+encoding, ...).
+
+A request is profiled when
+  * it carries the admin header  X-Recov-Profile: <token>
+  * or the query flag            ?profile=<token>
+  * or it falls in the random sample (PROFILING_SAMPLE_RATE)
+Without a configured token the header and query triggers are refused;
+only sampling is active.
+
+The profiler is a sampling one: a background thread snapshots the stacks
+of every busy thread (sys._current_frames) every few milliseconds. Sync
+endpoints run on threadpool threads, which a per-thread deterministic
+profiler (cProfile) would not see. Idle threads (waiting on a lock, queue
+or selector) are skipped.
+
+For each profiled request the directory gets
+    <request id>.collapsed   folded stacks ("a;b;c <count>") for
+                             flamegraph.pl / speedscope.app
+    <request id>.svg         a self-contained flame graph
+and one line in index.jsonl. The id is returned in the X-Profile-Id header;
+it always ends in a server-generated suffix, so callers cannot overwrite
+other profiles. Only the newest `max_profiles` profiles are kept.
+
+Only one request is profiled at a time; other triggered requests in the
+meantime run unprofiled. With profiling disabled the middleware is not
+installed at all.
+"""
+
+import hmac
+import html
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+PROFILE_HEADER = "X-Recov-Profile"
+PROFILE_QUERY = "profile"
+
+# Leaf frames of a thread that is waiting, not working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+}
+
+
+# ============================================================================
+# SAMPLER
+# ============================================================================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts folded stacks of all busy threads until stopped"""
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="recovai-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def write_collapsed(stacks: Counter, path: Path):
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def render_flamegraph(stacks: Counter, title: str, width: int = 1200) -> str:
+    """Self-contained SVG flame graph (root at the bottom) from folded stacks"""
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += count
+
+    def depth(node) -> int:
+        return 1 + max((depth(child) for child in node['children'].values()), default=0)
+
+    row, top = 16, 30
+    height = top + depth(root) * row + 10
+    total = max(root['value'], 1)
+    rects = []
+
+    def draw(node, x: float, level: int):
+        w = node['value'] / total * (width - 20)
+        if w < 0.5:
+            return
+        y = height - 10 - (level + 1) * row
+        hue = zlib.crc32(node['name'].encode()) % 50
+        label = html.escape(node['name'])
+        share = node['value'] / total * 100
+        text = label if len(node['name']) * 7 < w else (label[:int(w / 7) - 2] + '..' if w > 35 else '')
+        rects.append(
+            f'<g><title>{label} ({node["value"]} samples, {share:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" rx="2" '
+            f'fill="hsl({hue},85%,{55 + hue % 10}%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + 12}" font-size="11" font-family="monospace">{text}</text></g>'
+        )
+        child_x = x
+        for child in sorted(node['children'].values(), key=lambda c: c['name']):
+            draw(child, child_x, level + 1)
+            child_x += child['value'] / total * (width - 20)
+
+    draw(root, 10, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" style="background:#fff">'
+        f'<text x="10" y="20" font-size="14" font-family="sans-serif">{html.escape(title)}</text>'
+        + ''.join(rects) + '</svg>'
+    )
+
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their flame graphs"""
+
+    def __init__(self, directory: str, token: str = "", sample_rate: float = 0.0, interval_ms: float = 5.0,
+                 max_profiles: int = 200):
+        self.directory = Path(directory)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.max_profiles = max(1, int(max_profiles))
+        self._busy = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def trigger(self, headers, query_params) -> Optional[str]:
+        """Why this request should be profiled ('header' / 'query' / 'sample'), or None"""
+        requested = headers.get(PROFILE_HEADER)
+        if requested is not None and self._authorized(requested):
+            return "header"
+        requested = query_params.get(PROFILE_QUERY)
+        if requested is not None and self._authorized(requested):
+            return "query"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def _authorized(self, value: str) -> bool:
+        # No token configured = no caller-triggered profiling
+        return bool(self.token) and hmac.compare_digest(value.encode(), self.token.encode())
+
+    def begin(self) -> Optional[StackSampler]:
+        """Start a sampler, or None if another request is being profiled"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = StackSampler(self.interval_ms)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, request_id: str, info: dict) -> dict:
+        """Stop sampling and write <id>.collapsed, <id>.svg and the index entry"""
+        try:
+            stacks = sampler.stop()
+        finally:
+            self._busy.release()
+
+        entry = {'request_id': request_id, **info, 'samples': sampler.samples,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        write_collapsed(stacks, self.directory / f"{request_id}.collapsed")
+        title = f"{info.get('method', '')} {info.get('path', '')} - {info.get('duration_ms', 0):.0f} ms"
+        with open(self.directory / f"{request_id}.svg", 'w') as f:
+            f.write(render_flamegraph(stacks, title))
+        with open(self.directory / "index.jsonl", 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        self._prune()
+        return entry
+
+    def _prune(self):
+        """Delete all but the newest `max_profiles` profiles (and their index lines)"""
+        profiles = sorted(self.directory.glob("*.svg"), key=lambda path: path.stat().st_mtime)
+        for path in profiles[:-self.max_profiles]:
+            path.unlink(missing_ok=True)
+            path.with_suffix('.collapsed').unlink(missing_ok=True)
+
+        index = self.directory / "index.jsonl"
+        with open(index) as f:
+            lines = f.readlines()
+        if len(lines) > self.max_profiles:
+            partial = index.with_suffix('.tmp')
+            with open(partial, 'w') as f:
+                f.writelines(lines[-self.max_profiles:])
+            partial.replace(index)
+
+    def recent(self, limit: int = 50) -> list:
+        index = self.directory / "index.jsonl"
+        if not index.exists():
+            return []
+        with open(index) as f:
+            lines = f.readlines()[-limit:]
+        return [json.loads(line) for line in reversed(lines)]
+
+    @staticmethod
+    def request_id(headers) -> str:
+        """Fresh id, prefixed with the caller's X-Request-ID if filename-safe"""
+        suffix = uuid.uuid4().hex[:16]
+        given = headers.get("X-Request-ID", "")
+        if given and len(given) <= 64 and all(c.isalnum() or c in '-_' for c in given):
+            return f"{given}-{suffix}"
+        return suffix
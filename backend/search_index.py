@@ -0,0 +1,329 @@
+"""
+RECOV.AI - Company Name Search Index
+====================================
+Type-ahead search over the company names of all stored accounts, without
+scanning the book on every keystroke.
+
+Names are normalized (case-folded, accents and punctuation removed, spaces
+collapsed: "Tëch-Corp  Ltd." → "tech corp ltd") and indexed three ways:
+
+  * name index    - sorted array of all names; a binary search finds every
+                    name starting with the query, alphabetically
+  * word index    - sorted array of the later word starts of every name
+                    (entries packed as row << 8 | offset into the name), so
+                    "corp" finds "Tech Corp Ltd"
+  * trigram index - trigram → rows containing it (compact int32 arrays).
+                    Queries of 3+ characters also match inside words: the
+                    rows of the query's rarest trigrams are intersected and
+                    verified with a plain substring test.
+
+Ranking: name starts with the query, then a later word does, then it
+occurs elsewhere; ties go alphabetically (prefix tiers) or to the earliest
+and shortest match (substring tier).
+
+All indexes are maintained incrementally by a background worker from the
+store rows that were just written: unchanged names are skipped, renamed
+accounts lose their old entries, and new entries are inserted into the
+sorted arrays (small batches) or merged by one run-aware sort (large
+batches). Trigrams are extracted for a whole batch at once with NumPy.
+"""
+
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Word starts past this offset are not indexed (offset must fit in 8 bits)
+MAX_OFFSET = 255
+
+# Separator between names when a batch is scanned as one code point array
+_SEPARATOR = 0
+_SPACE = ord(' ')
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_name(name) -> str:
+    """Case-folded name without accents and punctuation, single spaces"""
+    text = str(name or '')
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', text.casefold()).strip()
+
+
+def word_starts(name: str) -> List[int]:
+    return [m.start() for m in re.finditer(r'\S+', name) if m.start() <= MAX_OFFSET]
+
+
+def trigram_ids(codepoints: np.ndarray) -> np.ndarray:
+    """Trigram at every position as one int64 (3 × 21-bit code points)"""
+    c = codepoints.astype(np.int64)
+    return (c[:-2] << 42) | (c[1:-1] << 21) | c[2:]
+
+
+def scan_names(rows: List[int], names: List[str]) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+    """
+    Word-start codes and trigram postings of a batch of normalized names,
+    from one code point array of all names (no per-character Python loops).
+    """
+    lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+    cps = np.frombuffer(chr(_SEPARATOR).join(names).encode('utf-32-le'), dtype=np.uint32)
+    name_start = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+    row_at = np.repeat(np.asarray(rows, dtype=np.int64), lengths + 1)[:len(cps)]
+    offset = np.arange(len(cps)) - np.repeat(name_start, lengths + 1)[:len(cps)]
+
+    # Word starts after the first (offset 0 lives in the name index)
+    is_char = (cps != _SEPARATOR) & (cps != _SPACE)
+    starts = np.flatnonzero(is_char[1:] & (cps[:-1] == _SPACE)) + 1
+    starts = starts[offset[starts] <= MAX_OFFSET]
+    word_codes = row_at[starts] << 8 | offset[starts]
+
+    postings = {}
+    if len(cps) >= 3:
+        ids = trigram_ids(cps)
+        valid = (cps[:-2] != _SEPARATOR) & (cps[1:-1] != _SEPARATOR) & (cps[2:] != _SEPARATOR)
+        ids, owners = ids[valid], row_at[:-2][valid]
+        order = np.lexsort((owners, ids))
+        ids, owners = ids[order], owners[order]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = (ids[1:] != ids[:-1]) | (owners[1:] != owners[:-1])
+        ids, owners = ids[keep], owners[keep]
+        bounds = np.flatnonzero(np.diff(ids)) + 1
+        for gram, group in zip(ids[np.concatenate([[0], bounds])].tolist(), np.split(owners, bounds)):
+            postings[gram] = group.astype(np.int32)
+    return word_codes, postings
+
+
+class SearchIndex:
+    """Incrementally maintained name / word / trigram index over company names"""
+
+    def __init__(self, names: Callable[[np.ndarray], np.ndarray], chunk_rows: int = 1_000_000,
+                 max_scan: int = 20_000, max_verify: int = 2_000):
+        """
+        Args:
+            names: store rows → their current company names
+            chunk_rows: rows indexed per worker batch
+            max_scan: prefix entries scanned per query
+            max_verify: substring candidates verified per query
+        """
+        self.names = names
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.max_scan = max_scan
+        self.max_verify = max_verify
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._dirty = np.zeros(0, dtype=bool)
+        self._busy = False
+        self._worker = None
+        self.errors = 0
+
+        self._names: List[Optional[str]] = []
+        self._starts = np.zeros(0, dtype=np.int64)     # rows, sorted by name
+        self._words = np.zeros(0, dtype=np.int64)      # row << 8 | offset, sorted by name[offset:]
+        self._trigrams: Dict[int, array] = {}
+
+    def _name_key(self, row) -> str:
+        return self._names[row]
+
+    def _word_key(self, code) -> str:
+        return self._names[code >> 8][code & 0xFF:]
+
+    # ------------------------------------------------------------------------
+    # MARK (response path: only flags rows)
+    # ------------------------------------------------------------------------
+
+    def mark(self, rows: np.ndarray):
+        """Flag freshly written store rows for (re)indexing"""
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return
+        with self._cond:
+            if rows.max() >= len(self._dirty):
+                grown = np.zeros(max(int(rows.max()) + 1, 2 * len(self._dirty)), dtype=bool)
+                grown[:len(self._dirty)] = self._dirty
+                self._dirty = grown
+            self._dirty[rows] = True
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="recovai-search-index", daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return int(self._dirty.sum())
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every flagged row is indexed (False on timeout)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy and not self._dirty.any(), timeout)
+
+    # ------------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty.any())
+                rows = np.flatnonzero(self._dirty)[:self.chunk_rows]
+                self._dirty[rows] = False
+                self._busy = True
+            try:
+                self.update(rows, self.names(rows))
+            except Exception as e:
+                print(f"⚠️ Search index update failed: {e}")
+                self.errors += 1
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def update(self, rows: np.ndarray, names) -> int:
+        """Index the current names of `rows`; returns how many changed"""
+        changed_rows, changed_names = [], []
+        known = len(self._names)
+        for row, name in zip(np.asarray(rows).tolist(), names):
+            normalized = normalize_name(name)
+            if row >= known or self._names[row] != normalized:
+                changed_rows.append(row)
+                changed_names.append(normalized)
+        if not changed_rows:
+            return 0
+        word_codes, postings = scan_names(changed_rows, changed_names)
+
+        with self._lock:
+            # Renamed accounts: find their old entries while the old name is still in place
+            stale_starts, stale_words = [], []
+            for row in changed_rows:
+                old = self._names[row] if row < known else None
+                if old is None:
+                    continue
+                stale_starts.append(self._find(self._starts, row, old, self._name_key))
+                for offset in word_starts(old)[1:]:
+                    stale_words.append(self._find(self._words, row << 8 | offset, old[offset:], self._word_key))
+            starts = np.delete(self._starts, [p for p in stale_starts if p is not None])
+            words = np.delete(self._words, [p for p in stale_words if p is not None])
+
+            if max(changed_rows) >= known:
+                self._names.extend([None] * (max(changed_rows) + 1 - known))
+            for row, name in zip(changed_rows, changed_names):
+                self._names[row] = name
+            self._starts, self._words = starts, words
+
+            # Trigram postings are append-only; stale rows fail verification
+            for gram, owners in postings.items():
+                posting = self._trigrams.get(gram)
+                if posting is None:
+                    posting = self._trigrams[gram] = array('i')
+                posting.frombytes(owners.tobytes())
+
+        # Only this thread changes the sorted arrays, so they are merged outside the lock
+        starts = self._merge(starts, np.asarray(changed_rows, dtype=np.int64), self._name_key)
+        words = self._merge(words, word_codes, self._word_key)
+        with self._lock:
+            self._starts, self._words = starts, words
+        return len(changed_rows)
+
+    @staticmethod
+    def _find(sorted_codes: np.ndarray, code: int, key: str, key_of) -> Optional[int]:
+        position = bisect_left(sorted_codes, key, key=key_of)
+        while position < len(sorted_codes) and key_of(sorted_codes[position]) == key:
+            if sorted_codes[position] == code:
+                return position
+            position += 1
+        return None
+
+    @staticmethod
+    def _merge(sorted_codes: np.ndarray, new_codes: np.ndarray, key_of) -> np.ndarray:
+        """Insert new codes into a sorted array (bisect for few, run-aware sort for many)"""
+        if len(new_codes) == 0:
+            return sorted_codes
+        new_codes = sorted(new_codes.tolist(), key=key_of)
+        if len(new_codes) * 20 < len(sorted_codes):
+            positions = [bisect_left(sorted_codes, key_of(code), key=key_of) for code in new_codes]
+            return np.insert(sorted_codes, positions, new_codes)
+        # Two sorted runs: timsort merges them in linear time
+        return np.array(sorted(sorted_codes.tolist() + new_codes, key=key_of), dtype=np.int64)
+
+    # ------------------------------------------------------------------------
+    # QUERY
+    # ------------------------------------------------------------------------
+
+    def _scan(self, sorted_codes: np.ndarray, q: str, key_of, limit: int, seen: set) -> Tuple[List[int], bool]:
+        """Rows of the first `limit` entries whose key starts with q"""
+        found = []
+        position = bisect_left(sorted_codes, q, key=key_of)
+        end = min(len(sorted_codes), position + self.max_scan)
+        while position < end and len(found) < limit:
+            code = int(sorted_codes[position])
+            if not key_of(code).startswith(q):
+                return found, False
+            row = code >> 8 if key_of == self._word_key else code
+            if row not in seen:
+                seen.add(row)
+                found.append(row)
+            position += 1
+        return found, len(found) < limit and position < len(sorted_codes) and position == end
+
+    def search(self, query: str, limit: int = 10) -> dict:
+        """
+        Ranked matches for `query`.
+
+        Returns:
+            {'query': normalized query, 'rows': [...], 'match': [...],
+             'truncated': bool} with match in 'prefix' / 'word' / 'substring'
+        """
+        q = normalize_name(query)
+        result = {'query': q, 'rows': [], 'match': [], 'truncated': False}
+        if not q:
+            return result
+
+        with self._lock:
+            seen = set()
+            starts, cut_starts = self._scan(self._starts, q, self._name_key, limit, seen)
+            words, cut_words = self._scan(self._words, q, self._word_key, limit - len(starts), seen)
+            truncated = cut_starts or cut_words
+
+            inside = []
+            if len(starts) + len(words) < limit and len(q) >= 3:
+                grams = np.unique(trigram_ids(np.frombuffer(q.encode('utf-32-le'), dtype=np.uint32)))
+                postings = sorted((np.frombuffer(self._trigrams.get(g, array('i')), dtype=np.int32)
+                                   for g in grams.tolist()), key=len)
+                candidates = postings[0]
+                for posting in postings[1:]:
+                    if len(candidates) <= self.max_verify:
+                        break
+                    present = np.zeros(len(self._names), dtype=bool)
+                    present[posting] = True
+                    candidates = candidates[present[candidates]]
+                if len(candidates) > self.max_verify:
+                    candidates = candidates[:self.max_verify]
+                    truncated = True
+                for row in candidates.tolist():
+                    name = self._names[row]
+                    if row not in seen and name is not None and q in name:
+                        seen.add(row)
+                        inside.append((name.find(q), len(name), name, row))
+                inside = [item[3] for item in sorted(inside)[:limit - len(starts) - len(words)]]
+
+        result['rows'] = starts + words + inside
+        result['match'] = ['prefix'] * len(starts) + ['word'] * len(words) + ['substring'] * len(inside)
+        result['truncated'] = truncated
+        return result
+
+    def get_stats(self) -> dict:
+        pending = self.pending()
+        with self._lock:
+            return {
+                'indexed_names': len(self._starts),
+                'word_entries': len(self._words),
+                'trigrams': len(self._trigrams),
+                'trigram_postings': sum(len(p) for p in self._trigrams.values()),
+                'pending_rows': pending,
+                'errors': self.errors,
+            }
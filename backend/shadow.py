@@ -0,0 +1,239 @@
+"""
+RECOV.AI - Shadow Model Scoring
+===============================
+Runs a candidate model on live traffic next to the serving model, without
+affecting responses.
+
+Every scored batch hands its already prepared feature matrix and the live
+probabilities to a background worker thread, which scores the same matrix
+with the candidate model. Nothing in the response path waits for it: if the
+worker falls behind, batches are dropped (and counted) instead of queueing
+without limit.
+
+Recorded:
+  * aggregates    - rows compared, mean / max |difference|, correlation,
+                    risk-level and DCA agreement, risk confusion matrix
+  * per account   - latest live vs candidate probability (bounded LRU)
+  * latency       - live model vs candidate model time per row, on the
+                    same matrices (features are prepared once, so the
+                    candidate only adds model time)
+
+The candidate must use the same feature layout as the live model.
+"""
+
+import heapq
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.predictor import RISK_LEVELS, HERO_ACCOUNT_ID, derive_outputs
+except ModuleNotFoundError:
+    from predictor import RISK_LEVELS, HERO_ACCOUNT_ID, derive_outputs
+
+# Upper edges of the |live - candidate| histogram
+DIFF_EDGES = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5]
+
+
+def load_candidate(path: str, feature_names) -> tuple:
+    """(classifier, version) from a model artifact; the feature layout must match"""
+    artifact = joblib.load(path)
+    if isinstance(artifact, dict):
+        model = artifact['models']['classifier']
+        names = (artifact.get('feature_pipeline') or {}).get('feature_names') or artifact.get('feature_names')
+        version = str((artifact.get('metadata') or {}).get('version', path))
+    else:
+        model, names, version = artifact, None, path
+    if names is None and hasattr(model, 'feature_names_in_'):
+        names = list(model.feature_names_in_)
+    if names is not None and list(names) != list(feature_names):
+        raise ValueError("candidate model uses a different feature layout than the live model")
+    return model, version
+
+
+class ShadowScorer:
+    """Background comparison of a candidate model against the live one"""
+
+    def __init__(self, model, feature_names, version: str = "candidate", queue_limit: int = 64,
+                 max_accounts: int = 100_000, top_differences: int = 20):
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.version = version
+        self.max_accounts = max_accounts
+        self.top_differences = top_differences
+
+        self._queue = queue.Queue(maxsize=queue_limit)
+        self._lock = threading.Lock()
+        self._worker = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rows = 0
+            self.batches = 0
+            self.dropped_rows = 0
+            self.errors = 0
+            self.sum_abs_diff = 0.0
+            self.max_abs_diff = 0.0
+            self.sums = np.zeros(5)          # live, candidate, live², candidate², live·candidate
+            self.diff_bins = np.zeros(len(DIFF_EDGES) + 1, dtype=np.int64)
+            self.risk_confusion = np.zeros((len(RISK_LEVELS), len(RISK_LEVELS)), dtype=np.int64)
+            self.dca_agree = 0
+            self.live_model_seconds = 0.0
+            self.candidate_seconds = 0.0
+            self.accounts: "OrderedDict[str, tuple]" = OrderedDict()
+            self._largest = []               # min-heap of (|diff|, account_id, live, candidate)
+
+    # ------------------------------------------------------------------------
+    # SUBMIT (response path: never blocks)
+    # ------------------------------------------------------------------------
+
+    def submit(self, account_ids, X: np.ndarray, live_probs: np.ndarray, live_model_seconds: float):
+        """Queue one scored batch for comparison; drops it if the worker is behind"""
+        if len(X) == 0:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((np.asarray(account_ids, dtype=str), X, np.asarray(live_probs), live_model_seconds))
+        except queue.Full:
+            with self._lock:
+                self.dropped_rows += len(X)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="recovai-shadow", daemon=True)
+                    self._worker.start()
+
+    def wait_idle(self):
+        """Block until every queued batch has been compared"""
+        self._queue.join()
+
+    # ------------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                self._compare(*batch)
+            except Exception as e:
+                print(f"⚠️ Shadow scoring failed: {e}")
+                with self._lock:
+                    self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def _compare(self, account_ids: np.ndarray, X: np.ndarray, live: np.ndarray, live_model_seconds: float):
+        started = time.perf_counter()
+        frame = pd.DataFrame(X, columns=self.feature_names, copy=False)
+        candidate = self.model.predict_proba(frame)[:, 1].astype(np.float32)
+        candidate_seconds = time.perf_counter() - started
+
+        # The scripted demo account is not a model output
+        keep = account_ids != HERO_ACCOUNT_ID
+        ids, live, candidate = account_ids[keep], live[keep].astype(np.float64), candidate[keep].astype(np.float64)
+        diff = np.abs(live - candidate)
+        live_out, cand_out = derive_outputs(live), derive_outputs(candidate)
+
+        confusion = np.zeros_like(self.risk_confusion)
+        np.add.at(confusion, (live_out['risk_code'], cand_out['risk_code']), 1)
+        bins = np.bincount(np.searchsorted(DIFF_EDGES, diff, side='right'), minlength=len(DIFF_EDGES) + 1)
+
+        with self._lock:
+            self.batches += 1
+            self.rows += len(ids)
+            self.sum_abs_diff += float(diff.sum())
+            if len(diff):
+                self.max_abs_diff = max(self.max_abs_diff, float(diff.max()))
+            self.sums += [live.sum(), candidate.sum(), (live ** 2).sum(), (candidate ** 2).sum(),
+                          (live * candidate).sum()]
+            self.diff_bins += bins
+            self.risk_confusion += confusion
+            self.dca_agree += int((live_out['dca_code'] == cand_out['dca_code']).sum())
+            self.live_model_seconds += live_model_seconds
+            self.candidate_seconds += candidate_seconds
+
+            for account_id, l, c in zip(ids.tolist(), live.tolist(), candidate.tolist()):
+                self.accounts[account_id] = (l, c)
+                self.accounts.move_to_end(account_id)
+            while len(self.accounts) > self.max_accounts:
+                self.accounts.popitem(last=False)
+
+            if len(diff):
+                top = np.argsort(diff)[-self.top_differences:]
+                for i in top:
+                    item = (float(diff[i]), str(ids[i]), float(live[i]), float(candidate[i]))
+                    if len(self._largest) < self.top_differences:
+                        heapq.heappush(self._largest, item)
+                    elif item > self._largest[0]:
+                        heapq.heapreplace(self._largest, item)
+
+    # ------------------------------------------------------------------------
+    # REPORT
+    # ------------------------------------------------------------------------
+
+    def account(self, account_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self.accounts.get(account_id)
+        if entry is None:
+            return None
+        live, candidate = entry
+        return {'account_id': account_id, 'live_probability': round(live, 4),
+                'candidate_probability': round(candidate, 4), 'difference': round(candidate - live, 4)}
+
+    def report(self) -> dict:
+        with self._lock:
+            n = self.rows
+            s_l, s_c, s_ll, s_cc, s_lc = self.sums
+            cov = s_lc - s_l * s_c / n if n else 0.0
+            var_l = s_ll - s_l ** 2 / n if n else 0.0
+            var_c = s_cc - s_c ** 2 / n if n else 0.0
+            correlation = cov / np.sqrt(var_l * var_c) if var_l > 0 and var_c > 0 else None
+            labels = [f"≤{e}" for e in DIFF_EDGES] + [f">{DIFF_EDGES[-1]}"]
+            largest, seen = [], set()
+            for item in sorted(self._largest, reverse=True):
+                if item[1] not in seen:
+                    seen.add(item[1])
+                    largest.append(item)
+
+            return {
+                'candidate_version': self.version,
+                'rows_compared': int(n),
+                'batches': int(self.batches),
+                'dropped_rows': int(self.dropped_rows),
+                'pending_batches': self._queue.qsize(),
+                'errors': int(self.errors),
+                'mean_abs_difference': round(self.sum_abs_diff / n, 6) if n else None,
+                'max_abs_difference': round(self.max_abs_diff, 6) if n else None,
+                'mean_live_probability': round(s_l / n, 6) if n else None,
+                'mean_candidate_probability': round(s_c / n, 6) if n else None,
+                'correlation': round(float(correlation), 6) if correlation is not None else None,
+                'risk_level_agreement': round(float(np.trace(self.risk_confusion)) / n, 6) if n else None,
+                'dca_agreement': round(self.dca_agree / n, 6) if n else None,
+                'abs_difference_histogram': dict(zip(labels, self.diff_bins.tolist())),
+                'risk_confusion': {
+                    'rows_live_columns_candidate': RISK_LEVELS,
+                    'matrix': self.risk_confusion.tolist(),
+                },
+                'latency': {
+                    'live_model_us_per_row': round(self.live_model_seconds / n * 1e6, 3) if n else None,
+                    'candidate_model_us_per_row': round(self.candidate_seconds / n * 1e6, 3) if n else None,
+                    'overhead_ratio': round(self.candidate_seconds / self.live_model_seconds, 3)
+                    if self.live_model_seconds > 0 else None,
+                },
+                'largest_differences': [
+                    {'account_id': account_id, 'live_probability': round(l, 4),
+                     'candidate_probability': round(c, 4), 'abs_difference': round(d, 4)}
+                    for d, account_id, l, c in largest
+                ],
+            }
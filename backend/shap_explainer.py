@@ -3,11 +3,18 @@ RECOV. AI - SHAP Explainability Engine
 =====================================
 Provides SHAP-based explanations for XGBoost model predictions. 
 Falls back gracefully if SHAP is unavailable.
+
+Training scripts store the explainer's static state in the artifact
+('explainer_state', see build_explainer_state): flattened tree arrays in
+SHAP's own tree format, the expected value and a background sample. The
+engine builds its TreeExplainer from those arrays instead of re-parsing
+the booster, and never recomputes the expected value.
 """
 
+import json
+import joblib
 import pandas as pd
 import numpy as np
-import pickle
 from pathlib import Path
 
 # Try to import SHAP (optional dependency)
@@ -18,6 +25,107 @@ except ImportError:
     SHAP_AVAILABLE = False
     print("⚠️ SHAP not installed. Using fallback explanations.")
 
+EXPLAINER_STATE_VERSION = 1
+
+
+# ============================================================================
+# PRECOMPUTED EXPLAINER STATE (built at training time)
+# ============================================================================
+
+def _parse_base_score(value) -> float:
+    """base_score is '5E-1' (XGBoost 2.x) or '[5E-1]' (3.x) in the JSON model"""
+    if isinstance(value, str):
+        value = value.strip('[]').split(',')[0]
+    return float(value)
+
+
+def build_explainer_state(model, X_background=None, background_rows: int = 100, seed: int = 42) -> dict:
+    """
+    Static TreeExplainer state for an XGBoost binary classifier.
+    
+    Args:
+        model: XGBClassifier (or Booster) to explain
+        X_background: training feature matrix to sample the background from
+        background_rows: rows kept in the background summary
+    
+    Returns:
+        dict stored as artifact['explainer_state']; needs no SHAP install
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(bytes(booster.save_raw(raw_format='json')))['learner']
+    
+    if learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError(f"Unsupported booster: {learner['gradient_booster']['name']}")
+    objective = learner['objective']['name']
+    base_score = _parse_base_score(learner['learner_model_param']['base_score'])
+    if objective == 'binary:logistic':
+        base_offset, tree_output = float(np.log(base_score / (1 - base_score))), 'log_odds'
+    else:
+        base_offset, tree_output = base_score, 'raw_value'
+    
+    # Early-stopped models predict with the best iteration only
+    n_trees = booster.num_boosted_rounds()
+    best_iteration = getattr(model, 'best_iteration', None) if hasattr(model, 'get_booster') else None
+    if best_iteration is not None:
+        n_trees = int(best_iteration) + 1
+    
+    trees = []
+    expected_value = base_offset
+    for tree in learner['gradient_booster']['model']['trees'][:n_trees]:
+        left = np.asarray(tree['left_children'], dtype=np.int32)
+        right = np.asarray(tree['right_children'], dtype=np.int32)
+        is_leaf = left == -1
+        split = np.asarray(tree['split_conditions'], dtype=np.float32)
+        cover = np.asarray(tree['sum_hessian'], dtype=np.float64)
+        leaf_value = np.where(is_leaf, split, 0.0).astype(np.float64)
+        
+        trees.append({
+            'children_left': left,
+            'children_right': right,
+            'children_default': np.where(np.asarray(tree['default_left'], dtype=np.uint8) == 1, left, right).astype(np.int32),
+            'features': np.asarray(tree['split_indices'], dtype=np.int32),
+            # XGBoost splits on x < t, SHAP on x <= t
+            'thresholds': np.where(is_leaf, 0.0, np.nextafter(split, -np.float32(np.inf))).astype(np.float64),
+            'values': leaf_value.reshape(-1, 1),
+            'node_sample_weight': cover,
+        })
+        # Tree-path-dependent expectation: leaves weighted by their share of the cover
+        expected_value += float((leaf_value[is_leaf] * cover[is_leaf]).sum() / cover[0])
+    
+    state = {
+        'version': EXPLAINER_STATE_VERSION,
+        'objective': 'binary_crossentropy' if objective == 'binary:logistic' else None,
+        'tree_output': tree_output,
+        'base_offset': base_offset,
+        'expected_value': expected_value,
+        'n_trees': n_trees,
+        'n_features': int(booster.num_features()),
+        'trees': trees,
+        'background': None,
+        'feature_means': None,
+    }
+    
+    if X_background is not None and len(X_background):
+        X_background = np.asarray(X_background, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(len(X_background), size=min(background_rows, len(X_background)), replace=False)
+        state['background'] = X_background[np.sort(rows)]
+        state['feature_means'] = X_background.mean(axis=0)
+    
+    return state
+
+
+def explainer_model(state: dict) -> dict:
+    """The state in the dict-of-trees form shap.TreeExplainer accepts"""
+    return {
+        'trees': state['trees'],
+        'base_offset': state['base_offset'],
+        'tree_output': state['tree_output'],
+        'objective': state['objective'],
+        'input_dtype': np.float32,
+        'internal_dtype': np.float64,
+    }
+
 
 class ExplainabilityEngine:
     """
@@ -34,6 +142,8 @@ class ExplainabilityEngine:
         """
         self.model = None
         self.explainer = None
+        self.explainer_state = None
+        self.base_value = None
         self.feature_names = None
         self. shap_available = SHAP_AVAILABLE
         
@@ -73,9 +183,8 @@ class ExplainabilityEngine:
             if not model_file.exists():
                 raise FileNotFoundError(f"Model file not found:  {model_path}")
             
-            # Load pickle
-            with open(model_file, 'rb') as f:
-                pkg = pickle.load(f)
+            # Load pickle (joblib: artifacts hold numpy arrays)
+            pkg = joblib.load(model_file)
             
             # Extract model and features based on structure
             if isinstance(pkg, dict):
@@ -83,6 +192,7 @@ class ExplainabilityEngine:
                 if 'models' in pkg: 
                     self.model = pkg['models'].get('classifier')
                     self.feature_names = pkg. get('feature_names', [])
+                    self.explainer_state = pkg.get('explainer_state')
                 # Structure 2: {'model': .. ., 'features': [...]}
                 elif 'model' in pkg:
                     self.model = pkg['model']
@@ -122,14 +232,46 @@ class ExplainabilityEngine:
             return
         
         try:
+            if self._state_matches_model():
+                # Trees already flattened at training time - no booster parsing
+                self.explainer = shap.TreeExplainer(explainer_model(self.explainer_state))
+                self.base_value = float(self.explainer_state['expected_value'])
+                print("✅ SHAP TreeExplainer loaded from precomputed state")
+                return
+            
             # Initialize TreeExplainer (optimized for tree-based models)
             self.explainer = shap.TreeExplainer(self.model)
+            self.base_value = self._expected_value(self.explainer)
             print("✅ SHAP TreeExplainer initialized")
             
         except Exception as e:
             print(f"⚠️ Could not initialize SHAP TreeExplainer: {e}")
             self.explainer = None
 
+    def _state_matches_model(self) -> bool:
+        """Precomputed state exists and was built for this classifier"""
+        state = self.explainer_state
+        if not state or state.get('version') != EXPLAINER_STATE_VERSION:
+            return False
+        try:
+            booster = self.model.get_booster()
+            n_trees = booster.num_boosted_rounds()
+            if getattr(self.model, 'best_iteration', None) is not None:
+                n_trees = int(self.model.best_iteration) + 1
+            return state['n_trees'] == n_trees and state['n_features'] == booster.num_features()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _expected_value(explainer) -> float:
+        """Positive-class expected model output of a TreeExplainer"""
+        try:
+            if isinstance(explainer.expected_value, (list, np.ndarray)):
+                return float(explainer.expected_value[-1])
+            return float(explainer.expected_value)
+        except Exception:
+            return 0.5  # Default for binary classification
+
     def explain_prediction(self, X_df: pd.DataFrame) -> dict:
         """
         Generate SHAP values for a prediction and return top factors.
@@ -198,18 +340,9 @@ class ExplainabilityEngine:
             # Sort by absolute impact magnitude
             feature_importance. sort(key=lambda x: abs(x['impact']), reverse=True)
             
-            # Get base value (expected model output)
-            try:
-                if isinstance(self.explainer.expected_value, (list, np.ndarray)):
-                    base_value = float(self.explainer.expected_value[-1])
-                else:
-                    base_value = float(self.explainer.expected_value)
-            except:
-                base_value = 0.5  # Default for binary classification
-            
             return {
                 'top_factors': feature_importance[:5],  # Top 5 factors
-                'base_value': base_value
+                'base_value': self.base_value if self.base_value is not None else 0.5
             }
             
         except Exception as e:
@@ -311,6 +444,8 @@ class ExplainabilityEngine:
         return {
             'shap_available': self.shap_available,
             'explainer_initialized': self.explainer is not None,
+            'precomputed_state': self.explainer_state is not None,
+            'base_value': self.base_value,
             'model_loaded':  self.model is not None,
             'feature_count': len(self.feature_names) if self.feature_names else 0,
             'model_type': type(self.model).__name__ if self.model else None
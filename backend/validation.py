@@ -0,0 +1,228 @@
+"""
+RECOV.AI - Vectorized CSV Validation
+====================================
+Checks an uploaded DataFrame against the AccountData schema column by column:
+dtype coercion, boolean parsing, range checks and category normalization.
+Bad rows get row-level error records; good rows continue to scoring.
+"""
+
+import typing
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.models import AccountData
+except ModuleNotFoundError:
+    from models import AccountData
+
+
+# Accepted spellings for boolean columns (compared upper-case)
+TRUE_VALUES = ['TRUE', 'T', 'YES', 'Y', '1', '1.0']
+FALSE_VALUES = ['FALSE', 'F', 'NO', 'N', '0', '0.0', '']
+
+# Canonical category values + known aliases (compared lower-case)
+CATEGORY_VALUES = {
+    'industry': {
+        'construction': 'Construction',
+        'medical': 'Medical',
+        'retail': 'Retail',
+        'tech': 'Tech',
+        'technology': 'Tech',
+        'textile': 'Textile',
+        'other': 'Other',
+    },
+    'region': {
+        'north': 'North',
+        'south': 'South',
+        'east': 'East',
+        'west': 'West',
+        'other': 'Other',
+    },
+}
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def _base_type(annotation):
+    """Unwrap Optional[X] -> X"""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    return args[0] if args else annotation
+
+
+def _schema_fields() -> Dict[str, dict]:
+    """Read column specs (type, default, bounds) from AccountData"""
+    fields = {}
+    for name, info in AccountData.model_fields.items():
+        spec = {
+            'type': _base_type(info.annotation),
+            'required': info.is_required(),
+            'default': None if info.is_required() else info.default,
+        }
+        for constraint in info.metadata:
+            for bound in ['ge', 'gt', 'le', 'lt']:
+                if hasattr(constraint, bound):
+                    spec[bound] = getattr(constraint, bound)
+        fields[name] = spec
+    return fields
+
+
+SCHEMA = _schema_fields()
+
+REQUIRED_COLUMNS = [name for name, spec in SCHEMA.items() if spec['required']]
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+class ValidationResult:
+    """Split of an upload into scoreable rows and row-level errors"""
+
+    def __init__(self, valid: pd.DataFrame, errors: List[dict], rejected_rows: int, error_count: int):
+        self.valid = valid
+        self.errors = errors
+        self.rejected_rows = rejected_rows
+        self.error_count = error_count
+
+    def summary(self) -> dict:
+        return {
+            'valid_rows': len(self.valid),
+            'rejected_rows': self.rejected_rows,
+            'error_count': self.error_count,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+
+def missing_required_columns(df: pd.DataFrame) -> List[str]:
+    """Required AccountData columns absent from the upload"""
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def validate_accounts(df: pd.DataFrame, max_errors: Optional[int] = 1000, row_offset: int = 0) -> ValidationResult:
+    """
+    Validate and coerce an account DataFrame in a vectorized way.
+
+    Args:
+        df: Raw DataFrame (e.g. straight from pd.read_csv)
+        max_errors: Cap on returned error records (None = all)
+        row_offset: Added to 'row' (position of this chunk in a larger upload)
+
+    Returns:
+        ValidationResult with the coerced valid rows and error records.
+        Error records look like {'row', 'account_id', 'column', 'value', 'error'},
+        where 'row' is the 0-based data row of the upload.
+    """
+    n_rows = len(df)
+    out = df.copy()
+    bad = np.zeros(n_rows, dtype=bool)
+    problems: List[Tuple[str, np.ndarray, str]] = []
+
+    def flag(column: str, mask, message: str):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            problems.append((column, mask, message))
+            bad[mask] = True
+
+    for name, spec in SCHEMA.items():
+        col_type = spec['type']
+
+        if name not in df.columns:
+            if spec['required']:
+                flag(name, np.ones(n_rows, dtype=bool), "Missing required column")
+            else:
+                out[name] = spec['default']
+            continue
+
+        raw = df[name]
+        is_missing = raw.isna().to_numpy().copy()
+        if raw.dtype == object or pd.api.types.is_string_dtype(raw):
+            is_missing |= (raw.astype(str).str.strip() == '').to_numpy() & ~is_missing
+
+        if spec['required']:
+            flag(name, is_missing, "Required value is missing")
+
+        # ---- Numbers ----
+        if col_type in (int, float):
+            values = pd.to_numeric(raw, errors='coerce')
+            unparsable = values.isna().to_numpy() & ~is_missing
+            flag(name, unparsable, f"Not a valid {col_type.__name__}")
+
+            # inf / -inf parse as numbers but must not reach the store
+            infinite = np.isinf(values.to_numpy(dtype=np.float64, na_value=np.nan))
+            flag(name, infinite, "Value must be finite")
+            values = values.where(~infinite)
+
+            if col_type is int:
+                fractional = values.notna().to_numpy() & (values.fillna(0) % 1 != 0).to_numpy()
+                flag(name, fractional, "Expected a whole number")
+
+            for bound, check, text in [
+                ('ge', lambda v, b: v < b, "must be >="),
+                ('gt', lambda v, b: v <= b, "must be >"),
+                ('le', lambda v, b: v > b, "must be <="),
+                ('lt', lambda v, b: v >= b, "must be <"),
+            ]:
+                if bound in spec:
+                    out_of_range = values.notna().to_numpy() & check(values.fillna(0), spec[bound]).to_numpy()
+                    flag(name, out_of_range, f"Value {text} {spec[bound]}")
+
+            default = spec['default'] if spec['default'] is not None else 0
+            values = values.fillna(default)
+            if col_type is int:
+                values = values.where(np.isfinite(values), 0).round().astype(np.int64)
+            else:
+                values = values.astype(np.float64)
+            out[name] = values
+
+        # ---- Booleans ----
+        elif col_type is bool:
+            if pd.api.types.is_bool_dtype(raw):
+                out[name] = raw.astype(bool)
+                continue
+            text = raw.astype(str).str.strip().str.upper()
+            text = text.where(~is_missing, '')
+            truthy = text.isin(TRUE_VALUES).to_numpy()
+            falsy = text.isin(FALSE_VALUES).to_numpy()
+            flag(name, ~(truthy | falsy), "Not a valid boolean")
+            out[name] = truthy
+
+        # ---- Strings / categories ----
+        else:
+            default = spec['default'] if spec['default'] is not None else ''
+            values = raw.astype(str).str.strip()
+            values = values.where(~is_missing, default)
+            if name in CATEGORY_VALUES:
+                canonical = values.str.lower().map(CATEGORY_VALUES[name])
+                values = canonical.fillna(values)
+            out[name] = values
+
+    # Row-level error records (only materialized for bad rows)
+    errors = []
+    error_count = 0
+    account_ids = df['account_id'] if 'account_id' in df.columns else None
+
+    for column, mask, message in problems:
+        rows = np.flatnonzero(mask)
+        error_count += len(rows)
+        if max_errors is not None and len(errors) >= max_errors:
+            continue
+        take = rows if max_errors is None else rows[:max_errors - len(errors)]
+        values = df[column].iloc[take] if column in df.columns else [None] * len(take)
+        for row, value in zip(take, values):
+            errors.append({
+                'row': int(row) + row_offset,
+                'account_id': None if account_ids is None or pd.isna(account_ids.iloc[row]) else str(account_ids.iloc[row]),
+                'column': column,
+                'value': None if value is None or pd.isna(value) else str(value),
+                'error': message,
+            })
+
+    errors.sort(key=lambda err: err['row'])
+    valid = out.loc[~bad].reset_index(drop=True)
+
+    return ValidationResult(valid, errors, int(bad.sum()), error_count)
@@ -0,0 +1,126 @@
+"""
+RECOV.AI - What-If Scenarios
+============================
+"What happens to this account's recovery odds if we make 3 more contact
+attempts, or if they dispute?"
+
+A request is a grid of field changes (explicit values or ranges). Every
+combination of the grid becomes one variant of the stored record. The
+variants are validated with the upload schema, turned into one feature
+matrix and scored in a single model call, next to the unchanged record
+as baseline. Nothing is stored: what-if results never reach the account
+store, the history log or the monitors.
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Try both import paths
+try:
+    from backend.validation import SCHEMA, validate_accounts
+    from backend.predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+    from backend.models import WhatIfRange
+except ModuleNotFoundError:
+    from validation import SCHEMA, validate_accounts
+    from predictor import RISK_LEVELS, DCA_OPTIONS, derive_outputs
+    from models import WhatIfRange
+
+# Fields a scenario may change (identity fields stay fixed)
+EDITABLE_FIELDS = [name for name in SCHEMA if name not in ('account_id', 'company_name')]
+
+
+def expand_values(field: str, spec, current) -> List[Any]:
+    """Explicit values as given; a range becomes start, start + step, ... ≤ stop"""
+    if isinstance(spec, dict):
+        spec = WhatIfRange(**spec)
+    if not isinstance(spec, WhatIfRange):
+        values = list(spec)
+        if not values:
+            raise ValueError(f"'{field}': no values given")
+        return values
+
+    if SCHEMA[field]['type'] not in (int, float):
+        raise ValueError(f"'{field}': ranges only work for numeric fields, give a list of values")
+    if spec.stop < spec.start:
+        raise ValueError(f"'{field}': stop is below start")
+    count = int(math.floor((spec.stop - spec.start) / spec.step + 1e-9)) + 1
+    values = spec.start + spec.step * np.arange(count)
+    if spec.relative:
+        values = values + float(current or 0)
+    if SCHEMA[field]['type'] is int and np.allclose(values, np.round(values)):
+        return [int(v) for v in np.round(values)]
+    return [round(float(v), 10) for v in values]
+
+
+def build_scenarios(record: dict, changes: Dict[str, Any], max_scenarios: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Variants of `record` for every combination of `changes`.
+
+    Returns:
+        (variants, grid): validated account rows, baseline first, then one
+        row per scenario; grid holds the changed fields of each scenario
+        (coerced like an upload would be)
+    Raises:
+        ValueError: unknown field, grid too large or invalid values
+    """
+    if not changes:
+        raise ValueError("No changes given")
+    unknown = [field for field in changes if field not in EDITABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown or fixed fields: {', '.join(unknown)} (editable: {', '.join(EDITABLE_FIELDS)})")
+
+    # Check the grid size before building anything
+    lengths = {}
+    for field, spec in changes.items():
+        if isinstance(spec, (dict, WhatIfRange)):
+            r = spec if isinstance(spec, WhatIfRange) else WhatIfRange(**spec)
+            lengths[field] = max(0, int(math.floor((r.stop - r.start) / r.step + 1e-9)) + 1)
+        else:
+            lengths[field] = len(spec)
+    total = math.prod(lengths.values())
+    if total > max_scenarios:
+        raise ValueError(f"Too many scenarios: {total:,} (max {max_scenarios:,}); narrow the ranges")
+
+    values = {field: expand_values(field, spec, record.get(field)) for field, spec in changes.items()}
+    grid = pd.MultiIndex.from_product(list(values.values()), names=list(values)).to_frame(index=False)
+
+    variants = pd.DataFrame([record]).iloc[np.zeros(len(grid) + 1, dtype=np.int64)].reset_index(drop=True)
+    for field in grid.columns:
+        variants[field] = pd.Series([record.get(field)] + grid[field].tolist(), dtype=object)
+
+    checked = validate_accounts(variants, max_errors=None)
+    if checked.errors:
+        problems = sorted({(e['column'], e['value'], e['error']) for e in checked.errors}, key=str)
+        raise ValueError("; ".join(f"{col}={value}: {error}" for col, value, error in problems[:5]))
+    return checked.valid, checked.valid.loc[1:, list(grid.columns)].reset_index(drop=True)
+
+
+def scenario_results(grid: pd.DataFrame, probs: np.ndarray, limit: int) -> dict:
+    """Baseline, best / worst scenario and per-scenario outcomes (grid order)"""
+    probs = np.asarray(probs, dtype=np.float64)
+    baseline, scenario_probs = float(probs[0]), probs[1:]
+    outputs = derive_outputs(probs)
+    changes = grid.to_dict('records')
+
+    def outcome(i: int) -> dict:
+        return {
+            'recovery_probability': round(float(probs[i]), 6),
+            'risk_level': RISK_LEVELS[outputs['risk_code'][i]],
+            'expected_days': int(outputs['expected_days'][i]),
+            'recommended_dca': DCA_OPTIONS[outputs['dca_code'][i]]['name'],
+        }
+
+    def scenario(j: int) -> dict:
+        return {'changes': changes[j], **outcome(j + 1),
+                'delta': round(float(scenario_probs[j] - baseline), 6)}
+
+    return {
+        'baseline': outcome(0),
+        'scenario_count': len(grid),
+        'best': scenario(int(np.argmax(scenario_probs))),
+        'worst': scenario(int(np.argmin(scenario_probs))),
+        'scenarios': [scenario(j) for j in range(min(limit, len(grid)))],
+    }
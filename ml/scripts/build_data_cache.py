@@ -0,0 +1,55 @@
+"""
+RECOV.AI - Columnar Data Cache
+==============================
+Converts training / scoring CSVs to Parquet with compact dtypes
+(float32 numerics, int8 flags, categorical industry/region), keyed by the
+source file's hash. Training scripts pick the cache up automatically via
+training_utils.load_training_frame, and so can EDA:
+
+    import sys; sys.path.insert(0, 'ml/scripts')
+    from training_utils import load_training_frame
+    df = load_training_frame('backend/data/training_data.csv')
+
+Usage:
+    python ml/scripts/build_data_cache.py backend/data/training_data.csv backend/data/demo_data.csv
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from training_utils import DATA_PATH, CACHE_DIR, build_data_cache, cached_data_path
+
+
+def main(args):
+    for source in args.files:
+        source = Path(source)
+        if not source.exists():
+            print(f"❌ Not found: {source}")
+            continue
+
+        existed = cached_data_path(source, args.cache_dir).exists()
+        started = time.perf_counter()
+        target = build_data_cache(source, args.chunksize, args.cache_dir)
+        elapsed = time.perf_counter() - started
+
+        df = pd.read_parquet(target, memory_map=True)
+        status = "cached" if existed else f"built in {elapsed:.1f}s"
+        print(f"✅ {source.name} → {target} ({status})")
+        print(f"   {len(df):,} rows, {source.stat().st_size / 1e6:.1f} MB CSV → "
+              f"{target.stat().st_size / 1e6:.1f} MB Parquet, "
+              f"{df.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build compact Parquet caches of RECOV.AI data files")
+    parser.add_argument('files', nargs='*', default=[str(DATA_PATH)], help="CSV files to convert")
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--chunksize', type=int, default=500_000, help="Rows per conversion chunk")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,240 @@
+"""
+RECOV.AI - Model Compaction
+===========================
+Trades a little accuracy for faster /predict scoring.
+
+Starting from the trained classifier, this builds smaller variants:
+  * truncated  - the first k boosting rounds of the original booster
+  * distilled  - a shallower / shorter model retrained on the original
+                 model's predicted probabilities (soft labels)
+
+Each variant is scored on the validation split (AUC loss against the
+original) and timed on single-row and batch inference. The smallest variant
+within --max-auc-loss and --latency-budget-us is selected, and optionally
+saved as a drop-in artifact.
+
+Usage:
+    python ml/scripts/compact_model.py --max-auc-loss 0.002 --latency-budget-us 300
+    python ml/scripts/compact_model.py --output backend/models/recovery_model_compact.pkl
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from xgboost import XGBClassifier
+
+from training_utils import (
+    DATA_PATH, MODEL_PATH, REPORTS_DIR, add_outcome_if_missing, load_training_frame,
+    holdout_mask, measure_latency
+)
+from backend.feature_pipeline import FeaturePipeline
+from backend.shap_explainer import build_explainer_state
+
+
+# ============================================================================
+# DATA
+# ============================================================================
+
+def load_split(artifact: dict, data_path: Path):
+    """
+    Transform the data with the artifact's OWN pipeline and split it the way
+    the artifact was trained, so validation rows are ones it never fitted
+    """
+    if 'feature_pipeline' in artifact:
+        pipeline = FeaturePipeline.from_dict(artifact['feature_pipeline'])
+    else:
+        pipeline = FeaturePipeline.from_feature_names(artifact['feature_names'])
+
+    df = add_outcome_if_missing(load_training_frame(data_path))
+    mask = holdout_mask(df, artifact.get('metadata', {}).get('validation_split'), data_path)
+    X = pipeline.transform(df)
+    y = df['outcome'].to_numpy(dtype=np.float32)
+    return pipeline, X[~mask], y[~mask], X[mask], y[mask]
+
+
+# ============================================================================
+# VARIANTS
+# ============================================================================
+
+def model_size(booster: xgb.Booster) -> dict:
+    """Trees, total nodes and serialized bytes (the 'size' we minimize)"""
+    trees = booster.trees_to_dataframe()
+    return {
+        'trees': int(trees['Tree'].nunique()),
+        'nodes': int(len(trees)),
+        'bytes': len(booster.save_raw(raw_format='ubj')),
+    }
+
+
+def truncated_variants(booster: xgb.Booster, fractions):
+    total = booster.num_boosted_rounds()
+    for fraction in fractions:
+        rounds = max(1, int(round(total * fraction)))
+        if rounds < total:
+            yield f"truncate_{rounds}", booster[:rounds], {'rounds': rounds}
+
+
+def distilled_variants(X_train, soft_labels, depths, rounds_list, learning_rate, nthread):
+    """Student models fitted to the teacher's probabilities"""
+    dtrain = xgb.DMatrix(X_train, label=soft_labels, nthread=nthread)
+    for depth in depths:
+        params = {
+            'objective': 'binary:logistic',   # accepts soft labels in [0, 1]
+            'tree_method': 'hist',
+            'max_depth': depth,
+            'eta': learning_rate,
+            'nthread': nthread,
+            'seed': 42,
+        }
+        # Train once at the largest budget, slice for smaller ones
+        student = xgb.train(params, dtrain, num_boost_round=max(rounds_list))
+        for rounds in sorted(rounds_list):
+            yield f"distill_d{depth}_r{rounds}", student[:rounds], {'rounds': rounds, 'max_depth': depth}
+
+
+def evaluate(name, booster, X_valid, y_valid, base_auc, kind, extra) -> dict:
+    proba = booster.inplace_predict(X_valid)
+    auc = float(roc_auc_score(y_valid, proba)) if len(np.unique(y_valid)) > 1 else float('nan')
+    return {
+        'variant': name,
+        'kind': kind,
+        **extra,
+        'auc': auc,
+        'auc_loss': base_auc - auc,
+        **model_size(booster),
+        **measure_latency(booster, X_valid),
+    }
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def compact(args):
+    artifact = joblib.load(args.model)
+    original = artifact['models']['classifier']
+    # Copy: the artifact's own classifier keeps its feature names
+    booster = original.get_booster().copy()
+    # Positional feature order is guaranteed by the pipeline
+    booster.feature_names = None
+    booster.feature_types = None
+
+    pipeline, X_train, y_train, X_valid, y_valid = load_split(artifact, Path(args.data))
+    print(f"✅ Train {X_train.shape}, valid {X_valid.shape}")
+
+    base = evaluate('original', booster, X_valid, y_valid, 0.0, 'original',
+                    {'rounds': booster.num_boosted_rounds()})
+    base_auc = base['auc']
+    base['auc_loss'] = 0.0
+    results = [base]
+    print(f"   Original: {base['trees']} trees, AUC {base_auc:.4f}, "
+          f"{base['latency_single_us']:.0f}µs/row single")
+
+    fractions = [float(f) for f in args.truncate_fractions.split(',')]
+    for name, variant, extra in truncated_variants(booster, fractions):
+        results.append(evaluate(name, variant, X_valid, y_valid, base_auc, 'truncated', extra))
+
+    if not args.skip_distill:
+        soft_labels = booster.inplace_predict(X_train)
+        depths = [int(d) for d in args.distill_depths.split(',')]
+        rounds_list = [int(r) for r in args.distill_rounds.split(',')]
+        for name, variant, extra in distilled_variants(X_train, soft_labels, depths, rounds_list,
+                                                       args.learning_rate, args.nthread):
+            results.append(evaluate(name, variant, X_valid, y_valid, base_auc, 'distilled', extra))
+
+    report = pd.DataFrame(results).sort_values(['nodes', 'auc_loss']).reset_index(drop=True)
+    report['within_budget'] = (report['auc_loss'] <= args.max_auc_loss) & \
+                              (report['latency_single_us'] <= args.latency_budget_us)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = REPORTS_DIR / "compaction_report.csv"
+    report.to_csv(report_path, index=False)
+
+    columns = ['variant', 'trees', 'nodes', 'auc', 'auc_loss', 'latency_single_us',
+               'latency_batch_us_per_row', 'within_budget']
+    print(f"\n📋 Variants → {report_path}")
+    print(report[columns].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    candidates = report[report['within_budget']]
+    if candidates.empty:
+        print(f"\n❌ No variant within AUC loss ≤ {args.max_auc_loss} and "
+              f"latency ≤ {args.latency_budget_us}µs - keep the original model")
+        return None
+
+    best = candidates.iloc[0].to_dict()
+    print(f"\n🏆 Selected: {best['variant']} ({best['trees']} trees, {best['nodes']} nodes, "
+          f"AUC loss {best['auc_loss']:.4f}, {best['latency_single_us']:.0f}µs single-row)")
+
+    if args.output and best['variant'] != 'original':
+        save_variant(best, artifact, booster, X_train, pipeline, args)
+    return best
+
+
+def save_variant(best: dict, artifact: dict, booster: xgb.Booster, X_train, pipeline, args):
+    """Rebuild the selected booster and wrap it in a predictor-compatible artifact"""
+    if best['kind'] == 'truncated':
+        selected = booster[: int(best['rounds'])]
+    else:
+        _, selected, _ = next(distilled_variants(
+            X_train, booster.inplace_predict(X_train), [int(best['max_depth'])],
+            [int(best['rounds'])], args.learning_rate, args.nthread
+        ))
+    selected.feature_names = list(pipeline.feature_names)
+
+    model = XGBClassifier(n_jobs=args.nthread)
+    model.load_model(bytearray(selected.save_raw(raw_format='json')))
+
+    metadata = artifact.get('metadata', {})
+    compact_pkg = dict(artifact)
+    compact_pkg['models'] = {**artifact['models'], 'classifier': model}
+    compact_pkg['explainer_state'] = build_explainer_state(model, X_train)
+    parent_version = metadata.get('version', 1)
+    compact_pkg['metadata'] = {
+        **metadata,
+        # Its own version, so prediction logs and shadow reports tell it apart
+        'version': f"{parent_version}-compact-{best['variant']}",
+        'parent_version': parent_version,
+        'roc_auc': float(best['auc']),
+        'compaction': {
+            'variant': best['variant'],
+            'auc_loss': float(best['auc_loss']),
+            'latency_single_us': float(best['latency_single_us']),
+            'trees': int(best['trees']),
+            'compacted_at': datetime.now().isoformat(),
+        },
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(compact_pkg, output)
+    print(f"💾 Compact model saved to {output}")
+    print(json.dumps(compact_pkg['metadata']['compaction'], indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Shrink the RECOV.AI model within an accuracy/latency budget")
+    parser.add_argument('--model', default=str(MODEL_PATH), help="Trained model artifact")
+    parser.add_argument('--data', default=str(DATA_PATH), help="Labeled data (CSV or Parquet)")
+    parser.add_argument('--max-auc-loss', type=float, default=0.002, help="Allowed AUC drop vs. the original")
+    parser.add_argument('--latency-budget-us', type=float, default=500.0,
+                        help="Single-row inference budget for /predict (microseconds)")
+    parser.add_argument('--truncate-fractions', default='0.1,0.2,0.3,0.5,0.75',
+                        help="Share of boosting rounds to keep")
+    parser.add_argument('--distill-depths', default='2,3,4', help="Student tree depths")
+    parser.add_argument('--distill-rounds', default='10,25,50', help="Student round budgets")
+    parser.add_argument('--learning-rate', type=float, default=0.3, help="Student learning rate")
+    parser.add_argument('--skip-distill', action='store_true', help="Only try truncation")
+    parser.add_argument('--nthread', type=int, default=1, help="Threads (1 = like a serving worker)")
+    parser.add_argument('--output', default=None, help="Save the selected variant to this artifact path")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    compact(parse_args())
@@ -0,0 +1,54 @@
+"""
+RECOV.AI - Precompute Explainer State
+=====================================
+Adds the static SHAP explainer state (tree arrays, expected value and a
+background sample) to an existing model artifact, for artifacts trained
+before the training scripts stored it.
+
+Usage:
+    python ml/scripts/precompute_explainer.py --output backend/models/recovery_model_explained.pkl
+    python ml/scripts/precompute_explainer.py --model other.pkl --data other.csv --output other.pkl
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+
+from training_utils import DATA_PATH, MODEL_PATH
+from compact_model import load_split
+from backend.shap_explainer import build_explainer_state
+
+
+def precompute(args):
+    artifact = joblib.load(args.model)
+    model = artifact['models']['classifier']
+
+    X_background = None
+    if not args.no_background:
+        _, X_background, _, _, _ = load_split(artifact, Path(args.data), 0.2)
+
+    started = time.perf_counter()
+    state = build_explainer_state(model, X_background, background_rows=args.background_rows)
+    print(f"✅ Explainer state: {state['n_trees']} trees, expected value {state['expected_value']:.5f} "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({**artifact, 'explainer_state': state}, output)
+    print(f"💾 Artifact saved to {output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Store the SHAP explainer state in a RECOV.AI model artifact")
+    parser.add_argument('--model', default=str(MODEL_PATH), help="Model artifact to read")
+    parser.add_argument('--data', default=str(DATA_PATH), help="Training data for the background sample")
+    parser.add_argument('--background-rows', type=int, default=100)
+    parser.add_argument('--no-background', action='store_true', help="Skip the background sample")
+    parser.add_argument('--output', required=True, help="Artifact to write")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    precompute(parse_args())
@@ -14,6 +14,13 @@ from pathlib import Path
 import sys
 import os
 
+# Shared feature pipeline lives in the backend package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from backend.feature_pipeline import FeaturePipeline
+from backend.drift_monitor import build_baseline
+from backend.shap_explainer import build_explainer_state
+from training_utils import load_training_frame, split_metadata
+
 print("="*70)
 print("  RECOV.AI - MODEL RETRAINING")
 print("="*70)
@@ -40,7 +47,8 @@ if not data_path:
     print("❌ ERROR: training_data.csv not found!")
     sys.exit(1)
 
-df = pd.read_csv(data_path)
+# Compact-dtype Parquet cache keyed by the CSV's hash (built on first run)
+df = load_training_frame(data_path)
 print(f"✅ Loaded {len(df)} records from {data_path}")
 print(f"   Columns: {list(df.columns)}")
 
@@ -77,66 +85,19 @@ else:
 # ============================================================================
 print("\n🔧 Engineering features...")
 
-# Create amount_log
-df['amount_log'] = np.log1p(df['amount'])
-
-# Fill missing optional columns
-optional_cols = {
-    'shipment_volume_30d': 0,
-    'express_ratio': 0,
-    'destination_diversity': 0,
-    'contact_attempts': 0,
-    'customer_tenure_months': 0
-}
-
-for col, default_val in optional_cols.items():
-    if col not in df.columns:
-        df[col] = default_val
-    else:
-        df[col] = df[col].fillna(default_val)
-
-# Convert boolean columns
-for col in ['email_opened', 'dispute_flag']:
-    if col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].map({
-                'TRUE': 1, 'FALSE': 0, 'True': 1, 'False': 0,
-                '1': 1, '0': 0, True: 1, False: 0
-            }).fillna(0).astype(int)
-        else:
-            df[col] = df[col].astype(int)
-    else:
-        df[col] = 0
-
-# One-hot encode categoricals
-if 'industry' in df.columns:
-    industry_dummies = pd.get_dummies(df['industry'], prefix='industry')
-    df = pd.concat([df, industry_dummies], axis=1)
-
-if 'region' in df.columns:
-    region_dummies = pd.get_dummies(df['region'], prefix='region')
-    df = pd.concat([df, region_dummies], axis=1)
+# Same pipeline the API uses at serving time (learns industry/region vocabularies)
+pipeline = FeaturePipeline().fit(df)
+print(f"✅ Vocabularies: {pipeline.vocabularies}")
 
 # ============================================================================
 # 4. PREPARE FEATURES
 # ============================================================================
 print("\n📊 Preparing feature matrix...")
 
-feature_cols = [
-    'amount_log', 'days_overdue', 'payment_history_score',
-    'shipment_volume_change_30d', 'shipment_volume_30d',
-    'express_ratio', 'destination_diversity', 'contact_attempts',
-    'customer_tenure_months', 'email_opened', 'dispute_flag',
-]
-
-# Add one-hot encoded
-feature_cols.extend([col for col in df.columns if col.startswith('industry_')])
-feature_cols.extend([col for col in df.columns if col.startswith('region_')])
-
-available_features = [col for col in feature_cols if col in df.columns]
+available_features = pipeline.feature_names
 print(f"✅ Using {len(available_features)} features")
 
-X = df[available_features]
+X = pipeline.transform_frame(df)
 y = df['outcome']
 
 print(f"✅ Feature matrix:  {X.shape}")
@@ -196,10 +157,15 @@ model_path = model_dir / "recovery_model.pkl"
 model_package = {
     'models': {'classifier': model},
     'feature_names': available_features,
+    'feature_pipeline': pipeline.to_dict(),
+    'drift_baseline': build_baseline(X_train, pipeline),
+    'explainer_state': build_explainer_state(model, X_train),
     'metadata': {
         'accuracy': float(accuracy),
         'roc_auc': float(roc_auc),
         'n_features': len(available_features),
+        'validation_split': split_metadata(data_path, len(df), method='train_test_split',
+                                           test_size=0.2, random_state=42, stratify=True),
     }
 }
 
@@ -232,37 +198,8 @@ if demo_path:
         # SAFE CAST TO FLOAT to prevent crash
         print(f"   Shipment Change: {float(hero['shipment_volume_change_30d']):+.2f}")
         
-        # Prepare features
-        hero_data = {
-            'amount_log': np.log1p(hero['amount']),
-            'days_overdue': hero['days_overdue'],
-            'payment_history_score': hero['payment_history_score'],
-            'shipment_volume_change_30d': hero['shipment_volume_change_30d'],
-        }
-        
-        # Fill defaults
-        for col in optional_cols.keys():
-            hero_data[col] = 0
-        
-        # Boolean
-        for col in ['email_opened', 'dispute_flag']:
-            val = str(hero.get(col, '')).upper()
-            hero_data[col] = 1 if val == 'TRUE' else 0
-        
-        hero_df = pd.DataFrame([hero_data])
-        
-        # One-hot encode
-        for feat in available_features:
-            if feat.startswith('industry_'):
-                industry_val = feat.replace('industry_', '')
-                hero_df[feat] = 1 if hero.get('industry', '') == industry_val else 0
-            elif feat.startswith('region_'):
-                region_val = feat.replace('region_', '')
-                hero_df[feat] = 1 if hero.get('region', '') == region_val else 0
-            elif feat not in hero_df.columns:
-                hero_df[feat] = 0
-        
-        hero_df = hero_df[available_features]
+        # Prepare features (same pipeline as training and serving)
+        hero_df = pipeline.transform_frame(hero.to_dict())
         
         # Predict
         prob = model.predict_proba(hero_df)[0][1]
@@ -0,0 +1,239 @@
+"""
+RECOV.AI - Out-of-Core Training
+===============================
+Trains the recovery classifier on labeled histories too large for pandas.
+
+The data (CSV or Parquet) is streamed in chunks twice: once to learn the
+feature pipeline's category vocabularies, then through an xgboost.DataIter
+into a QuantileDMatrix (or an external-memory matrix with --external-memory).
+Training uses the 'hist' tree method with an explicit thread count and early
+stopping (on validation log-loss) on a hash-based validation split. The drift
+baseline is folded from the training chunks while they stream by. Peak RSS
+and wall time are reported.
+
+Usage:
+    python ml/scripts/train_large.py --data outcomes.parquet --nthread 8 --output models/large.pkl
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+from training_utils import (
+    DATA_PATH, add_outcome_if_missing, iter_chunks, fit_pipeline,
+    validation_mask, split_metadata, peak_rss_mb, Stopwatch
+)
+from backend.shap_explainer import build_explainer_state
+from backend.drift_monitor import baseline_stats
+
+
+# ============================================================================
+# DATA STREAMING
+# ============================================================================
+
+class ChunkIter(xgb.DataIter):
+    """Feeds one side (train or validation) of the split to XGBoost, chunk by chunk"""
+
+    def __init__(self, path, pipeline, chunksize, valid_fraction, validation, cache_prefix=None,
+                 fold_baseline=False):
+        self.path = path
+        self.pipeline = pipeline
+        self.chunksize = chunksize
+        self.valid_fraction = valid_fraction
+        self.validation = validation
+        self.rows = 0
+        self._pass_rows = 0
+        self._chunks = None
+        self._offset = 0
+        # Drift baseline, folded during the first full pass only
+        self.baseline = None
+        self._fold_baseline = fold_baseline
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        # XGBoost calls reset() after every full pass; keep the last pass's count
+        if self._pass_rows:
+            self.rows = self._pass_rows
+        self._pass_rows = 0
+        self._chunks = iter_chunks(self.path, self.chunksize)
+        self._offset = 0
+
+    def next(self, input_data):
+        while True:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._fold_baseline = False
+                return False
+
+            chunk = add_outcome_if_missing(chunk)
+            mask = validation_mask(chunk, self.valid_fraction, self._offset)
+            self._offset += len(chunk)
+            if not self.validation:
+                mask = ~mask
+
+            part = chunk.loc[mask]
+            if len(part) == 0:
+                continue
+
+            self._pass_rows += len(part)
+            X = self.pipeline.transform(part)
+            if self._fold_baseline:
+                if self.baseline is None:
+                    self.baseline = baseline_stats(X, self.pipeline)
+                else:
+                    self.baseline.update(X)
+            input_data(
+                data=X,
+                label=part['outcome'].to_numpy(dtype=np.float32),
+                feature_names=self.pipeline.feature_names
+            )
+            return True
+
+
+def build_matrices(path, pipeline, args, cache_dir):
+    """Second pass: stream chunks into quantized train / validation matrices"""
+    external = args.external_memory
+    train_iter = ChunkIter(path, pipeline, args.chunksize, args.valid_fraction, validation=False,
+                           cache_prefix=os.path.join(cache_dir, 'train') if external else None,
+                           fold_baseline=True)
+    valid_iter = ChunkIter(path, pipeline, args.chunksize, args.valid_fraction, validation=True,
+                           cache_prefix=os.path.join(cache_dir, 'valid') if external else None)
+
+    if external and hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=args.max_bin, nthread=args.nthread)
+        dvalid = xgb.ExtMemQuantileDMatrix(valid_iter, max_bin=args.max_bin, nthread=args.nthread, ref=dtrain)
+    elif external:
+        # XGBoost < 3.0: external-memory DMatrix backed by the cache_prefix files
+        dtrain = xgb.DMatrix(train_iter, nthread=args.nthread)
+        dvalid = xgb.DMatrix(valid_iter, nthread=args.nthread)
+    else:
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=args.max_bin, nthread=args.nthread)
+        dvalid = xgb.QuantileDMatrix(valid_iter, max_bin=args.max_bin, nthread=args.nthread, ref=dtrain)
+
+    return dtrain, dvalid, train_iter.rows, valid_iter.rows, train_iter.baseline
+
+
+# ============================================================================
+# TRAINING
+# ============================================================================
+
+def train(args):
+    data_path = Path(args.data)
+    if not data_path.exists():
+        raise FileNotFoundError(f"❌ Data file not found at {data_path}")
+
+    timer = Stopwatch()
+    print(f"✅ Streaming data from: {data_path} ({args.chunksize:,} rows/chunk, {args.nthread} threads)")
+
+    pipeline, total_rows = fit_pipeline(data_path, args.chunksize)
+    print(f"✅ Pass 1: {total_rows:,} rows, {len(pipeline.feature_names)} features "
+          f"({timer.lap('vocabulary'):.1f}s)")
+
+    with tempfile.TemporaryDirectory(prefix="recov_xgb_cache_") as cache_dir:
+        dtrain, dvalid, n_train, n_valid, baseline = build_matrices(data_path, pipeline, args, cache_dir)
+        print(f"✅ Pass 2: train={n_train:,} valid={n_valid:,} rows quantized "
+              f"({timer.lap('quantize'):.1f}s, peak RSS {peak_rss_mb():.0f} MB)")
+
+        params = {
+            'objective': 'binary:logistic',
+            'tree_method': 'hist',
+            'max_bin': args.max_bin,
+            'nthread': args.nthread,
+            'max_depth': args.max_depth,
+            'learning_rate': args.learning_rate,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            # Early stopping watches the last metric: log-loss, not the quickly plateauing AUC
+            'eval_metric': ['auc', 'logloss'],
+            'seed': 42,
+        }
+
+        print(f"\n🤖 Training (up to {args.n_estimators} rounds, early stopping {args.early_stopping})...")
+        evals_result = {}
+        booster = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=args.n_estimators,
+            evals=[(dvalid, 'valid')],
+            early_stopping_rounds=args.early_stopping,
+            evals_result=evals_result,
+            verbose_eval=args.verbose_eval,
+        )
+        train_time = timer.lap('train')
+        # Release the matrices while their external-memory cache still exists
+        del dtrain, dvalid
+
+    best_iteration = booster.best_iteration
+    booster = booster[: best_iteration + 1]
+    valid_auc = float(evals_result['valid']['auc'][best_iteration])
+    valid_logloss = float(evals_result['valid']['logloss'][best_iteration])
+
+    print(f"   🏆 Best iteration: {best_iteration + 1}")
+    print(f"   🏆 Validation ROC-AUC: {valid_auc:.4f}  logloss: {valid_logloss:.4f}")
+
+    # Wrap in the sklearn API so the predictor can call predict_proba()
+    model = XGBClassifier(n_jobs=args.nthread)
+    model.load_model(bytearray(booster.save_raw(raw_format='json')))
+
+    model_pkg = {
+        'models': {'classifier': model},
+        'feature_names': pipeline.feature_names,
+        'feature_pipeline': pipeline.to_dict(),
+        # Rows are streamed, so no background sample is kept
+        'explainer_state': build_explainer_state(model),
+        'drift_baseline': baseline.to_dict() if baseline is not None else None,
+        'metadata': {
+            'roc_auc': valid_auc,
+            'logloss': valid_logloss,
+            'n_features': len(pipeline.feature_names),
+            'training_mode': 'external_memory' if args.external_memory else 'quantile_dmatrix',
+            'train_rows': n_train,
+            'valid_rows': n_valid,
+            'best_iteration': best_iteration + 1,
+            'params': {k: v for k, v in params.items() if k != 'eval_metric'},
+            'validation_split': split_metadata(data_path, n_train + n_valid,
+                                               method='hash', valid_fraction=args.valid_fraction),
+        }
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model_pkg, output)
+    timer.lap('save')
+
+    print(f"\n💾 Model saved to {output}")
+    print("\n⏱️  Wall time:")
+    for phase, seconds in timer.phases.items():
+        print(f"   {phase:<12} {seconds:8.1f}s")
+    print(f"   {'total':<12} {timer.total():8.1f}s")
+    print(f"📈 Peak RSS: {peak_rss_mb():.0f} MB")
+    print(f"   Training: {train_time:.1f}s for {n_train:,} rows")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Out-of-core XGBoost training for RECOV.AI")
+    parser.add_argument('--data', default=str(DATA_PATH), help="CSV or Parquet with labeled outcomes")
+    parser.add_argument('--output', required=True, help="Where to write the model artifact")
+    parser.add_argument('--chunksize', type=int, default=500_000, help="Rows per streamed chunk")
+    parser.add_argument('--nthread', type=int, default=os.cpu_count() or 1, help="XGBoost threads")
+    parser.add_argument('--valid-fraction', type=float, default=0.1, help="Share of rows held out for early stopping")
+    parser.add_argument('--n-estimators', type=int, default=1000, help="Maximum boosting rounds")
+    parser.add_argument('--early-stopping', type=int, default=50, help="Stop after this many rounds without improvement")
+    parser.add_argument('--max-depth', type=int, default=6)
+    parser.add_argument('--learning-rate', type=float, default=0.1)
+    parser.add_argument('--max-bin', type=int, default=256, help="Histogram bins per feature")
+    parser.add_argument('--external-memory', action='store_true',
+                        help="Page the quantized matrix through a disk cache instead of RAM")
+    parser.add_argument('--verbose-eval', type=int, default=50, help="Print metrics every N rounds")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    train(parse_args())
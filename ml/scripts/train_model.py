@@ -3,6 +3,7 @@ import numpy as np
 import pickle
 import json
 import os
+import sys
 from pathlib import Path
 from xgboost import XGBClassifier, XGBRegressor
 from sklearn.model_selection import train_test_split
@@ -11,6 +12,12 @@ from sklearn.metrics import accuracy_score, roc_auc_score
 # --- CONFIG ---
 # Automatically find the project root based on where this file is
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(BASE_DIR))
+from backend.feature_pipeline import FeaturePipeline
+from backend.drift_monitor import build_baseline
+from backend.shap_explainer import build_explainer_state
+from training_utils import load_training_frame, split_metadata
+
 DATA_PATH = BASE_DIR / "backend" / "data" / "training_data.csv"
 MODEL_PATH = BASE_DIR / "backend" / "models" / "recovery_model.pkl"
 METADATA_PATH = BASE_DIR / "backend" / "models" / "model_metadata.json"
@@ -20,7 +27,8 @@ def load_and_prep_data():
     if not DATA_PATH.exists():
         raise FileNotFoundError(f"❌ Data file not found at {DATA_PATH}")
         
-    df = pd.read_csv(DATA_PATH)
+    # Compact-dtype Parquet cache keyed by the CSV's hash (built on first run)
+    df = load_training_frame(DATA_PATH)
     
     # --- 1. AUTO-FIX: Generate 'outcome' if missing ---
     if 'outcome' not in df.columns:
@@ -56,25 +64,32 @@ def load_and_prep_data():
     if 'amount' in df.columns:
         df['amount_log'] = np.log1p(df['amount'])
     
-    df.fillna(0, inplace=True)
+    numeric_cols = df.select_dtypes(include='number').columns
+    df[numeric_cols] = df[numeric_cols].fillna(0)
     return df
 
 def train():
     df = load_and_prep_data()
     
-    # Define Features (Updated to match your new Day 1 Schema)
-    features = [
-        'amount_log', 'days_overdue', 'payment_history_score', 
+    # Define Features (Updated to match your new Day 1 Schema) - numeric only,
+    # built by the same pipeline the API uses at serving time
+    numeric = [
+        'amount', 'days_overdue', 'payment_history_score', 
         'shipment_volume_change_30d', 'shipment_volume_30d', 
         'express_ratio', 'destination_diversity', 
         'contact_attempts', 'customer_tenure_months'
     ]
     
     # Verify columns exist
-    available_features = [f for f in features if f in df.columns]
+    pipeline = FeaturePipeline(
+        numeric_features=[f for f in numeric if f in df.columns],
+        flag_features=[],
+        categorical_features=[]
+    ).fit(df)
+    available_features = pipeline.feature_names
     print(f"features used: {available_features}")
     
-    X = df[available_features]
+    X = pipeline.transform_frame(df)
     y_class = df['outcome']
     y_days = df['days_to_pay']
     y_pct = df['recovery_percentage']
@@ -113,7 +128,16 @@ def train():
             'regressor_days': reg_days,
             'regressor_pct': reg_pct
         },
-        'feature_names': available_features
+        'feature_names': available_features,
+        'feature_pipeline': pipeline.to_dict(),
+        'drift_baseline': build_baseline(X_train, pipeline),
+        'explainer_state': build_explainer_state(clf, X_train),
+        'metadata': {
+            'roc_auc': float(roc),
+            'n_features': len(available_features),
+            'validation_split': split_metadata(DATA_PATH, len(df), method='train_test_split',
+                                               test_size=0.2, random_state=42, stratify=False),
+        }
     }
     
     # Create directory if it doesn't exist
@@ -0,0 +1,120 @@
+"""
+RECOV.AI - Segment Model Training
+=================================
+Trains one classifier per segment (industry, region, or industry × region)
+on top of the existing global model and writes an artifact bundle the
+predictor routes by segment.
+
+For every segment with at least --min-rows training rows a model with the
+global model's hyperparameters is fitted on that segment only. It is kept
+only if it beats the global model on the segment's validation rows by
+--min-gain AUC, where validation rows are the global model's own hold-out; every other segment keeps using the global model.
+
+Segment models are saved as separate files next to the output artifact
+(<output stem>_segments/<segment>.pkl) so the API loads them lazily.
+
+Usage:
+    python ml/scripts/train_segments.py --by industry --output backend/models/recovery_model_segmented.pkl
+    python ml/scripts/train_segments.py --by industry,region --min-rows 5000 --min-gain 0.002 --output ...
+"""
+
+import argparse
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from xgboost import XGBClassifier
+
+from training_utils import DATA_PATH, MODEL_PATH, REPORTS_DIR
+from compact_model import load_split
+from backend.model_pool import segment_keys, segment_filename
+
+
+def auc_or_none(y: np.ndarray, scores: np.ndarray):
+    """AUC, or None when the rows hold a single class"""
+    return float(roc_auc_score(y, scores)) if len(np.unique(y)) == 2 else None
+
+
+def train_segments(args):
+    artifact = joblib.load(args.model)
+    global_model = artifact['models']['classifier']
+    by = [col.strip() for col in args.by.split(',')]
+
+    pipeline, X_train, y_train, X_valid, y_valid = load_split(artifact, Path(args.data))
+    names = pipeline.feature_names
+    print(f"✅ Train {X_train.shape}, valid {X_valid.shape}, segments by {'/'.join(by)}")
+
+    train_codes, train_keys = segment_keys(X_train, names, by)
+    valid_codes, valid_keys = segment_keys(X_valid, names, by)
+    valid_index = {key: code for code, key in enumerate(valid_keys)}
+    global_valid = global_model.predict_proba(pd.DataFrame(X_valid, columns=names))[:, 1]
+
+    output = Path(args.output)
+    segment_dir = output.parent / f"{output.stem}_segments"
+    if segment_dir.exists():
+        shutil.rmtree(segment_dir)
+    segment_dir.mkdir(parents=True)
+
+    params = {**global_model.get_params(), 'n_jobs': args.nthread}
+    models, report = {}, []
+    for code, key in enumerate(train_keys):
+        rows = train_codes == code
+        valid_rows = valid_codes == valid_index[key] if key in valid_index else np.zeros(len(X_valid), bool)
+        entry = {'segment': key, 'train_rows': int(rows.sum()), 'valid_rows': int(valid_rows.sum()),
+                 'global_auc': auc_or_none(y_valid[valid_rows], global_valid[valid_rows]),
+                 'segment_auc': None, 'kept': False}
+
+        if entry['train_rows'] >= args.min_rows and len(np.unique(y_train[rows])) == 2 and \
+                entry['global_auc'] is not None:
+            model = XGBClassifier(**params)
+            model.fit(pd.DataFrame(X_train[rows], columns=names), y_train[rows])
+            scores = model.predict_proba(pd.DataFrame(X_valid[valid_rows], columns=names))[:, 1]
+            entry['segment_auc'] = auc_or_none(y_valid[valid_rows], scores)
+
+            if entry['segment_auc'] is not None and entry['segment_auc'] >= entry['global_auc'] + args.min_gain:
+                filename = segment_filename(key)
+                joblib.dump(model, segment_dir / filename)
+                models[key] = {'file': filename, 'rows': entry['train_rows'],
+                               'auc': entry['segment_auc'], 'global_auc': entry['global_auc']}
+                entry['kept'] = True
+
+        report.append(entry)
+        status = "✅ kept" if entry['kept'] else "↩️ global"
+        aucs = f"AUC {entry['segment_auc']:.4f} vs global {entry['global_auc']:.4f}" \
+            if entry['segment_auc'] is not None else "not trained"
+        print(f"   {status:<10} {key:<28} {entry['train_rows']:>8,} rows  {aucs}")
+
+    bundle = dict(artifact)
+    bundle['segments'] = {'by': by, 'directory': segment_dir.name, 'models': models}
+    bundle['metadata'] = {**artifact.get('metadata', {}), 'segmented_at': datetime.now().isoformat()}
+    joblib.dump(bundle, output)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = REPORTS_DIR / "segment_report.csv"
+    pd.DataFrame(report).to_csv(report_path, index=False)
+
+    print(f"\n💾 Bundle saved to {output} ({len(models)}/{len(train_keys)} segments specialized)")
+    print(f"📋 Report → {report_path}")
+    print(json.dumps({key: round(m['auc'] - m['global_auc'], 4) for key, m in models.items()}, indent=2))
+    return bundle
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train per-segment RECOV.AI models with a global fallback")
+    parser.add_argument('--model', default=str(MODEL_PATH), help="Global model artifact")
+    parser.add_argument('--data', default=str(DATA_PATH), help="Labeled data (CSV or Parquet)")
+    parser.add_argument('--by', default='industry', help="Segment columns, comma separated (industry, region)")
+    parser.add_argument('--min-rows', type=int, default=2000, help="Training rows needed for a segment model")
+    parser.add_argument('--min-gain', type=float, default=0.0, help="AUC gain over the global model to keep it")
+    parser.add_argument('--nthread', type=int, default=1, help="Threads per model (1 = like a serving worker)")
+    parser.add_argument('--output', required=True, help="Artifact bundle to write")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    train_segments(parse_args())
@@ -0,0 +1,378 @@
+"""
+RECOV.AI - Shared Training Helpers
+==================================
+Data location, chunked readers, label rules and resource reporting used by
+the training / tuning scripts in ml/scripts.
+"""
+
+import hashlib
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+# Project root (so `backend.*` is importable from any working directory)
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from backend.feature_pipeline import (
+    FeaturePipeline, NUMERIC_FEATURES, FLAG_FEATURES, CATEGORICAL_FEATURES, parse_flags
+)
+
+DATA_PATH = BASE_DIR / "backend" / "data" / "training_data.csv"
+MODEL_DIR = BASE_DIR / "backend" / "models"
+MODEL_PATH = MODEL_DIR / "recovery_model.pkl"
+CACHE_DIR = BASE_DIR / "ml" / "cache"
+REPORTS_DIR = BASE_DIR / "ml" / "reports"
+
+
+# ============================================================================
+# LABELS
+# ============================================================================
+
+def add_outcome_if_missing(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rule-based 'outcome' labels when the data has none
+    (same rule as retrain_model.py).
+    """
+    if 'outcome' in df.columns:
+        return df
+
+    history = pd.to_numeric(df['payment_history_score'], errors='coerce').fillna(0)
+    change = pd.to_numeric(df['shipment_volume_change_30d'], errors='coerce').fillna(0)
+    days = pd.to_numeric(df['days_overdue'], errors='coerce').fillna(0)
+
+    condition_high = history > 0.8
+    condition_medium = (history > 0.6) & ((change > 0) | (days < 45))
+
+    df = df.copy()
+    df['outcome'] = (condition_high | condition_medium).astype(np.int8)
+    return df
+
+
+# ============================================================================
+# CHUNKED READERS
+# ============================================================================
+
+def iter_chunks(path: Path, chunksize: int = 500_000, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV or Parquet file as DataFrame chunks of at most `chunksize`
+    rows, so the whole file never sits in memory.
+    """
+    path = Path(path)
+
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+            yield chunk
+
+
+# ============================================================================
+# COLUMNAR DATA CACHE (compact dtypes)
+# ============================================================================
+
+# Bumped when compact_frame changes, so stale caches are rebuilt
+CACHE_FORMAT = 2
+
+# Integer 0/1 columns stored as int8
+INT8_COLUMNS = FLAG_FEATURES + ['outcome']
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a raw frame: float32 numerics, int8 flags/labels, categorical
+    industry/region, plain strings for ids. Missing values stay missing
+    (never the string "nan"), as they are at serving time.
+    """
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col in NUMERIC_FEATURES:
+            out[col] = pd.to_numeric(values, errors='coerce').astype(np.float32)
+        elif col in INT8_COLUMNS:
+            out[col] = parse_flags(values).astype(np.int8)
+        elif col in CATEGORICAL_FEATURES:
+            out[col] = values.astype('string').str.strip().astype('category')
+        elif pd.api.types.is_numeric_dtype(values):
+            out[col] = values.astype(np.float32)
+        else:
+            out[col] = values.astype('string')
+    return pd.DataFrame(out)
+
+
+def cached_data_path(path: Path, cache_dir: Path = CACHE_DIR) -> Path:
+    """Parquet cache location for a source file, keyed by its content hash"""
+    path = Path(path)
+    return Path(cache_dir) / f"{path.stem}_{file_sha256(path)[:16]}_v{CACHE_FORMAT}.parquet"
+
+
+def build_data_cache(path: Path, chunksize: int = 500_000, cache_dir: Path = CACHE_DIR) -> Path:
+    """
+    Convert a CSV to a compact Parquet file (streamed chunk by chunk).
+    Re-uses the existing file when the source hash has not changed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    target = cached_data_path(path, cache_dir)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.parquet.tmp')
+    writer = None
+    schema = None
+    try:
+        for chunk in iter_chunks(path, chunksize):
+            table_chunk = compact_frame(chunk)
+            if schema is None:
+                # Fixed schema for every row group (dictionary indices may differ per chunk otherwise)
+                fields = []
+                for field in pa.Schema.from_pandas(table_chunk, preserve_index=False):
+                    if pa.types.is_dictionary(field.type):
+                        field = pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+                    fields.append(field)
+                schema = pa.schema(fields)
+                writer = pq.ParquetWriter(partial, schema, compression='snappy')
+            writer.write_table(pa.Table.from_pandas(table_chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    partial.replace(target)
+    return target
+
+
+def load_training_frame(path: Path, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Load a training / scoring file with compact dtypes.
+
+    Parquet sources are read directly; CSVs go through the hash-keyed Parquet
+    cache (built on first use) and are memory-mapped on later loads. Without
+    pyarrow this falls back to parsing the CSV and compacting it in memory.
+    """
+    path = Path(path)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow not installed - parsing CSV without the Parquet cache")
+        return compact_frame(pd.read_csv(path))
+
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        return pd.read_parquet(path, memory_map=True)
+
+    if not use_cache:
+        return compact_frame(pd.read_csv(path))
+
+    cached = build_data_cache(path)
+    return pd.read_parquet(cached, memory_map=True)
+
+
+# ============================================================================
+# FEATURES / SPLITS
+# ============================================================================
+
+def fit_pipeline(path, chunksize):
+    """First pass: learn category vocabularies without loading the file"""
+    pipeline = FeaturePipeline()
+    rows = 0
+    for chunk in iter_chunks(path, chunksize):
+        pipeline.partial_fit(chunk)
+        rows += len(chunk)
+    return pipeline, rows
+
+
+def validation_mask(chunk: pd.DataFrame, valid_fraction: float, offset: int) -> np.ndarray:
+    """
+    Deterministic train/validation split that is stable across passes:
+    hash of account_id when present, otherwise the global row number.
+    """
+    if 'account_id' in chunk.columns:
+        keys = pd.util.hash_pandas_object(chunk['account_id'].astype(str), index=False).to_numpy()
+    else:
+        keys = np.arange(offset, offset + len(chunk), dtype=np.uint64) * np.uint64(2654435761)
+    return (keys % 10_000) < int(valid_fraction * 10_000)
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Content hash of a data file (cache key)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------------
+# Hold-out of a trained artifact
+# ----------------------------------------------------------------------------
+
+# Split of retrain_model.py, which wrote the artifacts that predate
+# metadata['validation_split'] (including the shipped model)
+LEGACY_SPLIT = {'method': 'train_test_split', 'test_size': 0.2, 'random_state': 42, 'stratify': True}
+
+
+def split_metadata(data_path: Path, rows: int, **recipe) -> dict:
+    """metadata['validation_split']: how a trainer held rows out, and from which data"""
+    return {**recipe, 'data_sha256': file_sha256(Path(data_path)), 'rows': int(rows)}
+
+
+def holdout_mask(df: pd.DataFrame, split: Optional[dict], data_path: Optional[Path] = None) -> np.ndarray:
+    """
+    Reproduce the rows an artifact's training run held out, so a model
+    derived from it is compared on data the original never fitted.
+    df must be the full training frame in file order, with 'outcome'.
+    """
+    if not split:
+        print("⚠️  Artifact has no 'validation_split' metadata - assuming retrain_model.py's split")
+        split = LEGACY_SPLIT
+
+    if split.get('data_sha256') and data_path is not None and file_sha256(Path(data_path)) != split['data_sha256']:
+        print("⚠️  Data differs from the file the model was trained on - its hold-out may overlap training rows")
+
+    if split['method'] == 'hash':
+        return validation_mask(df, split['valid_fraction'], 0)
+
+    if split['method'] != 'train_test_split':
+        raise ValueError(f"Unknown validation split method: {split['method']}")
+    if split.get('rows') is not None and int(split['rows']) != len(df):
+        raise ValueError(f"Hold-out is positional: the model was trained on {split['rows']:,} rows, "
+                         f"the data has {len(df):,}")
+
+    stratify = df['outcome'].to_numpy() if split.get('stratify') else None
+    _, test_rows = train_test_split(np.arange(len(df)), test_size=split['test_size'],
+                                    random_state=split['random_state'], stratify=stratify)
+    mask = np.zeros(len(df), dtype=bool)
+    mask[test_rows] = True
+    return mask
+
+
+# ============================================================================
+# CACHED TRAINING MATRIX
+# ============================================================================
+
+def load_training_matrix(path: Path, valid_fraction: float = 0.2, chunksize: int = 500_000,
+                         cache_dir: Path = CACHE_DIR) -> dict:
+    """
+    Build the float32 train/validation matrices once and cache them as .npy
+    files keyed by the data file's hash. Later calls (and worker processes)
+    memory-map the cached arrays instead of re-parsing the data.
+
+    Returns:
+        dict with X_train, y_train, X_valid, y_valid (memory-mapped arrays),
+        'feature_pipeline' (dict) and 'cache_path'
+    """
+    path = Path(path)
+    key = f"{file_sha256(path)[:16]}_v{int(valid_fraction * 1000)}"
+    cache_path = Path(cache_dir) / f"matrix_{key}"
+    meta_file = cache_path / "meta.json"
+
+    if not meta_file.exists():
+        print(f"🔧 Building training matrix cache: {cache_path}")
+        pipeline, _ = fit_pipeline(path, chunksize)
+
+        parts = {'train': ([], []), 'valid': ([], [])}
+        offset = 0
+        for chunk in iter_chunks(path, chunksize):
+            chunk = add_outcome_if_missing(chunk)
+            mask = validation_mask(chunk, valid_fraction, offset)
+            offset += len(chunk)
+            for name, rows in (('train', ~mask), ('valid', mask)):
+                part = chunk.loc[rows]
+                parts[name][0].append(pipeline.transform(part))
+                parts[name][1].append(part['outcome'].to_numpy(dtype=np.float32))
+
+        cache_path.mkdir(parents=True, exist_ok=True)
+        for name, (xs, ys) in parts.items():
+            np.save(cache_path / f"X_{name}.npy", np.concatenate(xs))
+            np.save(cache_path / f"y_{name}.npy", np.concatenate(ys))
+
+        with open(meta_file, 'w') as f:
+            json.dump({
+                'source': str(path),
+                'feature_pipeline': pipeline.to_dict(),
+                'valid_fraction': valid_fraction,
+            }, f, indent=2)
+    else:
+        print(f"✅ Using cached training matrix: {cache_path}")
+
+    with open(meta_file) as f:
+        meta = json.load(f)
+
+    matrix = {
+        name: np.load(cache_path / f"{name}.npy", mmap_mode='r')
+        for name in ['X_train', 'y_train', 'X_valid', 'y_valid']
+    }
+    matrix['feature_pipeline'] = meta['feature_pipeline']
+    matrix['cache_path'] = str(cache_path)
+    return matrix
+
+
+# ============================================================================
+# SERVING COST
+# ============================================================================
+
+def measure_latency(booster, X: np.ndarray, repeats: int = 200) -> dict:
+    """Median single-row latency and per-row batch latency (microseconds)"""
+    rows = np.ascontiguousarray(X[:repeats])
+    single = []
+    for i in range(len(rows)):
+        started = time.perf_counter()
+        booster.inplace_predict(rows[i:i + 1])
+        single.append(time.perf_counter() - started)
+
+    batch = np.ascontiguousarray(X[:10_000])
+    started = time.perf_counter()
+    booster.inplace_predict(batch)
+    batch_time = time.perf_counter() - started
+
+    return {
+        'latency_single_us': float(np.median(single) * 1e6) if single else 0.0,
+        'latency_batch_us_per_row': float(batch_time / max(len(batch), 1) * 1e6),
+    }
+
+
+# ============================================================================
+# RESOURCE REPORTING
+# ============================================================================
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class Stopwatch:
+    """Wall-clock timer for named phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self._last = self.started
+
+    def lap(self, name: str) -> float:
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+        return self.phases[name]
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
@@ -0,0 +1,259 @@
+"""
+RECOV.AI - Hyperparameter Search
+================================
+Parallel random search / successive halving over XGBoost settings.
+
+The training matrix is built once and cached on disk (see
+training_utils.load_training_matrix); every worker process memory-maps it.
+Each candidate is scored on validation AUC and log-loss AND on serving cost
+(training time, single-row and batch inference latency), and the results are
+written to a leaderboard CSV.
+
+Usage:
+    python ml/scripts/tune_model.py --candidates 32 --workers 4 --threads-per-worker 2
+    python ml/scripts/tune_model.py --strategy halving --candidates 27 --save-best
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score, log_loss
+from xgboost import XGBClassifier
+
+from training_utils import (
+    DATA_PATH, MODEL_PATH, REPORTS_DIR, load_training_matrix, measure_latency, split_metadata
+)
+from backend.feature_pipeline import FeaturePipeline
+from backend.drift_monitor import build_baseline
+from backend.shap_explainer import build_explainer_state
+
+
+# Search space: (kind, low, high) or list of choices
+SEARCH_SPACE = {
+    'max_depth': [3, 4, 5, 6, 8],
+    'learning_rate': ('log', 0.02, 0.3),
+    'n_estimators': [50, 100, 200, 400],
+    'subsample': ('uniform', 0.6, 1.0),
+    'colsample_bytree': ('uniform', 0.6, 1.0),
+    'min_child_weight': [1, 2, 5, 10],
+    'reg_lambda': ('log', 0.1, 10.0),
+}
+
+# Set per worker process by _init_worker
+_MATRIX = None
+_THREADS = 1
+
+
+def sample_candidates(n: int, seed: int) -> list:
+    """Draw n random configurations from SEARCH_SPACE"""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for i in range(n):
+        params = {}
+        for name, space in SEARCH_SPACE.items():
+            if isinstance(space, list):
+                params[name] = space[rng.integers(len(space))]
+            elif space[0] == 'log':
+                params[name] = float(np.exp(rng.uniform(np.log(space[1]), np.log(space[2]))))
+            else:
+                params[name] = float(rng.uniform(space[1], space[2]))
+        params['max_depth'] = int(params['max_depth'])
+        params['n_estimators'] = int(params['n_estimators'])
+        params['min_child_weight'] = int(params['min_child_weight'])
+        candidates.append({'candidate': i, **params})
+    return candidates
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def _init_worker(data_path: str, valid_fraction: float, threads: int):
+    """Pin thread count and memory-map the cached matrix once per process"""
+    global _MATRIX, _THREADS
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    _THREADS = threads
+    _MATRIX = load_training_matrix(Path(data_path), valid_fraction)
+
+
+def evaluate_candidate(candidate: dict) -> dict:
+    """Train one configuration (optionally with a reduced round budget) and score it"""
+    params = dict(candidate)
+    candidate_id = params.pop('candidate')
+    n_rounds = int(params.pop('budget', params['n_estimators']))
+    params.pop('n_estimators')
+
+    booster_params = {
+        'objective': 'binary:logistic',
+        'tree_method': 'hist',
+        'nthread': _THREADS,
+        'seed': 42,
+        'eta': params.pop('learning_rate'),
+        **params,
+    }
+
+    dtrain = xgb.DMatrix(_MATRIX['X_train'], label=_MATRIX['y_train'], nthread=_THREADS)
+    started = time.perf_counter()
+    booster = xgb.train(booster_params, dtrain, num_boost_round=n_rounds)
+    train_time = time.perf_counter() - started
+
+    X_valid = np.asarray(_MATRIX['X_valid'])
+    y_valid = np.asarray(_MATRIX['y_valid'])
+    proba = booster.inplace_predict(X_valid)
+
+    result = {**candidate, 'rounds': n_rounds}
+    result['auc'] = float(roc_auc_score(y_valid, proba)) if len(np.unique(y_valid)) > 1 else float('nan')
+    result['logloss'] = float(log_loss(y_valid, np.clip(proba, 1e-7, 1 - 1e-7), labels=[0, 1]))
+    result['train_time_s'] = train_time
+    result.update(measure_latency(booster, X_valid))
+    result['candidate'] = candidate_id
+    return result
+
+
+# ============================================================================
+# SEARCH STRATEGIES
+# ============================================================================
+
+def run_random_search(pool, candidates):
+    return list(pool.map(evaluate_candidate, candidates))
+
+
+def run_successive_halving(pool, candidates, min_rounds: int, eta: int):
+    """
+    Train every candidate on a small round budget, keep the best 1/eta by
+    log-loss, multiply the budget by eta, repeat until one remains.
+    """
+    results = []
+    alive = candidates
+    budget = min_rounds
+    rung = 0
+    while alive:
+        batch = [{**c, 'budget': min(budget, c['n_estimators'])} for c in alive]
+        rung_results = list(pool.map(evaluate_candidate, batch))
+        for r in rung_results:
+            r['rung'] = rung
+        results.extend(rung_results)
+        print(f"   Rung {rung}: {len(alive)} candidates @ ≤{budget} rounds")
+
+        if len(alive) == 1 or all(budget >= c['n_estimators'] for c in alive):
+            break
+
+        keep = max(1, len(alive) // eta)
+        ranked = sorted(rung_results, key=lambda r: r['logloss'])[:keep]
+        keep_ids = {r['candidate'] for r in ranked}
+        alive = [c for c in alive if c['candidate'] in keep_ids]
+        budget *= eta
+        rung += 1
+
+    # Leaderboard keeps each candidate's largest-budget result
+    final = {}
+    for r in results:
+        if r['candidate'] not in final or r['rounds'] >= final[r['candidate']]['rounds']:
+            final[r['candidate']] = r
+    return list(final.values())
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(args):
+    data_path = Path(args.data)
+    print(f"✅ Data: {data_path}")
+
+    # Build (or reuse) the cached matrix in the parent before forking workers
+    matrix = load_training_matrix(data_path, args.valid_fraction)
+    print(f"   Train {matrix['X_train'].shape}, valid {matrix['X_valid'].shape}")
+
+    candidates = sample_candidates(args.candidates, args.seed)
+    print(f"\n🔎 {args.strategy} search: {len(candidates)} candidates, "
+          f"{args.workers} workers × {args.threads_per_worker} threads")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(str(data_path), args.valid_fraction, args.threads_per_worker),
+    ) as pool:
+        if args.strategy == 'halving':
+            results = run_successive_halving(pool, candidates, args.min_rounds, args.eta)
+        else:
+            results = run_random_search(pool, candidates)
+    print(f"✅ Search finished in {time.perf_counter() - started:.1f}s")
+
+    leaderboard = pd.DataFrame(results).sort_values(['logloss', 'latency_single_us']).reset_index(drop=True)
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = Path(args.leaderboard) if args.leaderboard else REPORTS_DIR / "tuning_leaderboard.csv"
+    leaderboard.to_csv(out_path, index=False)
+
+    columns = ['candidate', 'max_depth', 'learning_rate', 'rounds', 'auc', 'logloss',
+               'train_time_s', 'latency_single_us', 'latency_batch_us_per_row']
+    print(f"\n🏆 Leaderboard (top 10) → {out_path}")
+    print(leaderboard[columns].head(10).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.save_best:
+        save_best(leaderboard.iloc[0].to_dict(), matrix, args)
+
+
+def save_best(best: dict, matrix: dict, args):
+    """Refit the winning configuration with the sklearn API and save the artifact"""
+    params = {k: best[k] for k in SEARCH_SPACE}
+    params['max_depth'] = int(params['max_depth'])
+    params['min_child_weight'] = int(params['min_child_weight'])
+    params['n_estimators'] = int(best['rounds'])
+
+    feature_names = matrix['feature_pipeline']['feature_names']
+    model = XGBClassifier(**params, tree_method='hist', n_jobs=args.workers * args.threads_per_worker,
+                          random_state=42, eval_metric='logloss')
+    model.fit(pd.DataFrame(np.asarray(matrix['X_train']), columns=feature_names), np.asarray(matrix['y_train']))
+
+    model_pkg = {
+        'models': {'classifier': model},
+        'feature_names': feature_names,
+        'feature_pipeline': matrix['feature_pipeline'],
+        'drift_baseline': build_baseline(matrix['X_train'], FeaturePipeline.from_dict(matrix['feature_pipeline'])),
+        'explainer_state': build_explainer_state(model, matrix['X_train']),
+        'metadata': {
+            'roc_auc': float(best['auc']),
+            'logloss': float(best['logloss']),
+            'n_features': len(feature_names),
+            'params': params,
+            'latency_single_us': float(best['latency_single_us']),
+            'validation_split': split_metadata(args.data, len(matrix['y_train']) + len(matrix['y_valid']),
+                                               method='hash', valid_fraction=args.valid_fraction),
+        }
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model_pkg, output)
+    print(f"\n💾 Best model saved to {output}")
+    print(json.dumps(params, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for RECOV.AI")
+    parser.add_argument('--data', default=str(DATA_PATH), help="CSV or Parquet with labeled outcomes")
+    parser.add_argument('--strategy', choices=['random', 'halving'], default='random')
+    parser.add_argument('--candidates', type=int, default=24, help="Configurations to try")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes")
+    parser.add_argument('--threads-per-worker', type=int, default=2, help="XGBoost threads per worker")
+    parser.add_argument('--valid-fraction', type=float, default=0.2)
+    parser.add_argument('--min-rounds', type=int, default=25, help="First-rung round budget (halving)")
+    parser.add_argument('--eta', type=int, default=3, help="Halving factor")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--leaderboard', default=None, help="Leaderboard CSV path")
+    parser.add_argument('--save-best', action='store_true', help="Refit and save the top candidate")
+    parser.add_argument('--output', default=str(MODEL_PATH), help="Artifact path for --save-best")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,216 @@
+"""
+RECOV.AI - Incremental Model Update
+===================================
+Daily refresh without a full retrain: continue boosting the current model
+on ONLY the newly labeled outcomes, check it against a held-out slice of the
+new data, and write it out as a new artifact version.
+
+Every version records the data window it was trained on in
+backend/models/versions/registry.json.
+
+Usage:
+    python ml/scripts/update_model.py --new-data outcomes_2026_10_18.csv
+    python ml/scripts/update_model.py --new-data outcomes.parquet --since 2026-10-01 --rounds 30
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score, log_loss
+from xgboost import XGBClassifier
+
+from training_utils import MODEL_DIR, MODEL_PATH, add_outcome_if_missing, file_sha256, validation_mask, Stopwatch
+from backend.feature_pipeline import FeaturePipeline
+from backend.shap_explainer import build_explainer_state
+
+VERSIONS_DIR = MODEL_DIR / "versions"
+REGISTRY_PATH = VERSIONS_DIR / "registry.json"
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+def load_registry() -> list:
+    if REGISTRY_PATH.exists():
+        with open(REGISTRY_PATH) as f:
+            return json.load(f)
+    return []
+
+
+def save_registry(registry: list):
+    VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(REGISTRY_PATH, 'w') as f:
+        json.dump(registry, f, indent=2)
+
+
+# ============================================================================
+# DATA
+# ============================================================================
+
+def load_new_outcomes(path: Path, since, date_column: str):
+    """
+    Read only the outcomes labeled after `since` (when the data has a date
+    column). Returns (DataFrame, data_window dict).
+    """
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    window = {'source': str(path), 'sha256': file_sha256(path), 'start': None, 'end': None}
+
+    if date_column in df.columns:
+        dates = pd.to_datetime(df[date_column], errors='coerce')
+        if since is not None:
+            keep = dates > pd.Timestamp(since)
+            df, dates = df.loc[keep], dates.loc[keep]
+        if len(dates.dropna()):
+            window['start'] = dates.min().isoformat()
+            window['end'] = dates.max().isoformat()
+    elif since is not None:
+        print(f"⚠️  No '{date_column}' column - using every row in {path.name}")
+
+    df = add_outcome_if_missing(df.reset_index(drop=True))
+    window['rows'] = int(len(df))
+    return df, window
+
+
+def evaluate(model, X, y) -> dict:
+    proba = model.predict_proba(X)[:, 1]
+    return {
+        'roc_auc': float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else float('nan'),
+        'logloss': float(log_loss(y, np.clip(proba, 1e-7, 1 - 1e-7), labels=[0, 1])),
+    }
+
+
+# ============================================================================
+# UPDATE
+# ============================================================================
+
+def update(args):
+    timer = Stopwatch()
+
+    artifact = joblib.load(args.model)
+    current = artifact['models']['classifier']
+    metadata = artifact.get('metadata', {})
+    parent_version = metadata.get('version', 1)
+    # Compact artifacts are versioned '<parent>-compact-<variant>'; number after their parent
+    numbered_parent = int(metadata.get('parent_version', 1) if isinstance(parent_version, str) else parent_version)
+
+    if 'feature_pipeline' in artifact:
+        pipeline = FeaturePipeline.from_dict(artifact['feature_pipeline'])
+    else:
+        pipeline = FeaturePipeline.from_feature_names(artifact['feature_names'])
+
+    # Default window start = where the current version's data ended
+    since = args.since or (metadata.get('data_window') or {}).get('end')
+    df, window = load_new_outcomes(Path(args.new_data), since, args.date_column)
+    if window['rows'] == 0:
+        print("ℹ️  No new outcomes since the last run - nothing to do")
+        return 0
+    print(f"✅ New outcomes: {window['rows']:,} rows (window {window['start']} → {window['end']})")
+
+    holdout = validation_mask(df, args.holdout_fraction, 0)
+    X = pipeline.transform_frame(df)
+    y = df['outcome'].to_numpy()
+    X_train, y_train = X.loc[~holdout], y[~holdout]
+    X_hold, y_hold = X.loc[holdout], y[holdout]
+    timer.lap('load')
+
+    before = evaluate(current, X_hold, y_hold)
+
+    # Continue boosting from the current booster
+    params = current.get_params()
+    params.pop('use_label_encoder', None)
+    params['n_estimators'] = args.rounds
+    if args.learning_rate:
+        params['learning_rate'] = args.learning_rate
+
+    updated = XGBClassifier(**params)
+    updated.fit(X_train, y_train, xgb_model=current.get_booster())
+    train_time = timer.lap('train')
+
+    after = evaluate(updated, X_hold, y_hold)
+    print(f"   Hold-out ({int(holdout.sum()):,} rows)  "
+          f"AUC {before['roc_auc']:.4f} → {after['roc_auc']:.4f}   "
+          f"logloss {before['logloss']:.4f} → {after['logloss']:.4f}")
+    print(f"   Boosted {args.rounds} extra rounds in {train_time:.2f}s "
+          f"({updated.get_booster().num_boosted_rounds()} total)")
+
+    auc_drop = before['roc_auc'] - after['roc_auc']
+    if not np.isfinite(auc_drop) and not args.force:
+        # e.g. a single-class hold-out: the check cannot run, so don't pass it
+        print("❌ Rejected: hold-out AUC is undefined (hold-out has one class); "
+              "use a larger --holdout-fraction or --force")
+        return 1
+    if auc_drop > args.max_auc_drop and not args.force:
+        print(f"❌ Rejected: hold-out AUC dropped by {auc_drop:.4f} (max {args.max_auc_drop})")
+        return 1
+
+    # Write the new version
+    registry = load_registry()
+    version = max([numbered_parent] + [entry['version'] for entry in registry]) + 1
+    window['trained_at'] = datetime.now().isoformat()
+
+    new_artifact = dict(artifact)
+    new_artifact['models'] = {**artifact['models'], 'classifier': updated}
+    new_artifact['explainer_state'] = build_explainer_state(updated, X_train)
+    new_artifact['metadata'] = {
+        **metadata,
+        'version': version,
+        'parent_version': parent_version,
+        'training_mode': 'incremental',
+        'data_window': window,
+        'holdout': after,
+        'roc_auc': after['roc_auc'],
+    }
+
+    VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    version_path = VERSIONS_DIR / f"recovery_model_v{version}.pkl"
+    joblib.dump(new_artifact, version_path)
+
+    registry.append({
+        'version': version,
+        'parent_version': parent_version,
+        'path': str(version_path.relative_to(MODEL_DIR)),
+        'data_window': window,
+        'holdout_before': before,
+        'holdout_after': after,
+        'promoted': not args.no_promote,
+    })
+    save_registry(registry)
+    print(f"\n💾 Saved version {version}: {version_path}")
+
+    if not args.no_promote:
+        shutil.copyfile(version_path, args.model)
+        print(f"✅ Promoted to {args.model} (restart the backend to pick it up)")
+
+    print(f"⏱️  Total {timer.total():.2f}s")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Warm-start the RECOV.AI model on new outcomes")
+    parser.add_argument('--new-data', required=True, help="CSV or Parquet with newly labeled outcomes")
+    parser.add_argument('--model', default=str(MODEL_PATH), help="Current model artifact")
+    parser.add_argument('--since', default=None, help="Only use outcomes after this date (default: end of last window)")
+    parser.add_argument('--date-column', default='outcome_date', help="Column holding the outcome date")
+    parser.add_argument('--rounds', type=int, default=20, help="Extra boosting rounds")
+    parser.add_argument('--learning-rate', type=float, default=None, help="Override learning rate for the new rounds")
+    parser.add_argument('--holdout-fraction', type=float, default=0.2)
+    parser.add_argument('--max-auc-drop', type=float, default=0.01, help="Reject if hold-out AUC drops more than this")
+    parser.add_argument('--force', action='store_true', help="Save even if the hold-out check fails")
+    parser.add_argument('--no-promote', action='store_true', help="Write the version without replacing the live model")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(update(parse_args()))
@@ -0,0 +1,104 @@
+"""
+RECOV.AI - Serving Memory Benchmark
+===================================
+Compares bytes per stored account for the old dict-of-dicts storage (raw
+dict + full result dict per account) against the compact AccountStore, and
+measures chunked scoring throughput.
+
+Usage (from the project root):
+    python "test and trials/bench_serving.py" --accounts 200000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backend.predictor import RecoveryPredictor
+from backend.account_store import AccountStore
+
+
+def synthetic_accounts(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'account_id': [f"BENCH{i:08d}" for i in range(n)],
+        'company_name': [f"Company {i % 5000}" for i in range(n)],
+        'amount': rng.uniform(1_000, 5_000_000, n).round(2),
+        'days_overdue': rng.integers(0, 365, n),
+        'payment_history_score': rng.uniform(0, 1, n).round(3),
+        'shipment_volume_change_30d': rng.uniform(-0.9, 0.9, n).round(3),
+        'shipment_volume_30d': rng.integers(0, 500, n),
+        'express_ratio': rng.uniform(0, 1, n).round(3),
+        'destination_diversity': rng.integers(0, 40, n),
+        'industry': rng.choice(['Tech', 'Retail', 'Medical', 'Construction', 'Textile'], n),
+        'region': rng.choice(['North', 'South', 'East', 'West'], n),
+        'email_opened': rng.integers(0, 2, n).astype(bool),
+        'dispute_flag': rng.random(n) < 0.1,
+    })
+
+
+def measure(label: str, build):
+    """Run build() under tracemalloc; return (result, bytes retained, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main(args):
+    predictor = RecoveryPredictor()
+    predictor.scoring_chunk_rows = args.chunk_rows
+    df = synthetic_accounts(args.accounts)
+    n = len(df)
+    print(f"\n📦 {n:,} synthetic accounts, chunk size {args.chunk_rows:,}")
+
+    # Old layout: raw dict + result dict per account
+    def dict_storage():
+        records = df.to_dict('records')
+        accounts_db = {r['account_id']: r for r in records}
+        results = {r['account_id']: r for r in predictor.predict_batch(records)}
+        return accounts_db, results
+
+    old, old_bytes, old_time = measure("dict", dict_storage)
+    del old
+    gc.collect()
+
+    # Compact layout: typed columns + float32 features/probabilities
+    def compact_storage():
+        store = AccountStore(feature_names=predictor.pipeline.feature_names)
+        for start in range(0, n, args.chunk_rows):
+            part = df.iloc[start:start + args.chunk_rows]
+            X, probs, _ = predictor.predict_probabilities(part)
+            rows = store.upsert(part, X)
+            store.set_predictions(rows, probs)
+        return store
+
+    store, new_bytes, new_time = measure("compact", compact_storage)
+
+    print("\n" + "=" * 70)
+    print(f"{'Layout':<28}{'bytes/account':>16}{'total MB':>12}{'seconds':>10}")
+    print("-" * 70)
+    print(f"{'dict-of-dicts':<28}{old_bytes / n:>16.0f}{old_bytes / 1e6:>12.1f}{old_time:>10.2f}")
+    print(f"{'AccountStore (compact)':<28}{new_bytes / n:>16.0f}{new_bytes / 1e6:>12.1f}{new_time:>10.2f}")
+    print("=" * 70)
+    print(f"📉 Memory reduction: {old_bytes / max(new_bytes, 1):.1f}x")
+    print(f"⚡ Compact path throughput: {n / new_time:,.0f} accounts/s")
+    print(f"ℹ️ Store self-report: {store.memory_usage()['bytes_per_account']} bytes/account")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Memory / throughput benchmark for account storage")
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--chunk-rows', type=int, default=50_000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,78 @@
+"""
+RECOV.AI - DCA Assignment Optimality Check
+==========================================
+Compares the auction solver of DCAAssigner with the exact optimum
+(scipy.optimize.linear_sum_assignment on the expanded account × seat
+matrix) and with a plain greedy, on small random portfolios.
+
+Usage (from the project root):
+    python "test and trials/check_dca_assignment.py" --trials 5
+"""
+
+import argparse
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from backend.dca_assignment import DCAAssigner, load_agencies
+from backend.predictor import derive_outputs
+
+
+def exact_optimum(values: np.ndarray, capacity: np.ndarray) -> float:
+    """One column per agency seat plus one 'unassigned' column per account"""
+    seats = np.repeat(np.arange(values.shape[1]), capacity)
+    gains = np.concatenate([values[:, seats], np.zeros((len(values), len(values)))], axis=1)
+    rows, cols = linear_sum_assignment(gains, maximize=True)
+    return float(gains[rows, cols].sum())
+
+
+def greedy(values: np.ndarray, capacity: np.ndarray) -> float:
+    """Best (account, agency) pair first, while the account is free and the agency has room"""
+    free = np.ones(len(values), dtype=bool)
+    room = capacity.copy()
+    total = 0.0
+    for flat in np.argsort(-values, axis=None, kind='stable'):
+        i, j = divmod(int(flat), values.shape[1])
+        if values[i, j] <= 0:
+            break
+        if free[i] and room[j] > 0:
+            free[i] = False
+            room[j] -= 1
+            total += float(values[i, j])
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auction vs exact DCA assignment")
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    agencies = load_agencies()
+    rng = np.random.default_rng(args.seed)
+    worst = 1.0
+
+    print(f"{'capacities':<22}{'accounts':>9}{'auction':>10}{'greedy':>10}{'rounds':>8}  converged")
+    for scale in [1, 10, 100]:
+        capacities = [c * scale for c in (3, 5, 2, 1)]
+        assigner = DCAAssigner([{**a, 'capacity': c} for a, c in zip(agencies, capacities)])
+        for _ in range(args.trials):
+            n = 10 * scale * 3
+            amount = rng.lognormal(9, 1.2, n).astype(np.float32)
+            probs = rng.random(n).astype(np.float32)
+            values = assigner.net_values(amount, probs, derive_outputs(probs)['risk_code']).astype(np.float64)
+
+            optimum = exact_optimum(values, assigner.capacity)
+            result = assigner.assign(amount, probs)
+            placed = result['agency_code'] >= 0
+            auction = float(values[np.flatnonzero(placed), result['agency_code'][placed]].sum())
+            ratio = auction / optimum
+            worst = min(worst, ratio)
+            print(f"{str(capacities):<22}{n:>9}{ratio:>10.6f}{greedy(values, assigner.capacity) / optimum:>10.6f}"
+                  f"{result['solver']['rounds']:>8}  {result['solver']['converged']}")
+
+    print(f"\n{'✅' if worst > 0.9999 else '❌'} Worst auction / optimum: {worst:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+RECOV.AI - Load Test Harness
+============================
+Drives a mix of /predict, /analyze, /account/{id} and /accounts/list
+traffic at a target request rate and checks the result against SLOs.
+
+The app is started by the harness itself:
+  * --mode asgi    (default) requests go straight into the ASGI app in this
+                   process (no sockets; the client shares the event loop)
+  * --mode server  uvicorn serves the app on an ephemeral 127.0.0.1 port in
+                   a background thread
+  * --url URL      test a server that is already running
+
+Requests are sent open-loop: each one has a scheduled start time (fixed or
+Poisson spacing) and its latency is measured from that time, so a slow
+server shows up as latency instead of silently lowering the request rate.
+
+Before the load phase a smoke check (what test_api.py used to do) seeds the
+store and verifies every endpoint once.
+
+Usage (from the project root):
+    python "test and trials/load_test.py" --rate 100 --duration 20
+    python "test and trials/load_test.py" --mode server --mix predict=50,account=30,list=15,analyze=5
+    python "test and trials/load_test.py" --url http://127.0.0.1:8000 --slo predict.p99_ms=300
+    python "test and trials/load_test.py" --json load_report.json
+
+Exit code: 0 = all SLOs met, 1 = smoke check failed or an SLO was breached.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+import pandas as pd
+
+DEMO_CSV = "backend/data/demo_data.csv"
+
+DEFAULT_MIX = "predict=60,account=25,list=10,analyze=5"
+
+# Per-endpoint service level objectives (latency in milliseconds)
+DEFAULT_SLOS = {
+    'predict': {'p95_ms': 200.0, 'p99_ms': 500.0, 'error_rate': 0.01},
+    'account': {'p95_ms': 150.0, 'p99_ms': 400.0, 'error_rate': 0.01},
+    'list': {'p95_ms': 300.0, 'p99_ms': 800.0, 'error_rate': 0.01},
+    'analyze': {'p95_ms': 3000.0, 'p99_ms': 6000.0, 'error_rate': 0.05},
+}
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+# ============================================================================
+# PAYLOADS
+# ============================================================================
+
+def synthetic_accounts(n: int, rng: np.random.Generator, prefix: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        'account_id': [f"{prefix}{i:07d}" for i in range(n)],
+        'company_name': [f"Load Test Co {i % 500}" for i in range(n)],
+        'amount': rng.uniform(1_000, 5_000_000, n).round(2),
+        'days_overdue': rng.integers(0, 365, n),
+        'payment_history_score': rng.uniform(0, 1, n).round(3),
+        'shipment_volume_change_30d': rng.uniform(-0.9, 0.9, n).round(3),
+        'shipment_volume_30d': rng.integers(0, 500, n),
+        'express_ratio': rng.uniform(0, 1, n).round(3),
+        'destination_diversity': rng.integers(0, 40, n),
+        'industry': rng.choice(['Technology', 'Retail', 'Medical', 'Construction', 'Textile'], n),
+        'region': rng.choice(['North', 'South', 'East', 'West'], n),
+        'email_opened': rng.integers(0, 2, n).astype(bool),
+        'dispute_flag': rng.random(n) < 0.1,
+    })
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+class Workload:
+    """Builds the request for each endpoint kind"""
+
+    def __init__(self, seed: int, analyze_rows: int):
+        self.rng = np.random.default_rng(seed)
+        self.account_ids = []
+        self.predict_pool = synthetic_accounts(2000, self.rng, "LOADP").to_dict('records')
+        self.analyze_csv = to_csv_bytes(synthetic_accounts(analyze_rows, self.rng, "LOADCSV"))
+        self.list_filters = [{}, {'risk_level': 'Low'}, {'risk_level': 'High'},
+                             {'industry': 'Retail'}, {'region': 'South', 'min_probability': 0.5}]
+
+    def request(self, kind: str) -> dict:
+        if kind == 'predict':
+            record = dict(self.predict_pool[self.rng.integers(len(self.predict_pool))])
+            return {'method': 'POST', 'url': '/predict', 'json': _jsonable(record)}
+        if kind == 'account':
+            account_id = self.account_ids[self.rng.integers(len(self.account_ids))]
+            return {'method': 'GET', 'url': f'/account/{account_id}'}
+        if kind == 'list':
+            return {'method': 'GET', 'url': '/accounts/list',
+                    'params': self.list_filters[self.rng.integers(len(self.list_filters))]}
+        if kind == 'analyze':
+            return {'method': 'POST', 'url': '/analyze',
+                    'files': {'file': ('load_test.csv', self.analyze_csv, 'text/csv')}}
+        raise ValueError(f"Unknown endpoint kind: {kind}")
+
+
+def _jsonable(record: dict) -> dict:
+    """numpy scalars → plain Python values"""
+    return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in record.items()}
+
+
+# ============================================================================
+# APP STARTUP
+# ============================================================================
+
+def load_app(log_dir: str):
+    """Import the FastAPI app with the prediction log kept out of the real history"""
+    os.environ.setdefault("RECOV_PREDICTION_LOG_DIR", log_dir)
+    sys.path.insert(0, os.getcwd())
+    from backend.main import app
+    return app
+
+
+class BackgroundServer:
+    """uvicorn on an ephemeral local port, in a daemon thread"""
+
+    def __init__(self, app):
+        import uvicorn
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(("127.0.0.1", 0))
+        self.port = self.socket.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, kwargs={'sockets': [self.socket]}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 30
+        while not self.server.started:
+            if time.time() > deadline or not self.thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+        self.socket.close()
+
+
+# ============================================================================
+# SMOKE CHECK
+# ============================================================================
+
+async def smoke_check(client: httpx.AsyncClient, workload: Workload) -> bool:
+    """Seed the store and hit every endpoint once (replaces test_api.py)"""
+    print("\n🔎 Smoke check")
+    checks = []
+
+    response = await client.get("/")
+    checks.append(("GET /", response.status_code == 200))
+
+    with open(DEMO_CSV, 'rb') as f:
+        demo = f.read()
+    response = await client.post("/analyze", files={'file': ('demo_data.csv', demo, 'text/csv')})
+    demo_ok = response.status_code == 200 and response.json().get('total_accounts', 0) > 0
+    checks.append(("POST /analyze (demo_data.csv)", demo_ok))
+    if demo_ok:
+        workload.account_ids.extend(p['account_id'] for p in response.json()['predictions'])
+
+    response = await client.post("/analyze", **{k: v for k, v in workload.request('analyze').items()
+                                                 if k not in ('method', 'url')})
+    load_ok = response.status_code == 200
+    checks.append(("POST /analyze (load accounts)", load_ok))
+    if load_ok:
+        workload.account_ids.extend(p['account_id'] for p in response.json()['predictions'])
+
+    response = await client.post("/predict", json=workload.request('predict')['json'])
+    checks.append(("POST /predict", response.status_code == 200 and
+                   'recovery_probability' in response.json() and 'recommended_dca' in response.json()))
+
+    if workload.account_ids:
+        account_id = workload.account_ids[0]
+        response = await client.get(f"/account/{account_id}")
+        checks.append((f"GET /account/{account_id}",
+                       response.status_code == 200 and response.json().get('account_id') == account_id))
+    else:
+        checks.append(("GET /account/{id}", False))
+
+    response = await client.get("/accounts/list")
+    checks.append(("GET /accounts/list", response.status_code == 200 and
+                   response.json().get('total_accounts', 0) >= len(workload.account_ids)))
+
+    for name, ok in checks:
+        print(f"   {'✅' if ok else '❌'} {name}")
+    return all(ok for _, ok in checks)
+
+
+# ============================================================================
+# LOAD PHASE
+# ============================================================================
+
+async def run_load(client: httpx.AsyncClient, workload: Workload, mix: dict, args) -> dict:
+    """Open-loop load at args.rate req/s; returns raw samples per endpoint"""
+    rng = np.random.default_rng(args.seed + 1)
+    total = int(args.rate * args.duration)
+    gaps = rng.exponential(1.0 / args.rate, total) if args.arrival == 'poisson' else \
+        np.full(total, 1.0 / args.rate)
+    offsets = np.cumsum(gaps) - gaps[0]
+    kinds = list(mix)
+    weights = np.asarray([mix[k] for k in kinds], dtype=float)
+    schedule = rng.choice(len(kinds), size=total, p=weights / weights.sum())
+
+    samples = defaultdict(lambda: {'latency': [], 'status': Counter()})
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    loop = asyncio.get_running_loop()
+
+    async def one(kind: str, scheduled: float):
+        request = workload.request(kind)
+        async with in_flight:
+            try:
+                response = await client.request(**request)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+        samples[kind]['latency'].append(loop.time() - scheduled)
+        samples[kind]['status'][status] += 1
+
+    print(f"\n🚀 Load: {args.rate:g} req/s for {args.duration:g}s ({total:,} requests, "
+          f"{args.arrival} arrivals, max {args.max_in_flight} in flight)")
+    started = loop.time()
+    tasks = []
+    for offset, k in zip(offsets, schedule):
+        scheduled = started + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(kinds[k], scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+
+    return {'elapsed': elapsed, 'samples': dict(samples)}
+
+
+def summarize(result: dict) -> dict:
+    elapsed = result['elapsed']
+    report = {}
+    for kind, data in sorted(result['samples'].items()):
+        latency_ms = np.asarray(data['latency']) * 1000
+        statuses = data['status']
+        ok = sum(n for s, n in statuses.items() if isinstance(s, int) and s < 400)
+        count = len(latency_ms)
+        report[kind] = {
+            'requests': count,
+            'throughput_rps': round(count / elapsed, 2),
+            'error_rate': round(1 - ok / count, 4) if count else 0.0,
+            'shed_rate': round((statuses.get(429, 0) + statuses.get(503, 0)) / count, 4) if count else 0.0,
+            'status_codes': {str(s): n for s, n in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+            **{f'p{p}_ms': round(float(np.percentile(latency_ms, p)), 2) for p in PERCENTILES},
+            'max_ms': round(float(latency_ms.max()), 2),
+        }
+    return report
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_SLOS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{kind}' (choose from {', '.join(DEFAULT_SLOS)})")
+        mix[kind] = float(weight or 1)
+    return {k: w for k, w in mix.items() if w > 0}
+
+
+def parse_slos(overrides: list) -> dict:
+    """'predict.p99_ms=300' / '*.error_rate=0.02' on top of DEFAULT_SLOS"""
+    slos = {kind: dict(limits) for kind, limits in DEFAULT_SLOS.items()}
+    for item in overrides or []:
+        key, _, value = item.partition('=')
+        kind, _, metric = key.partition('.')
+        for target in (slos if kind == '*' else [kind]):
+            if target not in slos:
+                raise SystemExit(f"❌ Unknown endpoint in --slo {item}")
+            slos[target][metric] = float(value)
+    return slos
+
+
+def check_slos(report: dict, slos: dict) -> list:
+    """List of (endpoint, metric, actual, limit) that breach their SLO"""
+    breaches = []
+    for kind, stats in report.items():
+        for metric, limit in slos.get(kind, {}).items():
+            actual = stats.get(metric)
+            if actual is not None and actual > limit:
+                breaches.append((kind, metric, actual, limit))
+    return breaches
+
+
+def print_report(report: dict, elapsed: float):
+    print(f"\n📊 Results ({elapsed:.1f}s)")
+    header = f"   {'endpoint':<9}{'reqs':>7}{'rps':>9}{'err%':>7}" + \
+             ''.join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}  status codes"
+    print(header)
+    print("   " + "-" * (len(header) - 3))
+    for kind, s in report.items():
+        codes = ' '.join(f"{code}×{n}" for code, n in s['status_codes'].items())
+        print(f"   {kind:<9}{s['requests']:>7}{s['throughput_rps']:>9.1f}{s['error_rate'] * 100:>6.1f}%" +
+              ''.join(f"{s[f'p{p}_ms']:>9.1f}" for p in PERCENTILES) + f"{s['max_ms']:>9.1f}  {codes}")
+    print("   (latencies in ms, measured from each request's scheduled start)")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+async def run(args, client_kwargs: dict) -> int:
+    workload = Workload(args.seed, args.analyze_rows)
+    mix = parse_mix(args.mix)
+    slos = parse_slos(args.slo)
+
+    async with httpx.AsyncClient(timeout=args.timeout, **client_kwargs) as client:
+        if not await smoke_check(client, workload):
+            print("\n❌ Smoke check failed - not starting the load phase")
+            return 1
+        result = await run_load(client, workload, mix, args)
+
+    report = summarize(result)
+    print_report(report, result['elapsed'])
+
+    breaches = check_slos(report, slos)
+    print("\n🎯 SLOs")
+    for kind in report:
+        limits = ', '.join(f"{m} ≤ {v:g}" for m, v in slos.get(kind, {}).items())
+        failed = [b for b in breaches if b[0] == kind]
+        print(f"   {'❌' if failed else '✅'} {kind}: {limits}")
+        for _, metric, actual, limit in failed:
+            print(f"      {metric} = {actual:g} (limit {limit:g})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'elapsed_s': result['elapsed'], 'endpoints': report,
+                       'slos': slos, 'breaches': [list(b) for b in breaches]}, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+
+    print(f"\n{'🎉 All SLOs met' if not breaches else f'⚠️ {len(breaches)} SLO breach(es)'}\n")
+    return 1 if breaches else 0
+
+
+def main(args) -> int:
+    if args.url:
+        return asyncio.run(run(args, {'base_url': args.url}))
+
+    with tempfile.TemporaryDirectory(prefix="recovai_load_") as log_dir:
+        app = load_app(log_dir)
+        if args.mode == 'server':
+            with BackgroundServer(app) as server:
+                print(f"🌐 uvicorn on {server.url}")
+                return asyncio.run(run(args, {'base_url': server.url}))
+        transport = httpx.ASGITransport(app=app)
+        return asyncio.run(run(args, {'transport': transport, 'base_url': "http://recovai.local"}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RECOV.AI load test with SLO checks")
+    parser.add_argument("--mode", choices=['asgi', 'server'], default='asgi',
+                        help="asgi = in-process transport, server = uvicorn on an ephemeral port")
+    parser.add_argument("--url", help="Test an already running server instead")
+    parser.add_argument("--rate", type=float, default=50.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Load phase length in seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--arrival", choices=['poisson', 'fixed'], default='poisson')
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Client-side concurrency cap")
+    parser.add_argument("--analyze-rows", type=int, default=200, help="Rows per /analyze upload")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--slo", action='append', metavar="ENDPOINT.METRIC=VALUE",
+                        help="Override an SLO, e.g. predict.p99_ms=300 or *.error_rate=0.02 (repeatable)")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(main(parser.parse_args()))